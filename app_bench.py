@@ -0,0 +1,256 @@
+# app_bench.py
+# Headless benchmark of codencode.py. Each scenario drives the app through
+# Streamlit's AppTest against stub_server.py (alquran.cloud and Sunnah.com
+# stubs) and a throwaway data directory, and records for every interaction
+# the wall time, peak Python memory, elements on screen and outbound HTTP
+# calls. Results are written as JSON so runs can be compared across commits.
+#
+#   python app_bench.py --output bench.json
+#   python app_bench.py --compare bench.json
+#
+# The Islamic Calendar is computed locally (hijri.py), so nothing is stubbed
+# for aladhan.com; a call there would show up as an error in the results.
+import argparse
+import base64
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = os.path.join(APP_DIR, "codencode.py")
+
+SURAH_NAMES = {1: "Al-Faatiha", 2: "Al-Baqara", 3: "Aal-i-Imraan", 18: "Al-Kahf", 36: "Yaseen", 112: "Al-Ikhlaas"}
+
+# 1x1 PNG standing in for the Home page image
+PLACEHOLDER_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg==")
+
+
+def write_synthetic_quran(path):
+    # Text export of all 114 Surahs with real ayah counts and typical verse lengths.
+    # Imported here, not at the top: quran_store reads DEEN_QURAN_API on import,
+    # which run() only points at the stub server just before calling this.
+    from quran_store import AYAH_COUNTS
+
+    with open(path, "w", encoding="utf-8") as file:
+        for number, count in enumerate(AYAH_COUNTS, 1):
+            file.write(f"Surah {number}. {SURAH_NAMES.get(number, f'Surah {number}')} (سورة {number})\n\n")
+            for ayah in range(1, count + 1):
+                file.write(f"Verse {ayah}:\n")
+                file.write(f"Arabic: {'بِسْمِ اللَّهِ الرَّحْمَٰنِ الرَّحِيمِ ' * 3}{number}:{ayah}\n")
+                file.write(f"English: {'In the name of Allah, the Entirely Merciful, the Especially Merciful. ' * 2}{number}:{ayah}\n")
+                file.write(f"Urdu (محمد جوناگڑھی): {'شروع اللہ کے نام سے جو بڑا مہربان نہایت رحم والا ہے ' * 2}{number}:{ayah}\n\n")
+
+
+def prepare_data_dir(path):
+    # Fresh data directory shaped like E:/DFE
+    os.makedirs(os.path.join(path, "hadith_books"))
+    shutil.copytree(os.path.join(APP_DIR, "hadith_datasets"), os.path.join(path, "hadith_datasets"),
+                    ignore=shutil.ignore_patterns(".search_index", ".indexed"))
+    with open(os.path.join(path, "18118.jpg"), "wb") as file:
+        file.write(PLACEHOLDER_PNG)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def count_elements(node):
+    # Leaf elements under an AppTest block
+    children = getattr(node, "children", None)
+    if children is None:
+        return 1
+    return sum(count_elements(child) for child in children.values())
+
+
+def widget(app, kind, label):
+    for element in getattr(app, kind):
+        if element.label == label or element.label.startswith(label):
+            return element
+    raise LookupError(f"No {kind} labelled {label!r} on the page")
+
+
+# ---------------------------------------------------------------- scenarios
+# Each scenario is a list of (step name, action); an action changes a widget
+# and returns what to run (the AppTest, or the element whose change reruns it).
+
+def select_page(name):
+    return lambda app: app.sidebar.selectbox[0].set_value(name)
+
+
+SCENARIOS = {
+    "pages": None,  # one step per sidebar entry, see page_steps()
+    "al_baqarah": [
+        ("open Quran Module", select_page("Quran Module")),
+        ("select Al-Baqarah", lambda app: widget(app, "selectbox", "Select a Surah").set_value(
+            next(option for option in widget(app, "selectbox", "Select a Surah").options if option.startswith("2. ")))),
+        ("next page", lambda app: widget(app, "number_input", "Page (of").set_value(2)),
+        ("jump to ayah 255", lambda app: widget(app, "number_input", "Jump to ayah").set_value(255)),
+        ("rerun", lambda app: app),
+    ],
+    "muslim_paging": [
+        ("open Ahadith Collection", select_page("Ahadith Collection")),
+        ("select muslim", lambda app: widget(app, "selectbox", "Select Scholar (Dataset)").set_value("muslim")),
+    ] + [
+        (f"page {page}", (lambda page: lambda app: widget(app, "number_input", "Page Number").set_value(page))(page))
+        for page in (2, 3, 50, 300, 607)
+    ] + [
+        ("select hadith by id", lambda app: widget(app, "selectbox", "Select Hadith ID").set_value("1000")),
+    ],
+    "sunnah_lookup": [
+        ("open Ahadith Collection", select_page("Ahadith Collection")),
+        ("choose muslim", lambda app: widget(app, "selectbox", "Select Scholar (Sunnah.com)").set_value("muslim")),
+        ("fetch muslim:1", lambda app: widget(app, "button", "Fetch Hadith from Sunnah.com").click()),
+        ("fetch muslim:1 again", lambda app: widget(app, "button", "Fetch Hadith from Sunnah.com").click()),
+    ],
+    "quran_export": [
+        ("open Quran Module", select_page("Quran Module")),
+        ("export txt", lambda app: widget(app, "button", "Download Entire Quran").click()),
+        ("choose zip", lambda app: widget(app, "selectbox", "Export format").set_value("zip")),
+        ("export zip", lambda app: widget(app, "button", "Download Entire Quran").click()),
+    ],
+}
+
+
+def page_steps():
+    # One step per sidebar entry, read from the running app
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP_SCRIPT, default_timeout=300).run()
+    return [(f"open {name}", select_page(name)) for name in app.sidebar.selectbox[0].options]
+
+
+def run_scenario(name, server, data_dir, track_memory=True):
+    import config
+    import http_client
+    from streamlit.testing.v1 import AppTest
+
+    # Start every scenario cold: empty HTTP cache, fresh data directory
+    http_client.get_client().clear()
+    os.environ["DEEN_DATA_DIR"] = data_dir
+    config.load()
+    prepare_data_dir(data_dir)
+    steps = page_steps() if name == "pages" else SCENARIOS[name]
+    app = AppTest.from_file(APP_SCRIPT, default_timeout=300)
+    results = []
+    for step_name, action in [("start", lambda app: app)] + steps:
+        requests_before = server.request_count
+        if track_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        error = None
+        try:
+            action(app).run()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        wall = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if track_memory else None
+        if track_memory:
+            tracemalloc.stop()
+        results.append({
+            "step": step_name,
+            "wall_ms": round(wall * 1000, 2),
+            "peak_memory_kb": round(peak / 1024, 1) if peak is not None else None,
+            "elements": count_elements(app.main) + count_elements(app.sidebar),
+            "http_calls": server.request_count - requests_before,
+            "errors": ([error] if error else []) + [str(e.value) for e in app.exception] + [e.value for e in app.error],
+        })
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scenarios, track_memory=True):
+    # Point the app at the stubs before any app module reads its upstream URL
+    port = free_port()
+    os.environ["DEEN_QURAN_API"] = f"http://127.0.0.1:{port}/v1"
+    os.environ["DEEN_SUNNAH_URL"] = f"http://127.0.0.1:{port}"
+    sys.path.insert(0, APP_DIR)
+    import streamlit
+
+    from stub_server import QuranStubData, StubServer, SunnahStubData
+
+    with tempfile.TemporaryDirectory() as workdir:
+        quran_text = os.path.join(workdir, "quran.txt")
+        write_synthetic_quran(quran_text)
+        routes = (QuranStubData([quran_text, os.path.join(APP_DIR, "Surah_11_Hud.txt")]).routes()
+                  + SunnahStubData(os.path.join(APP_DIR, "fixtures", "sunnah")).routes())
+        server = StubServer(routes, port=port).start()
+        try:
+            report = {
+                "revision": git_revision(),
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "streamlit": streamlit.__version__,
+                "memory_tracked": track_memory,
+                "scenarios": {},
+            }
+            for name in scenarios:
+                steps = run_scenario(name, server, os.path.join(workdir, name), track_memory=False)
+                if track_memory:
+                    # tracemalloc slows Python down several times, so peak
+                    # memory comes from a second, identical cold run
+                    traced = run_scenario(name, server, os.path.join(workdir, name + "-memory"), track_memory=True)
+                    for step, traced_step in zip(steps, traced):
+                        step["peak_memory_kb"] = traced_step["peak_memory_kb"]
+                report["scenarios"][name] = steps
+        finally:
+            server.stop()
+    return report
+
+
+def print_report(report, baseline=None):
+    for name, steps in report["scenarios"].items():
+        before = {step["step"]: step for step in (baseline or {}).get("scenarios", {}).get(name, [])}
+        print(f"\n{name}")
+        print(f"  {'Step':<28}{'Wall ms':>10}{'Peak KB':>10}{'Elements':>10}{'HTTP':>6}" + ("  vs baseline" if baseline else ""))
+        for step in steps:
+            peak = f"{step['peak_memory_kb']:>10.0f}" if step["peak_memory_kb"] is not None else f"{'-':>10}"
+            line = f"  {step['step'][:27]:<28}{step['wall_ms']:>10.1f}{peak}{step['elements']:>10}{step['http_calls']:>6}"
+            old = before.get(step["step"])
+            if old and old["wall_ms"]:
+                line += f"  {step['wall_ms'] / old['wall_ms']:>5.2f}x time, {step['http_calls'] - old['http_calls']:+d} HTTP"
+            print(line)
+            for error in step["errors"]:
+                print(f"    ! {error[:200]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark codencode.py headlessly against local stubs.")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="scenario to run (repeatable; default all)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run to compare against")
+    parser.add_argument("--no-memory", action="store_true", help="skip the second, memory-traced run of each scenario")
+    args = parser.parse_args(argv)
+
+    report = run(args.scenario or list(SCENARIOS), track_memory=not args.no_memory)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        print(f"\nWrote {args.output}")
+    return 1 if any(step["errors"] for steps in report["scenarios"].values() for step in steps) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
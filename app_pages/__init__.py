@@ -0,0 +1,34 @@
+# app_pages/__init__.py
+# One module per sidebar entry, imported the first time its page is opened,
+# so heavy dependencies (dataset store, search index, PDF tools) are only
+# loaded by the pages that use them. Not named "pages" because Streamlit
+# treats a pages/ directory next to the script as a multipage app.
+import importlib
+
+from instrumentation import span
+
+# Sidebar label -> module in this package
+PAGES = {
+    "Home": "home",
+    "Islamic Calendar": "islamic_calendar",
+    "Qibla Compass": "coming_soon",
+    "Digital Library": "coming_soon",
+    "Quran Module": "quran",
+    "Ahadith Collection": "ahadith",
+    "Islamic Voice Assistant": "coming_soon",
+    "Prayer Posture Tracking": "coming_soon",
+    "Namaz Timings": "namaz_timings",
+}
+
+
+def load_page(page):
+    return importlib.import_module(f"{__name__}.{PAGES[page]}")
+
+
+def render(page):
+    with span("page.import", module=PAGES[page]):
+        module = load_page(page)
+    if PAGES[page] == "coming_soon":
+        module.render(page)
+    else:
+        module.render()
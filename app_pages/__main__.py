@@ -0,0 +1,69 @@
+# app_pages/__main__.py
+# Import-time report: `python -m app_pages` imports the app shell and then
+# each page module in a fresh interpreter and prints what every step costs.
+# "all pages" is what the single-script app used to import on every cold start.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from app_pages import PAGES
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import streamlit
+streamlit_ms = (time.perf_counter() - started) * 1000
+before = set(sys.modules)
+started = time.perf_counter()
+import config, instrumentation, app_pages
+shell_ms = (time.perf_counter() - started) * 1000
+shell_modules = set(sys.modules) - before
+before = set(sys.modules)
+started = time.perf_counter()
+for module in {modules!r}:
+    app_pages.importlib.import_module("app_pages." + module)
+page_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{"streamlit_ms": streamlit_ms, "shell_ms": shell_ms, "page_ms": page_ms,
+                  "shell_modules": len(shell_modules), "page_modules": len(set(sys.modules) - before)}}))
+"""
+
+
+def probe(modules, rounds):
+    samples = []
+    for _ in range(rounds):
+        output = subprocess.run([sys.executable, "-c", _PROBE.format(modules=list(modules))], cwd=APP_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output))
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def report(rounds=5):
+    rows = []
+    for module in dict.fromkeys(PAGES.values()):
+        labels = [label for label, name in PAGES.items() if name == module]
+        rows.append((", ".join(labels), probe([module], rounds)))
+    rows.append(("all pages", probe(list(dict.fromkeys(PAGES.values())), rounds)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the import cost of the app shell and each page.")
+    parser.add_argument("--rounds", type=int, default=5, help="fresh interpreters per measurement (median)")
+    args = parser.parse_args(argv)
+
+    rows = report(args.rounds)
+    shell = rows[0][1]
+    print(f"streamlit: {shell['streamlit_ms']:.0f} ms; app shell (config, instrumentation, app_pages): "
+          f"{shell['shell_ms']:.1f} ms, {shell['shell_modules']:.0f} modules")
+    print(f"{'Page':<62}{'Import ms':>10}{'Modules':>9}")
+    for label, row in rows:
+        print(f"{label[:61]:<62}{row['page_ms']:>10.1f}{row['page_modules']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# app_pages/ahadith.py
+# Uploaded Hadith books, dataset browsing, full-text search and Sunnah.com lookups.
+import base64
+import json
+import os
+
+import streamlit as st
+
+import config
+from book_viewer import (
+    PDF_PAGES_PER_VIEW,
+    pdf_page_count,
+    pdf_page_range,
+    pdf_page_text,
+    pdf_page_thumbnail,
+    pdf_support,
+    read_file,
+    text_page,
+    text_page_offsets,
+    thumbnail_support,
+)
+from hadith_related_table import related_hadith
+from hadith_search import open_index
+from hadith_store import open_collection
+from instrumentation import span
+from sunnah_fetcher import HADITH_FIELD_LABELS, SUNNAH_URL, open_fetcher
+
+
+def render():
+    st.header("Ahadith Collection 📜")
+
+    # Admin Section for Uploading Hadith Books
+    st.subheader("Admin: Upload Hadith Books")
+    password_input = st.text_input("Enter Admin Password", type="password")
+
+    if config.is_admin(password_input):
+        st.session_state["is_admin"] = True  # for this rerun only; also shows the performance panel
+        st.write("Admin access granted!")
+        uploaded_file = st.file_uploader("Upload a Hadith Book (PDF or Text)", type=["pdf", "txt"])
+        if uploaded_file is not None:
+            # Save the uploaded file to the hadith_books directory
+            file_path = os.path.join(config.HADITH_BOOKS_DIR, uploaded_file.name)
+            with open(file_path, "wb") as f:
+                f.write(uploaded_file.getbuffer())
+            st.success(f"Hadith book '{uploaded_file.name}' uploaded successfully!")
+    else:
+        if password_input:  # Show error only if the user has entered a password
+            st.error("Incorrect password. Please try again.")
+
+    # User Section for Viewing/Downloading Uploaded Hadith Books
+    st.subheader("Uploaded Hadith Books")
+    hadith_books = [f for f in os.listdir(config.HADITH_BOOKS_DIR) if f.endswith((".pdf", ".txt"))]
+
+    if not hadith_books:
+        st.write("No Hadith books available yet.")
+    else:
+        selected_book = st.selectbox("Select a Hadith Book to View or Download", hadith_books)
+
+        if selected_book:
+            book_path = os.path.join(config.HADITH_BOOKS_DIR, selected_book)
+
+            # Display the book: only the requested page range is read and sent
+            st.write(f"### Viewing: {selected_book}")
+            if selected_book.endswith(".pdf"):
+                if not pdf_support():
+                    st.info("Install pypdf to preview PDF books page by page. The book can still be downloaded below.")
+                else:
+                    try:
+                        total_pdf_pages = pdf_page_count(book_path)
+                        first_page = st.number_input(f"Start page (of {total_pdf_pages})", min_value=1,
+                                                     max_value=total_pdf_pages, value=1, key=f"pdf_page_{selected_book}")
+                        last_page = min(first_page + PDF_PAGES_PER_VIEW - 1, total_pdf_pages)
+                        st.caption(f"Showing pages {first_page}–{last_page} of {total_pdf_pages}")
+                        view_mode = st.radio("View as", ["Pages", "Text"], horizontal=True, key=f"pdf_view_{selected_book}")
+                        if view_mode == "Pages":
+                            if thumbnail_support():
+                                thumbnail_columns = st.columns(last_page - first_page + 1)
+                                for column, page in zip(thumbnail_columns, range(first_page, last_page + 1)):
+                                    column.image(pdf_page_thumbnail(book_path, page), caption=f"Page {page}")
+                            with span("ahadith.pdf_page_range", first_page=first_page, last_page=last_page):
+                                pdf_data = pdf_page_range(book_path, first_page, last_page)
+                            base64_pdf = base64.b64encode(pdf_data).decode("utf-8")
+                            pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="700" height="500" type="application/pdf"></iframe>'
+                            st.markdown(pdf_display, unsafe_allow_html=True)
+                        else:
+                            page_texts = [f"--- Page {page} ---\n{pdf_page_text(book_path, page)}"
+                                          for page in range(first_page, last_page + 1)]
+                            st.text_area("Hadith Text", "\n\n".join(page_texts), height=300)
+                    except Exception as e:
+                        st.error(f"Error reading PDF: {str(e)}")
+            else:  # Text file, paged by line ranges
+                total_text_pages = len(text_page_offsets(book_path))
+                text_page_number = st.number_input(f"Page (of {total_text_pages})", min_value=1,
+                                                   max_value=total_text_pages, value=1, key=f"text_page_{selected_book}")
+                with span("ahadith.text_page", page=text_page_number):
+                    page_text = text_page(book_path, text_page_number)
+                st.text_area("Hadith Text", page_text, height=300)
+
+            # Option to download the book (the file is only read when the button is clicked)
+            st.download_button(
+                label=f"Download {selected_book}",
+                data=lambda book_path=book_path: read_file(book_path),
+                file_name=selected_book,
+                mime="application/pdf" if selected_book.endswith(".pdf") else "text/plain"
+            )
+
+    # Load Hadith Datasets
+    st.subheader("Browse Hadith Datasets")
+    scholars = ["abudawud", "bukhari", "ibnmajah", "muslim", "tirmidhi"]
+    scholar_files = {scholar: f"{scholar}.js" for scholar in scholars}
+    selected_scholar = st.selectbox("Select Scholar (Dataset)", scholars)
+
+    # Load the selected scholar's dataset (memory-mapped if ingested, else parsed once per process)
+    hadith_data = None
+    try:
+        with span("ahadith.dataset_load", collection=selected_scholar):
+            hadith_data = open_collection(config.HADITH_DATASETS_DIR, selected_scholar)
+    except FileNotFoundError:
+        st.error(f"Dataset file for {selected_scholar} not found. Please ensure {scholar_files[selected_scholar]} exists in {config.HADITH_DATASETS_DIR}.")
+    except json.JSONDecodeError as e:
+        st.error(f"Error parsing JSON for {selected_scholar}: {str(e)}")
+    except Exception as e:
+        st.error(f"Error loading dataset for {selected_scholar}: {str(e)}")
+
+    if hadith_data:
+        # Option 1: Select Hadith by ID
+        st.write("### Select Hadith by ID")
+        hadith_ids = hadith_data.id_labels()
+        selected_hadith_id = st.selectbox("Select Hadith ID", hadith_ids)
+
+        selected_hadith = hadith_data.by_id(selected_hadith_id)
+        if selected_hadith:
+            st.write("#### Hadith Details")
+            st.write(f"**ID:** {selected_hadith.id}")
+            st.write(f"**Header:** {selected_hadith.header}")
+            st.write(f"**Hadith (English):** {selected_hadith.hadith_english}")
+            st.write(f"**Book:** {selected_hadith.book}")
+            st.write(f"**Reference Number:** {selected_hadith.refno}")
+            st.write(f"**Book Name:** {selected_hadith.bookName}")
+            st.write(f"**Chapter Name:** {selected_hadith.chapterName}")
+
+            # Parallel narrations in the other collections, precomputed by hadith_related.py
+            with span("ahadith.related", collection=selected_scholar):
+                related = related_hadith(config.HADITH_DATASETS_DIR, selected_scholar, selected_hadith.index)
+                if related:
+                    with st.expander(f"Parallel narrations ({len(related)})"):
+                        for entry in related:
+                            st.write(f"**{entry['refno']}** — {entry['similarity']:.0%} similar")
+                            st.write(entry["snippet"])
+
+        # Option 2: Browse Hadith with Pagination
+        st.write("### Browse Hadith Collection")
+        items_per_page = 5
+        total_items = len(hadith_data)
+        total_pages = (total_items + items_per_page - 1) // items_per_page
+        page_number = st.number_input("Page Number", min_value=1, max_value=total_pages, value=1)
+
+        start_idx = (page_number - 1) * items_per_page
+        end_idx = min(start_idx + items_per_page, total_items)
+        with span("ahadith.browse_render", page=page_number):
+            for hadith in hadith_data[start_idx:end_idx]:
+                st.write("---")
+                st.write(f"**ID:** {hadith.id}")
+                st.write(f"**Header:** {hadith.header}")
+                st.write(f"**Hadith (English):** {hadith.hadith_english}")
+                st.write(f"**Book:** {hadith.book}")
+                st.write(f"**Reference Number:** {hadith.refno}")
+                st.write(f"**Book Name:** {hadith.bookName}")
+                st.write(f"**Chapter Name:** {hadith.chapterName}")
+
+    # Full-text search across every dataset in the datasets directory
+    st.subheader("Search Hadith")
+    search_query = st.text_input("Search words, \"exact phrases\" or prefixes (e.g. purif*)", key="hadith_search_query")
+    if search_query:
+        try:
+            # Stale or missing segments are rebuilt in the background (or ahead
+            # of time with "python hadith_search.py build")
+            search_index = open_index(config.HADITH_DATASETS_DIR)
+            if search_index.building:
+                st.info("The search index is being updated; results may be incomplete until it finishes.")
+            search_collections = st.multiselect("Collections", search_index.collections(), default=search_index.collections())
+            search_book = None
+            if len(search_collections) == 1:
+                book_options = ["All books"] + search_index.book_names(search_collections[0])
+                chosen_book = st.selectbox("Book", book_options)
+                search_book = None if chosen_book == "All books" else chosen_book
+            with span("ahadith.search", query=search_query):
+                results = search_index.search(search_query, collections=search_collections, book=search_book, limit=20)
+            if not results:
+                st.write("No matching hadith found.")
+            for result in results:
+                st.write("---")
+                st.write(f"**{result['refno']}** — {result['bookName']} / {result['chapterName']}")
+                st.write(result["snippet"])
+        except Exception as e:
+            st.error(f"Error searching hadith: {str(e)}")
+
+    # Fetch Specific Hadith from Sunnah.com (Previous Functionality)
+    st.subheader("Fetch Specific Hadith from Sunnah.com")
+    scholars = ["abudawud", "bukhari", "ibnmajah", "muslim", "tirmidhi"]
+    selected_scholar = st.selectbox("Select Scholar (Sunnah.com)", scholars)
+    hadith_number = st.text_input("Enter Hadith Number (e.g., 1, 2, 3)", value="1")
+
+    if st.button("Fetch Hadith from Sunnah.com"):
+        st.write(f"Fetching Hadith {hadith_number} from {selected_scholar.capitalize()}...")
+        try:
+            # Served from the local Sunnah store; only unseen numbers hit Sunnah.com
+            fetcher = open_fetcher(config.SUNNAH_DB_PATH, SUNNAH_URL)
+            with span("ahadith.sunnah_fetch", collection=selected_scholar, number=hadith_number.strip()):
+                hadith = fetcher.get(selected_scholar, hadith_number.strip())
+
+            if hadith:
+                # Display the Hadith details
+                st.write("### Hadith Details (Sunnah.com)")
+                for field, label in HADITH_FIELD_LABELS.items():
+                    st.write(f"**{label}:** {hadith[field]}")
+            else:
+                st.error("No Hadith found for the given scholar and number.")
+        except Exception as e:
+            st.error(f"Error fetching Hadith: {str(e)}")
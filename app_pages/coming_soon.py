@@ -0,0 +1,15 @@
+# app_pages/coming_soon.py
+# Pages that are announced but not built yet.
+import streamlit as st
+
+DESCRIPTIONS = {
+    "Qibla Compass": "Find the direction of the Kaaba from your location. Coming soon!",
+    "Digital Library": "Access a collection of Islamic books. Coming soon!",
+    "Islamic Voice Assistant": "Ask and get Islamic content. Coming soon!",
+    "Prayer Posture Tracking": "Learn correct Salah postures with AI. Coming soon!",
+}
+
+
+def render(page):
+    st.header(page)
+    st.write(DESCRIPTIONS[page])
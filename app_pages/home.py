@@ -0,0 +1,14 @@
+# app_pages/home.py
+# Landing page.
+import streamlit as st
+
+import config
+
+
+def render():
+    st.title("Welcome to Deen for Everyone 🕌")
+    st.write("""
+    **Deen for Everyone** is a comprehensive Islamic application designed to support your spiritual journey. 
+    Explore features like prayer timings, Quran reading, a Qibla compass, and more—all in one place!
+    """)
+    st.image(config.HOME_IMAGE_PATH, caption="A journey to spiritual growth", use_column_width=True)
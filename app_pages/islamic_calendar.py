@@ -0,0 +1,56 @@
+# app_pages/islamic_calendar.py
+# Today's Gregorian and Hijri dates and a month grid, computed offline by hijri.py.
+import calendar
+from datetime import datetime
+
+import streamlit as st
+
+from hijri import DEFAULT_REGION, HIJRI_MONTHS, REGION_ADJUSTMENTS, format_hijri, gregorian_to_hijri, month_grid_html
+from instrumentation import span
+
+
+def render():
+    st.header("Islamic Calendar 🗓️")
+
+    # Get current date
+    today = datetime.today()
+    gregorian_date = today.strftime("%B %d, %Y")  # e.g., "March 21, 2025"
+
+    # Hijri dates are computed locally (tabular calendar) with a per-region
+    # adjustment for moon-sighting based month starts (Pakistan by default)
+    regions = list(REGION_ADJUSTMENTS)
+    region = st.selectbox("Hijri date adjustment", regions, index=regions.index(DEFAULT_REGION))
+    adjustment = REGION_ADJUSTMENTS[region]
+    hijri_formatted = format_hijri(*gregorian_to_hijri(today.year, today.month, today.day, adjustment))
+
+    # Display current dates
+    st.subheader("Today’s Date")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**Gregorian (Solar):**")
+        st.write(gregorian_date)
+    with col2:
+        st.write("**Hijri (Lunar):**")
+        st.write(hijri_formatted)
+
+    # Simple month selector for dynamic calendar
+    st.subheader("View Monthly Calendar")
+    current_year = today.year
+    months = ["January", "February", "March", "April", "May", "June", 
+              "July", "August", "September", "October", "November", "December"]
+    selected_month = st.selectbox("Select Month", months, index=today.month - 1)
+    selected_year = st.number_input("Select Year", min_value=1900, max_value=2100, value=current_year)
+
+    # Hijri months spanned by the selected Gregorian month
+    month_index = months.index(selected_month) + 1
+    last_day = calendar.monthrange(selected_year, month_index)[1]
+    first_hijri = gregorian_to_hijri(selected_year, month_index, 1, adjustment)
+    last_hijri = gregorian_to_hijri(selected_year, month_index, last_day, adjustment)
+    hijri_month = f"{HIJRI_MONTHS[int(first_hijri[1]) - 1]} {int(first_hijri[0])} AH"
+    if int(last_hijri[1]) != int(first_hijri[1]):
+        hijri_month += f" – {HIJRI_MONTHS[int(last_hijri[1]) - 1]} {int(last_hijri[0])} AH"
+    st.write(f"Corresponding Hijri Month: **{hijri_month}**")
+
+    # Full calendar view with daily Hijri-Gregorian mapping (one element for the whole month)
+    with span("calendar.month_grid"):
+        st.markdown(month_grid_html(selected_year, month_index, adjustment, today=today), unsafe_allow_html=True)
@@ -0,0 +1,85 @@
+# app_pages/namaz_timings.py
+# Today's prayer times and a month or year timetable, computed offline by prayer_times.py.
+import calendar
+from datetime import date
+
+import streamlit as st
+
+from instrumentation import span
+from prayer_times import (ASR_LABELS, CITIES, HIGH_LATITUDE_RULES, METHODS, PRAYER_LABELS, PRAYERS, date_range,
+                          timetable, timetable_csv)
+
+CUSTOM_LOCATION = "Custom location"
+
+
+def render():
+    st.header("Namaz Timings 🕌")
+
+    # Location: a listed city (with its time zone and usual method) or coordinates
+    location = st.selectbox("Select City", list(CITIES) + [CUSTOM_LOCATION])
+    if location == CUSTOM_LOCATION:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            latitude = st.number_input("Latitude", min_value=-90.0, max_value=90.0, value=24.8607, format="%.4f")
+        with col2:
+            longitude = st.number_input("Longitude", min_value=-180.0, max_value=180.0, value=67.0011, format="%.4f")
+        with col3:
+            time_zone = st.number_input("UTC offset (hours)", min_value=-12.0, max_value=14.0, value=5.0, step=0.5)
+        usual_method = "MWL"
+    else:
+        latitude, longitude, time_zone, usual_method = CITIES[location]
+
+    # Calculation settings
+    methods = list(METHODS)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        method = st.selectbox("Calculation method", methods, index=methods.index(usual_method),
+                              format_func=lambda name: METHODS[name]["name"])
+    with col2:
+        asr = st.selectbox("Asr", list(ASR_LABELS), format_func=ASR_LABELS.get)
+    with col3:
+        high_latitude_rule = st.selectbox("High latitude rule", HIGH_LATITUDE_RULES)
+
+    # Today's times
+    today = date.today()
+    try:
+        with span("prayer_times.today", method=method):
+            today_row = timetable(latitude, longitude, time_zone, date_range(today, today), method, asr,
+                                  high_latitude_rule=high_latitude_rule)[0]
+    except Exception as e:
+        st.error(f"Could not calculate prayer times: {str(e)}")
+        return
+    st.subheader(f"Today’s Times ({today.strftime('%B %d, %Y')})")
+    columns = st.columns(len(PRAYERS))
+    for column, name in zip(columns, PRAYERS):
+        column.metric(PRAYER_LABELS[name], today_row[PRAYER_LABELS[name]])
+
+    # Timetable for a month or a whole year
+    st.subheader("Timetable")
+    months = list(calendar.month_name)[1:]
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_month = st.selectbox("Select Month", ["Whole year"] + months, index=today.month)
+    with col2:
+        selected_year = st.number_input("Select Year", min_value=1900, max_value=2100, value=today.year)
+    if selected_month == "Whole year":
+        first, last = date(selected_year, 1, 1), date(selected_year, 12, 31)
+        period = str(selected_year)
+    else:
+        month_index = months.index(selected_month) + 1
+        first = date(selected_year, month_index, 1)
+        last = date(selected_year, month_index, calendar.monthrange(selected_year, month_index)[1])
+        period = f"{selected_year}-{month_index:02d}"
+
+    with span("prayer_times.timetable", days=(last - first).days + 1):
+        rows = timetable(latitude, longitude, time_zone, date_range(first, last), method, asr,
+                         high_latitude_rule=high_latitude_rule)
+    st.dataframe(rows, hide_index=True)
+
+    place = location.split(",")[0].replace(" ", "_") if location != CUSTOM_LOCATION else f"{latitude:.2f}_{longitude:.2f}"
+    st.download_button(
+        label="Download timetable (CSV)",
+        data=timetable_csv(rows),
+        file_name=f"Namaz_Timings_{place}_{period}.csv",
+        mime="text/csv",
+    )
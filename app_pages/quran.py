@@ -0,0 +1,201 @@
+# app_pages/quran.py
+# Surah reader (store-backed, paged), Quran search and the Surah / full-Quran downloads.
+import streamlit as st
+
+import config
+import http_client
+from instrumentation import span
+from quran_export import EXPORT_FORMATS, export_quran
+from quran_search import is_arabic_script, open_index as open_search_index
+from quran_render import VERSES_PER_PAGE, highlight_ayah, page_count, page_of_ayah, render_page
+from quran_store import QURAN_API, QURAN_CACHE_TTL, fetch_surah_texts, open_store
+
+
+def render():
+    st.header("Quran Module 📖")
+
+    # Quran text comes from the local store; only editions that have not been
+    # imported (see quran_store.py import-api / import-text) go to the network
+    quran_store = open_store(config.QURAN_DB_PATH)
+
+    # Available Urdu translations (cached in the store after the first fetch)
+    with span("quran.editions_lookup"):
+        urdu_editions = quran_store.editions("ur")
+    if urdu_editions is None:
+        st.write("Loading Urdu translations...")
+        try:
+            response = http_client.get(f"{QURAN_API}/edition?language=ur", ttl=QURAN_CACHE_TTL)
+            editions_data = response.json()
+            if editions_data["code"] == 200:
+                urdu_editions = editions_data["data"]
+                quran_store.save_editions("ur", urdu_editions)
+            else:
+                st.error("Error fetching Urdu translations. Using default (Jalandhry).")
+        except Exception as e:
+            st.error(f"Error: {str(e)}. Using default Urdu translation (Jalandhry).")
+    if urdu_editions:
+        urdu_translation_options = {edition["name"]: edition["identifier"] for edition in urdu_editions}
+    else:
+        urdu_translation_options = {"Jalandhry": "ur.jalandhry"}  # Fallback to default
+
+    # Dropdown for selecting Urdu translation
+    selected_urdu_translation = st.selectbox("Select Urdu Translation", list(urdu_translation_options.keys()), index=0)
+    selected_urdu_identifier = urdu_translation_options[selected_urdu_translation]
+
+    # Search the imported editions: Arabic-script queries go to the Arabic text
+    # and the selected Urdu translation, anything else to the English one
+    st.subheader("Search the Quran")
+    search_query = st.text_input("Search Arabic, Urdu or English wording (harakat optional)", key="quran_search_query")
+    if search_query:
+        try:
+            if is_arabic_script(search_query):
+                search_editions = [("Arabic", "ar"), (f"Urdu ({selected_urdu_translation})", selected_urdu_identifier)]
+            else:
+                search_editions = [("English", "en.sahih")]
+            for label, edition in search_editions:
+                with span("quran.search_index", edition=edition):
+                    search_index = open_search_index(quran_store, edition)
+                if search_index is None:
+                    st.info(f"{label} is not in the local store yet; import it with quran_store.py to search it.")
+                    continue
+                with span("quran.search", edition=edition, query=search_query):
+                    total, results = search_index.search(search_query, limit=20)
+                shown = f" (showing the first {len(results)})" if total > len(results) else ""
+                st.write(f"**{label}:** {total} matching ayahs{shown}")
+                direction = ' dir="rtl" style="text-align:right"' if search_index.ngram else ""
+                st.markdown("".join(f"<p{direction}><b>{result['reference']}</b> {result['html']}</p>"
+                                    for result in results), unsafe_allow_html=True)
+        except Exception as e:
+            st.error(f"Error searching the Quran: {str(e)}")
+
+    # List of Surahs (cached in the store after the first fetch)
+    with span("quran.surah_list_lookup"):
+        surahs = quran_store.surahs()
+    if surahs is None:
+        st.write("Loading Surahs...")
+        try:
+            response = http_client.get(f"{QURAN_API}/surah", ttl=QURAN_CACHE_TTL)
+            surah_data = response.json()
+            if surah_data["code"] == 200:
+                surahs = surah_data["data"]
+                quran_store.save_surahs(surahs)
+            else:
+                surahs = []
+                st.error("Error fetching Surah list.")
+        except Exception as e:
+            surahs = []
+            st.error(f"Error: {str(e)}")
+
+    if surahs:
+        # Create a list of Surah names for the dropdown
+        surah_names = [f"{surah['number']}. {surah['englishName']} ({surah['name']})" for surah in surahs]
+        selected_surah = st.selectbox("Select a Surah", surah_names)
+        selected_surah_number = int(selected_surah.split(".")[0])
+
+        # Fetch the selected Surah's text (Arabic, English, and Urdu translations)
+        st.write(f"### Reading Surah {selected_surah}")
+        arabic_verses, english_verses, urdu_verses = [], [], []
+        try:
+            verses = {}
+            for label, edition in (("Arabic text", "ar"), ("English translation", "en.sahih"),
+                                   ("Urdu translation", selected_urdu_identifier)):
+                with span("quran.surah_texts", surah=selected_surah_number, edition=edition) as texts_span:
+                    texts = quran_store.surah_texts(selected_surah_number, edition)
+                    texts_span.note(source="store" if texts is not None else "api")
+                    if texts is None:
+                        try:
+                            texts = fetch_surah_texts(selected_surah_number, edition, QURAN_API)
+                        except ValueError:
+                            st.error(f"Error fetching {label}.")
+                            texts = ()
+                verses[edition] = texts
+            arabic_verses = verses["ar"]
+            english_verses = verses["en.sahih"]
+            urdu_verses = verses[selected_urdu_identifier]
+
+            # Display the verses one page at a time, each page as a single cached block
+            if arabic_verses and english_verses and urdu_verses:
+                verse_count = min(len(arabic_verses), len(english_verses), len(urdu_verses))
+                total_pages = page_count(verse_count)
+                page_key = f"surah_page_{selected_surah_number}"
+                jump_key = f"jump_to_ayah_{selected_surah_number}"
+                jumped_key = f"jumped_to_ayah_{selected_surah_number}"
+
+                def jump_to_ayah():
+                    st.session_state[page_key] = page_of_ayah(st.session_state[jump_key])
+                    # Highlight only after an actual jump (ayah 1 included), not the default value
+                    st.session_state[jumped_key] = True
+
+                st.session_state.setdefault(page_key, 1)
+                st.session_state.setdefault(jump_key, 1)
+                col1, col2 = st.columns(2)
+                with col1:
+                    page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, key=page_key)
+                with col2:
+                    jump_ayah = st.number_input("Jump to ayah", min_value=1, max_value=verse_count,
+                                                key=jump_key, on_change=jump_to_ayah)
+                first_ayah = (page - 1) * VERSES_PER_PAGE + 1
+                st.caption(f"Verses {first_ayah}–{min(first_ayah + VERSES_PER_PAGE - 1, verse_count)} of {verse_count}")
+                with span("quran.render", surah=selected_surah_number, page=page):
+                    block = render_page(selected_surah_number, ("ar", "en.sahih", selected_urdu_identifier),
+                                        selected_urdu_translation, arabic_verses, english_verses, urdu_verses, page)
+                    if st.session_state.get(jumped_key) and page == page_of_ayah(jump_ayah):
+                        block = highlight_ayah(block, jump_ayah)
+                    st.markdown(block, unsafe_allow_html=True)
+        except Exception as e:
+            st.error(f"Error fetching Surah text: {str(e)}")
+
+        # Download options
+        st.subheader("Download Options")
+
+        # Download the selected Surah
+        if st.button(f"Download Surah {selected_surah} (Text)"):
+            surah_text = f"Surah {selected_surah}\n\n"
+            for i, (arabic_verse, english_verse, urdu_verse) in enumerate(zip(arabic_verses, english_verses, urdu_verses), 1):
+                surah_text += f"Verse {i}:\n"
+                surah_text += f"Arabic: {arabic_verse}\n"
+                surah_text += f"English: {english_verse}\n"
+                surah_text += f"Urdu ({selected_urdu_translation}): {urdu_verse}\n\n"
+
+            st.download_button(
+                label=f"Download Surah {selected_surah}.txt",
+                data=surah_text,
+                file_name=f"Surah_{selected_surah_number}_{surahs[selected_surah_number-1]['englishName']}.txt",
+                mime="text/plain"
+            )
+
+        # Download the entire Quran (fetched concurrently; Surahs already fetched
+        # in this session are reused, so a failed export resumes where it stopped)
+        export_format = st.selectbox("Export format", list(EXPORT_FORMATS),
+                                     format_func=lambda fmt: EXPORT_FORMATS[fmt][0])
+        export_cache = st.session_state.setdefault("quran_export_cache", {}).setdefault(selected_urdu_identifier, {})
+        if st.button("Download Entire Quran (Text)"):
+            st.write("Fetching the entire Quran... This may take a moment.")
+            progress_bar = st.progress(0.0, text="Fetching Surahs...")
+            try:
+                with span("quran.export", format=export_format):
+                    export_buffer, failed_surahs = export_quran(
+                        export_format, selected_urdu_identifier, selected_urdu_translation, QURAN_API, quran_store,
+                        fetched=export_cache,
+                        progress=lambda done, total: progress_bar.progress(done / total, text=f"Fetched {done}/{total} Surahs"))
+                for surah_number, error in failed_surahs:
+                    st.warning(f"Could not fetch Surah {surah_number}.")
+                if failed_surahs:
+                    st.info("Press the button again to retry; Surahs fetched so far are kept.")
+                else:
+                    st.session_state["quran_export"] = (selected_urdu_identifier, export_format, export_buffer)
+                    # Only a failed export needs the fetched Surahs to resume from
+                    st.session_state["quran_export_cache"].pop(selected_urdu_identifier, None)
+            except Exception as e:
+                st.error(f"Error fetching the entire Quran: {str(e)}")
+
+        # Provide the download button for the entire Quran
+        quran_export = st.session_state.get("quran_export")
+        if quran_export and quran_export[:2] == (selected_urdu_identifier, export_format):
+            label, file_name, mime = EXPORT_FORMATS[export_format]
+            st.download_button(
+                label=f"Download {file_name}",
+                data=quran_export[2],
+                file_name=file_name,
+                mime=mime
+            )
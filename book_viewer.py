@@ -0,0 +1,207 @@
+# book_viewer.py
+# Page-range viewing for uploaded Hadith books. PDFs are never loaded whole:
+# one reader per file content hash parses them from an open file handle, so
+# only the xref table and the objects a page needs are read; the requested
+# pages are cut into a small PDF for the viewer, and page text / thumbnails
+# are cached per file content hash. Text books are paged by seeking to byte
+# offsets from a line index instead of reading the file.
+import hashlib
+import io
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # PDF paging needs pypdf; the page falls back to download only
+    PdfReader = PdfWriter = None
+
+try:
+    import fitz  # PyMuPDF, only used for thumbnails
+except ImportError:
+    fitz = None
+
+PDF_PAGES_PER_VIEW = 5
+TEXT_LINES_PER_PAGE = 100
+RENDER_CACHE_SIZE = 128
+PDF_READER_CACHE_SIZE = 8
+HASH_CHUNK_SIZE = 1 << 20
+
+_lock = threading.Lock()
+# (path, mtime_ns, size) -> sha1 hex digest
+_fingerprints = {}
+# (digest, kind, *args) -> rendered bytes/str, most recently used last
+_renders = OrderedDict()
+# digest -> array of byte offsets where each text page starts
+_line_indexes = {}
+# digest -> _PdfHandle, most recently used last
+_pdf_handles = OrderedDict()
+
+
+def pdf_support():
+    return PdfReader is not None
+
+
+def thumbnail_support():
+    return fitz is not None
+
+
+def file_fingerprint(path):
+    # Content hash, recomputed (by streaming the file) only when it changes
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        digest = _fingerprints.get(key)
+    if digest is None:
+        sha1 = hashlib.sha1()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+                sha1.update(chunk)
+        digest = sha1.hexdigest()
+        with _lock:
+            _fingerprints[key] = digest
+    return digest
+
+
+def _cached(key, build):
+    with _lock:
+        value = _renders.get(key)
+        if value is not None:
+            _renders.move_to_end(key)
+            return value
+    value = build()
+    with _lock:
+        _renders[key] = value
+        while len(_renders) > RENDER_CACHE_SIZE:
+            _renders.popitem(last=False)
+    return value
+
+
+# ---------------------------------------------------------------- PDF
+
+class _PdfHandle:
+    # An open PDF and its reader; the lock serialises use of the shared file position
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.reader = PdfReader(self.file)
+        except Exception:
+            self.file.close()
+            raise
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.file.close()
+
+
+@contextmanager
+def _pdf_reader(path):
+    # The cached reader for this file's content, held exclusively while in use
+    digest = file_fingerprint(path)
+    while True:
+        with _lock:
+            handle = _pdf_handles.get(digest)
+            if handle is not None:
+                _pdf_handles.move_to_end(digest)
+        if handle is None:
+            handle = _PdfHandle(path)
+            with _lock:
+                current = _pdf_handles.setdefault(digest, handle)
+                evicted = []
+                while len(_pdf_handles) > PDF_READER_CACHE_SIZE:
+                    evicted.append(_pdf_handles.popitem(last=False)[1])
+            if current is not handle:
+                evicted.append(handle)
+                handle = current
+            for old in evicted:
+                old.close()
+        with handle.lock:
+            # Evicted between the lookup and the lock: look again
+            if handle.closed:
+                continue
+            yield handle.reader
+            return
+
+
+def pdf_page_count(path):
+    def build():
+        with _pdf_reader(path) as reader:
+            return len(reader.pages)
+    return _cached((file_fingerprint(path), "pages"), build)
+
+
+def pdf_page_range(path, first_page, last_page):
+    # A standalone PDF holding only pages first_page..last_page (1-based)
+    def build():
+        writer = PdfWriter()
+        with _pdf_reader(path) as reader:
+            for index in range(first_page - 1, min(last_page, len(reader.pages))):
+                writer.add_page(reader.pages[index])
+            out = io.BytesIO()
+            writer.write(out)
+        return out.getvalue()
+    return _cached((file_fingerprint(path), "range", first_page, last_page), build)
+
+
+def pdf_page_text(path, page):
+    def build():
+        with _pdf_reader(path) as reader:
+            return reader.pages[page - 1].extract_text() or ""
+    return _cached((file_fingerprint(path), "text", page), build)
+
+
+def pdf_page_thumbnail(path, page, zoom=0.3):
+    # PNG bytes of one page, or None without PyMuPDF
+    if fitz is None:
+        return None
+
+    def build():
+        with fitz.open(path) as document:
+            return document[page - 1].get_pixmap(matrix=fitz.Matrix(zoom, zoom)).tobytes("png")
+    return _cached((file_fingerprint(path), "thumbnail", page, zoom), build)
+
+
+# ---------------------------------------------------------------- text
+
+def text_page_offsets(path, lines_per_page=TEXT_LINES_PER_PAGE):
+    # Byte offset of the first line of every page, built in one streaming pass
+    digest = file_fingerprint(path)
+    key = (digest, lines_per_page)
+    with _lock:
+        offsets = _line_indexes.get(key)
+    if offsets is None:
+        offsets = array("Q", [0])
+        position = 0
+        with open(path, "rb") as file:
+            for line_number, line in enumerate(file, 1):
+                position += len(line)
+                if line_number % lines_per_page == 0:
+                    offsets.append(position)
+        if len(offsets) > 1 and offsets[-1] == position:
+            offsets.pop()
+        with _lock:
+            _line_indexes[key] = offsets
+    return offsets
+
+
+def text_page(path, page, lines_per_page=TEXT_LINES_PER_PAGE):
+    offsets = text_page_offsets(path, lines_per_page)
+    start = offsets[page - 1]
+    with open(path, "rb") as file:
+        file.seek(start)
+        if page < len(offsets):
+            data = file.read(offsets[page] - start)
+        else:
+            data = file.read()
+    return data.decode("utf-8", errors="replace")
+
+
+def read_file(path):
+    # Deferred download body; only runs when the user clicks Download
+    with open(path, "rb") as file:
+        return file.read()
@@ -0,0 +1,46 @@
+# config.py
+# Where the app keeps its data. Everything lives under DEEN_DATA_DIR
+# (default E:/DFE); the upstream API addresses are configured next to their
+# clients (DEEN_QURAN_API in quran_store.py, DEEN_SUNNAH_URL in
+# sunnah_fetcher.py). DEEN_ADMIN_PASSWORD unlocks book uploads and the
+# performance panel. Pages read these as config.NAME so load() can switch
+# directories without restarting, as app_bench.py does between scenarios.
+import hmac
+import os
+import threading
+
+DEFAULT_DATA_DIR = "E:/DFE"
+DEFAULT_ADMIN_PASSWORD = "admin123"  # Simple default; set DEEN_ADMIN_PASSWORD in production
+
+# Directories already created / checked in this process
+_checked_dirs = set()
+_checked_lock = threading.Lock()
+
+
+def load(environ=os.environ):
+    global DATA_DIR, HADITH_BOOKS_DIR, HADITH_DATASETS_DIR, QURAN_DB_PATH, SUNNAH_DB_PATH, HOME_IMAGE_PATH, ADMIN_PASSWORD
+    DATA_DIR = environ.get("DEEN_DATA_DIR", DEFAULT_DATA_DIR)
+    HADITH_BOOKS_DIR = f"{DATA_DIR}/hadith_books"
+    HADITH_DATASETS_DIR = f"{DATA_DIR}/hadith_datasets"
+    QURAN_DB_PATH = f"{DATA_DIR}/quran_store.sqlite3"
+    SUNNAH_DB_PATH = f"{DATA_DIR}/sunnah_store.sqlite3"
+    HOME_IMAGE_PATH = f"{DATA_DIR}/18118.jpg"
+    ADMIN_PASSWORD = environ.get("DEEN_ADMIN_PASSWORD", DEFAULT_ADMIN_PASSWORD)
+
+
+def is_admin(password):
+    # Constant-time comparison so response timing doesn't leak the password
+    return bool(ADMIN_PASSWORD and password) and hmac.compare_digest(password.encode(), ADMIN_PASSWORD.encode())
+
+
+def ensure_data_dirs():
+    # Create the data directories once per process instead of on every rerun
+    for path in (HADITH_BOOKS_DIR, HADITH_DATASETS_DIR):
+        if path in _checked_dirs:
+            continue
+        with _checked_lock:
+            os.makedirs(path, exist_ok=True)
+            _checked_dirs.add(path)
+
+
+load()
@@ -0,0 +1,414 @@
+# hadith_related.py
+# Parallel narrations across hadith collections, precomputed offline.
+# hadith_english is reduced to stemmed content words (honorifics, common and
+# boilerplate words dropped, translators' spellings unified) and shingled
+# (single words: two translations of one narration rarely share word order).
+# Each hadith gets a MinHash signature, computed in a process pool and
+# cached per collection under <datasets>/.related, so when a dataset changes
+# only that collection is signed again. LSH banding proposes pairs from
+# different collections and pairs whose estimated Jaccard similarity clears
+# MIN_SIMILARITY are kept. The result is one table of "collection:row" ->
+# related hadith that the app reads through hadith_related_table.py. Rows
+# (positions in the dataset), not ids, are the keys: ibnmajah repeats ids.
+#
+#   python hadith_related.py build     (incremental; --force to re-sign all)
+#   python hadith_related.py check     (recall on fixtures/related/labelled.json
+#                                       and against exact Jaccard on a sample)
+#   python hadith_related.py show muslim 8
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import config
+from hadith_related_table import default_related_dir, load_related, read_json, related_hadith
+from hadith_search import tokenize
+from hadith_store import open_collection, resolve_dataset_path
+from text_utils import stem_english
+
+RELATED_COLLECTIONS = ("muslim", "abudawud", "ibnmajah")
+RELATED_VERSION = 2
+
+NUM_PERM = 128
+BANDS = 64           # 2 rows per band: a pair at 0.2 similarity is a candidate 93% of the time
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 1
+MIN_SIMILARITY = 0.2
+MIN_WORDS = 3        # shorter texts match everything they share a word with
+MAX_RELATED = 5      # per hadith and other collection, most similar first
+MAX_BUCKET = 200     # LSH buckets larger than this are boilerplate, not parallels
+SIGNATURE_CHUNK = 256
+SNIPPET_LENGTH = 200
+MINHASH_SEED = 20250326
+
+LABELLED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "related", "labelled.json")
+
+# Honorifics differ per translator ("(ﷺ)", "(peace be upon him)", "( sal Allaahu alayhi wa sallam )")
+_honorific_re = re.compile(
+    r"\([^()]*(?:peace|blessings|sal+al+ahu|alayhi|ﷺ|saws|saas|pbuh|pleased)[^()]*\)"
+    r"|peace and blessings of allah (?:be )?upon him|may allah be pleased with (?:him|her|them)",
+    re.IGNORECASE)
+# Spellings and wordings that vary between the translations
+_CANONICAL = {
+    "allaah": "allah", "apostle": "messenger", "prophet": "messenger", "holy": "",
+    "hurairah": "huraira", "hurayrah": "huraira", "aishah": "aisha", "ayesha": "aisha",
+    "ablution": "wudu", "wudhu": "wudu", "fire": "hell", "hellfire": "hell", "jibril": "gabriel",
+    "ummah": "people", "nation": "people", "thee": "you", "thou": "you", "thy": "your", "ye": "you",
+}
+STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be because been before being between both but by
+can could did do does done each even every for from had has have he her hers him his how i if in into is it
+its just let may me more most my no nor not now of on once one only or other our out over said same say
+says saying she should so some such than that the their them then there these they this those through to
+too under until up upon very was we were what when where which while who whom whose why will with would
+you your narrated reported heard told asked replied
+abu al b bin ibn o e i s us came come went made give saw used time day two three man person people messenger
+allah narrator tradition mention companion father another among anyone anything know yes like muslim dawud
+""".split())
+
+
+def content_words(text):
+    # Lowercased words that carry meaning, with translator variants unified
+    words = []
+    for word in tokenize(_honorific_re.sub(" ", text)):
+        word = _CANONICAL.get(word, word)
+        if word and word not in STOPWORDS:
+            words.append(_stem(word))
+    return words
+
+
+def _stem(word):
+    # Plural, past and continuous endings ("prayers", "prayed", "praying" -> "pray")
+    word = stem_english(word)
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    # Hashed word n-grams (uint32); texts with fewer than MIN_WORDS distinct
+    # content words get none, and ones too short for an n-gram use their words
+    words = content_words(text)
+    if len(set(words)) < MIN_WORDS:
+        return np.empty(0, dtype=np.uint64)
+    if len(words) < size:
+        grams = words
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64,
+                                 count=len(grams)))
+
+
+def _permutations():
+    # Multiply-shift hash family: h(x) = ((a * x + b) mod 2**64) >> 32, a odd
+    rng = np.random.default_rng(MINHASH_SEED)
+    a = rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+
+def sign(texts, batch=64):
+    # MinHash signatures (len(texts), NUM_PERM) uint32; empty texts get all-ones rows
+    a, b = _permutations()
+    empty = np.iinfo(np.uint32).max
+    signatures = np.full((len(texts), NUM_PERM), empty, dtype=np.uint32)
+    for start in range(0, len(texts), batch):
+        sets = [shingles(text) for text in texts[start:start + batch]]
+        lengths = np.array([len(values) for values in sets])
+        filled = np.flatnonzero(lengths)
+        if not len(filled):
+            continue
+        values = np.concatenate([sets[i] for i in filled])
+        hashed = ((a * values[None, :] + b) >> np.uint64(32)).astype(np.uint32)
+        starts = np.concatenate(([0], np.cumsum(lengths[filled])[:-1]))
+        signatures[start + filled] = np.minimum.reduceat(hashed, starts, axis=1).T
+    return signatures
+
+
+def _signature_params():
+    # Anything that changes the signatures; STOPWORDS and _CANONICAL edits need a RELATED_VERSION bump
+    return {"version": RELATED_VERSION, "num_perm": NUM_PERM, "shingle_size": SHINGLE_SIZE,
+            "min_words": MIN_WORDS, "seed": MINHASH_SEED}
+
+
+def _params():
+    return {**_signature_params(), "bands": BANDS, "min_similarity": MIN_SIMILARITY, "max_related": MAX_RELATED}
+
+
+def _write_json(path, data):
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+
+# ---------------------------------------------------------------- building
+
+def collection_signatures(datasets_dir, name, related_dir, pool, force=False):
+    # (ids, signatures, signed now?) for one collection in dataset row order,
+    # re-signed only when its dataset or the MinHash parameters changed
+    source_stat = os.stat(resolve_dataset_path(datasets_dir, name))
+    collection = open_collection(datasets_dir, name)
+    ids = np.array([int(record.id) for record in collection], dtype=np.int64)
+    meta_path = os.path.join(related_dir, name + ".meta.json")
+    signatures_path = os.path.join(related_dir, name + ".npz")
+    meta = read_json(meta_path)
+    if (not force and meta is not None and os.path.exists(signatures_path)
+            and meta.get("signature") == _signature_params()
+            and meta.get("source_mtime_ns") == source_stat.st_mtime_ns and meta.get("source_size") == source_stat.st_size):
+        with np.load(signatures_path) as data:
+            # Signature rows must line up with the rows the table is keyed by
+            if np.array_equal(data["ids"], ids):
+                return ids, data["signatures"], False
+
+    texts = [record.hadith_english for record in collection]
+    chunks = [texts[start:start + SIGNATURE_CHUNK] for start in range(0, len(texts), SIGNATURE_CHUNK)]
+    signatures = np.concatenate(list(pool.map(sign, chunks))) if chunks else np.empty((0, NUM_PERM), np.uint32)
+    with open(signatures_path + ".tmp", "wb") as file:
+        np.savez(file, ids=ids, signatures=signatures)
+    os.replace(signatures_path + ".tmp", signatures_path)
+    _write_json(meta_path, {"signature": _signature_params(), "source_mtime_ns": source_stat.st_mtime_ns,
+                            "source_size": source_stat.st_size, "records": len(ids)})
+    return ids, signatures, True
+
+
+def candidate_pairs(signatures, owners):
+    # (i, j) rows (i < j) sharing at least one LSH band, from different collections
+    empty = (signatures == np.iinfo(np.uint32).max).all(axis=1)
+    rows = np.flatnonzero(~empty)
+    found = set()
+    for band in range(BANDS):
+        keys = np.ascontiguousarray(signatures[rows, band * ROWS:(band + 1) * ROWS])
+        keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * ROWS))).ravel()
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        # Runs of equal keys are buckets
+        edges = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        for bucket in np.split(order, edges):
+            if len(bucket) < 2 or len(bucket) > MAX_BUCKET:
+                continue
+            members = rows[bucket]
+            if len(set(owners[members].tolist())) < 2:
+                continue
+            members = sorted(members.tolist())
+            for x, i in enumerate(members):
+                for j in members[x + 1:]:
+                    if owners[i] != owners[j]:
+                        found.add((i, j))
+    if not found:
+        return np.empty(0, np.intp), np.empty(0, np.intp)
+    pairs = np.array(sorted(found), dtype=np.intp)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def build_related(datasets_dir, collections=RELATED_COLLECTIONS, related_dir=None, workers=None, force=False):
+    # Bring <related_dir>/related.json up to date; returns a report with per-stage seconds
+    related_dir = related_dir or default_related_dir(datasets_dir)
+    os.makedirs(related_dir, exist_ok=True)
+    available = [name for name in collections if _dataset_exists(datasets_dir, name)]
+    if not available:
+        raise FileNotFoundError(f"No dataset file for any of {', '.join(collections)} in {datasets_dir}")
+    collections = available
+    report = {"collections": {}, "seconds": {}, "rebuilt": False}
+    started = time.perf_counter()
+
+    signed = {}
+    stage = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    report["workers"] = workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name in collections:
+            collection_started = time.perf_counter()
+            ids, signatures, fresh = collection_signatures(datasets_dir, name, related_dir, pool, force)
+            signed[name] = (ids, signatures)
+            report["collections"][name] = {"records": len(ids), "signed": fresh,
+                                           "seconds": time.perf_counter() - collection_started}
+    report["seconds"]["signatures"] = time.perf_counter() - stage
+
+    table_path = os.path.join(related_dir, "related.json")
+    current = read_json(table_path)
+    sources = {name: _dataset_signature(datasets_dir, name) for name in collections}
+    if (not force and current is not None and current.get("params") == _params() and current.get("sources") == sources):
+        report["seconds"]["total"] = time.perf_counter() - started
+        report["pairs"] = current.get("pairs", 0)
+        return report
+
+    # LSH over every collection at once; owners[i] is the collection of
+    # signature i and rows[i] its row in that collection's dataset
+    stage = time.perf_counter()
+    signatures = np.concatenate([signed[name][1] for name in collections])
+    owners = np.concatenate([np.full(len(signed[name][0]), position) for position, name in enumerate(collections)])
+    rows = np.concatenate([np.arange(len(signed[name][0])) for name in collections])
+    first, second = candidate_pairs(signatures, owners)
+    report["candidates"] = len(first)
+    report["seconds"]["lsh"] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    similarity = (signatures[first] == signatures[second]).mean(axis=1) if len(first) else np.empty(0)
+    keep = similarity >= MIN_SIMILARITY
+    first, second, similarity = first[keep], second[keep], similarity[keep]
+    report["pairs"] = len(first)
+    report["seconds"]["verify"] = time.perf_counter() - stage
+
+    # Most similar first, MAX_RELATED per hadith and other collection, both directions
+    stage = time.perf_counter()
+    neighbours = {}
+    for index in np.argsort(-similarity, kind="stable"):
+        for this, other in ((first[index], second[index]), (second[index], first[index])):
+            per_collection = neighbours.setdefault(int(this), {}).setdefault(int(owners[other]), [])
+            if len(per_collection) < MAX_RELATED:
+                per_collection.append((int(other), round(float(similarity[index]), 3)))
+    opened = {name: open_collection(datasets_dir, name) for name in collections}
+
+    def describe(index):
+        name, row = collections[int(owners[index])], int(rows[index])
+        record = opened[name][row]
+        text = " ".join(record.hadith_english.split())
+        return {"collection": name, "row": row, "id": int(record.id), "refno": record.refno,
+                "snippet": text[:SNIPPET_LENGTH] + ("..." if len(text) > SNIPPET_LENGTH else "")}
+
+    related = {}
+    for index, per_collection in neighbours.items():
+        entries = []
+        for other_rows in per_collection.values():
+            for other, score in other_rows:
+                entries.append({**describe(other), "similarity": score})
+        entries.sort(key=lambda entry: -entry["similarity"])
+        related[f"{collections[int(owners[index])]}:{int(rows[index])}"] = entries
+    _write_json(table_path, {"params": _params(), "sources": sources,
+                             "pairs": len(first), "related": related})
+    report["rebuilt"] = True
+    report["hadith_with_related"] = len(related)
+    report["seconds"]["table"] = time.perf_counter() - stage
+    report["seconds"]["total"] = time.perf_counter() - started
+    return report
+
+
+def _dataset_exists(datasets_dir, name):
+    try:
+        resolve_dataset_path(datasets_dir, name)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _dataset_signature(datasets_dir, name):
+    stat = os.stat(resolve_dataset_path(datasets_dir, name))
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+# ---------------------------------------------------------------- CLI
+
+def _reference_row(datasets_dir, reference):
+    # "collection:id" -> (collection, row of the first hadith with that id)
+    name, hadith_id = reference.split(":")
+    record = open_collection(datasets_dir, name).by_id(int(hadith_id))
+    if record is None:
+        raise KeyError(f"no hadith {reference}")
+    return name, record.index
+
+
+def labelled_recall(datasets_dir, labelled_path=LABELLED_PATH):
+    # [(pair, found, estimated similarity or None)] for the hand-labelled parallels
+    with open(labelled_path, "r", encoding="utf-8") as file:
+        pairs = json.load(file)["pairs"]
+    table = load_related(datasets_dir)
+    results = []
+    for pair in pairs:
+        name, row = _reference_row(datasets_dir, pair["a"])
+        other = _reference_row(datasets_dir, pair["b"])
+        match = next((entry for entry in table.get(f"{name}:{row}", [])
+                      if (entry["collection"], entry["row"]) == other), None)
+        results.append((pair, match is not None, match["similarity"] if match else None))
+    return results
+
+
+def exact_recall(datasets_dir, collections=RELATED_COLLECTIONS, sample=200, seed=0):
+    # Brute-force Jaccard for a sample of the first collection against all the
+    # others; returns ([(exact similarity, in the table?)] for pairs at or above
+    # MIN_SIMILARITY, seconds, hadith sampled, hadith compared against)
+    available = [name for name in collections if _dataset_exists(datasets_dir, name)]
+    if not available:
+        raise FileNotFoundError(f"No dataset file for any of {', '.join(collections)} in {datasets_dir}")
+    collections = available
+    source = open_collection(datasets_dir, collections[0])
+    rows = random.Random(seed).sample(range(len(source)), min(sample, len(source)))
+    others = [(name, record.index, set(shingles(record.hadith_english).tolist()))
+              for name in collections[1:] for record in open_collection(datasets_dir, name)]
+    table = load_related(datasets_dir)
+    started = time.perf_counter()
+    pairs = []
+    for row in rows:
+        record = source[row]
+        these = set(shingles(record.hadith_english).tolist())
+        if not these:
+            continue
+        related = {(entry["collection"], entry["row"]) for entry in table.get(f"{collections[0]}:{row}", [])}
+        for name, other_row, those in others:
+            similarity = len(these & those) / len(these | those) if those else 0.0
+            if similarity >= MIN_SIMILARITY:
+                pairs.append((similarity, (name, other_row) in related))
+    return pairs, time.perf_counter() - started, len(rows), len(others)
+
+
+def print_build_report(report):
+    print(f"Signatures ({report['workers']} worker processes):")
+    for name, stats in report["collections"].items():
+        state = "signed" if stats["signed"] else "cached"
+        print(f"  {name:<10}{stats['records']:>7} hadith  {state:<7}{stats['seconds']:>7.2f}s")
+    if not report["rebuilt"]:
+        print(f"Related table up to date ({report['pairs']} pairs); {report['seconds']['total']:.2f}s")
+        return
+    seconds = report["seconds"]
+    print(f"LSH: {report['candidates']} candidate pairs in {seconds['lsh']:.2f}s; "
+          f"{report['pairs']} kept at similarity >= {MIN_SIMILARITY} in {seconds['verify']:.3f}s")
+    print(f"Table: {report['hadith_with_related']} hadith with related narrations, written in {seconds['table']:.2f}s")
+    print(f"Total {seconds['total']:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and check the related-hadith table.")
+    parser.add_argument("command", choices=["build", "check", "show"])
+    parser.add_argument("collection", nargs="?", help="show: collection name")
+    parser.add_argument("hadith_id", nargs="?", help="show: hadith id")
+    parser.add_argument("--datasets", default=config.HADITH_DATASETS_DIR,
+                        help="dataset directory (default: the app's, under DEEN_DATA_DIR)")
+    parser.add_argument("--workers", type=int, default=None, help="signature processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-sign every collection")
+    parser.add_argument("--sample", type=int, default=200, help="check: hadith compared by brute force")
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        name, row = _reference_row(args.datasets, f"{args.collection}:{args.hadith_id}")
+        for entry in related_hadith(args.datasets, name, row):
+            print(f"[{entry['similarity']:.2f}] {entry['refno']}: {entry['snippet']}")
+        return 0
+
+    print_build_report(build_related(args.datasets, workers=args.workers, force=args.force))
+    if args.command == "build":
+        return 0
+
+    results = labelled_recall(args.datasets)
+    found = sum(1 for _, ok, _ in results if ok)
+    print(f"\nLabelled sample: {found}/{len(results)} parallels found (recall {found / len(results):.0%})")
+    for pair, ok, similarity in results:
+        print(f"  {pair['a']:<14}{pair['b']:<16}{f'{similarity:.2f}' if ok else 'MISSING':<9}{pair['note']}")
+    pairs, seconds, sampled, compared = exact_recall(args.datasets, sample=args.sample)
+    print(f"\nExact Jaccard for {sampled} sampled hadith against {compared} others (brute force {seconds:.1f}s):")
+    # Pairs just above MIN_SIMILARITY are estimated below it about half the time
+    for floor in (MIN_SIMILARITY, MIN_SIMILARITY + 0.1, MIN_SIMILARITY + 0.2):
+        band = [found for similarity, found in pairs if similarity >= floor]
+        print(f"  similarity >= {floor:.1f}: {sum(band)}/{len(band)} pairs in the table"
+              f" (recall {sum(band) / len(band) if band else 1:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
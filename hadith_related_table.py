@@ -0,0 +1,50 @@
+# hadith_related_table.py
+# Read side of the related-hadith table that hadith_related.py builds. Kept
+# apart from the builder so showing parallel narrations doesn't import the
+# NumPy build code: the table is plain JSON, loaded once per process (and
+# again only when the file changes) and read by "collection:row" key.
+import json
+import os
+import threading
+
+
+def default_related_dir(datasets_dir):
+    return os.path.join(datasets_dir, ".related")
+
+
+def read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+# table path -> (mtime_ns, {"collection:row": [related entries]})
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def load_related(datasets_dir, related_dir=None):
+    # The related table (re-read only when the file changes), empty if never built
+    path = os.path.join(related_dir or default_related_dir(datasets_dir), "related.json")
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _tables.get(path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    with _tables_lock:
+        cached = _tables.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        table = (read_json(path) or {}).get("related", {})
+        _tables[path] = (mtime_ns, table)
+        return table
+
+
+def related_hadith(datasets_dir, collection, row):
+    # [{"collection", "row", "id", "refno", "snippet", "similarity"}] for the
+    # hadith at this row of the collection (HadithRecord.index), most similar first
+    return load_related(datasets_dir).get(f"{collection}:{int(row)}", [])
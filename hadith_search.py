@@ -0,0 +1,618 @@
+# hadith_search.py
+# Full-text search over the hadith datasets. Each collection gets its own
+# on-disk segment (an inverted index over header, hadith_english, chapterName
+# and bookName) that is rebuilt only when its source file changes and is
+# memory-mapped for searching. Results are ranked with BM25. The app checks
+# the dataset files at most every REFRESH_INTERVAL seconds, maps segments that
+# are already current straight away and rebuilds stale ones in a background
+# thread (or ahead of time with "build"); a segment being replaced is closed
+# only after the last search using it finishes.
+import argparse
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+import config
+from hadith_store import list_collections, load_collection, open_collection, resolve_dataset_path
+
+# Fields indexed for every hadith, in position order
+INDEXED_FIELDS = ("header", "hadith_english", "chapterName", "bookName")
+# Position gap between fields (and documents) so phrases never match across them
+FIELD_GAP = 16
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Upper bound on terms a single prefix query expands to
+MAX_PREFIX_TERMS = 64
+SEGMENT_VERSION = 1
+# Seconds between checks of the dataset files for changes
+REFRESH_INTERVAL = 5.0
+
+_word_re = re.compile(r"[a-z0-9]+")
+_query_re = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def normalize(text):
+    # Lowercase and strip diacritics so "Abū" matches "abu"
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return _word_re.findall(normalize(text))
+
+
+def default_index_dir(datasets_dir):
+    return os.path.join(datasets_dir, ".search_index")
+
+
+# ---------------------------------------------------------------- building
+
+def build_segment(collection, source_stat, index_dir):
+    # Write <name>.seg (uint32 arrays) and <name>.meta.json for one collection.
+    # Positions are global to the collection, so a phrase is a set
+    # intersection of shifted positions without per-document bookkeeping.
+    postings = {}
+    doc_lengths = array("I")
+    doc_starts = array("I")
+    position = 0
+    for doc, record in enumerate(collection):
+        doc_starts.append(position)
+        for field in INDEXED_FIELDS:
+            for token in tokenize(getattr(record, field)):
+                entry = postings.get(token)
+                if entry is None:
+                    postings[token] = entry = {}
+                positions = entry.get(doc)
+                if positions is None:
+                    entry[doc] = positions = []
+                positions.append(position)
+                position += 1
+            position += FIELD_GAP
+        doc_lengths.append(position - doc_starts[-1] - FIELD_GAP * len(INDEXED_FIELDS))
+
+    terms = sorted(postings)
+    term_starts = array("I")
+    post_docs = array("I")
+    post_tfs = array("I")
+    post_pos_starts = array("I")
+    positions_out = array("I")
+    for term in terms:
+        term_starts.append(len(post_docs))
+        for doc, positions in postings[term].items():
+            post_docs.append(doc)
+            post_tfs.append(len(positions))
+            post_pos_starts.append(len(positions_out))
+            positions_out.extend(positions)
+    term_starts.append(len(post_docs))
+    post_pos_starts.append(len(positions_out))
+
+    # Arrays are laid out back to back; the meta file records where each starts
+    layout = {}
+    offset = 0
+    arrays = [
+        ("term_starts", term_starts),
+        ("post_docs", post_docs),
+        ("post_tfs", post_tfs),
+        ("post_pos_starts", post_pos_starts),
+        ("positions", positions_out),
+        ("doc_lengths", doc_lengths),
+        ("doc_starts", doc_starts),
+        ("book_codes", array("I", collection.book_name_codes)),
+    ]
+    for name, values in arrays:
+        layout[name] = [offset, len(values)]
+        offset += len(values)
+
+    meta = {
+        "version": SEGMENT_VERSION,
+        "collection": collection.name,
+        "source": os.path.basename(collection.path),
+        "source_mtime_ns": source_stat.st_mtime_ns,
+        "source_size": source_stat.st_size,
+        "documents": len(collection),
+        "avg_doc_length": (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0,
+        "book_names": collection.book_names.values,
+        "layout": layout,
+        "terms": terms,
+    }
+
+    seg_path = os.path.join(index_dir, collection.name + ".seg")
+    meta_path = os.path.join(index_dir, collection.name + ".meta.json")
+    with open(seg_path + ".tmp", "wb") as file:
+        for _, values in arrays:
+            values.tofile(file)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(meta, file, ensure_ascii=False)
+    os.replace(seg_path + ".tmp", seg_path)
+    os.replace(meta_path + ".tmp", meta_path)
+    return meta
+
+
+def _read_meta(index_dir, name):
+    try:
+        with open(os.path.join(index_dir, name + ".meta.json"), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _segment_is_current(meta, source_stat):
+    return (
+        meta is not None
+        and meta.get("version") == SEGMENT_VERSION
+        and meta.get("source_mtime_ns") == source_stat.st_mtime_ns
+        and meta.get("source_size") == source_stat.st_size
+    )
+
+
+def build_index(datasets_dir, index_dir=None, force=False, before_replace=None):
+    # Incrementally (re)build segments; returns the names that were rebuilt
+    index_dir = index_dir or default_index_dir(datasets_dir)
+    os.makedirs(index_dir, exist_ok=True)
+    names = list_collections(datasets_dir)
+    rebuilt = []
+    for name in names:
+        source_stat = os.stat(resolve_dataset_path(datasets_dir, name))
+        if not force and _segment_is_current(_read_meta(index_dir, name), source_stat):
+            continue
+        if before_replace:
+            # Lets an open index release its mapping before the file is replaced
+            before_replace(name)
+        build_segment(load_collection(datasets_dir, name), source_stat, index_dir)
+        rebuilt.append(name)
+
+    # Drop segments whose dataset file has gone away
+    for file_name in os.listdir(index_dir):
+        if file_name.endswith(".meta.json") and file_name[:-len(".meta.json")] not in names:
+            name = file_name[:-len(".meta.json")]
+            if before_replace:
+                before_replace(name)
+            for suffix in (".meta.json", ".seg"):
+                try:
+                    os.remove(os.path.join(index_dir, name + suffix))
+                except OSError:
+                    pass
+    return rebuilt
+
+
+# ---------------------------------------------------------------- searching
+
+class Segment:
+    # Memory-mapped inverted index for one collection
+    def __init__(self, index_dir, meta):
+        self.meta = meta
+        self.name = meta["collection"]
+        self.terms = meta["terms"]
+        self.term_ids = {term: i for i, term in enumerate(self.terms)}
+        self.documents = meta["documents"]
+        self.avg_doc_length = meta["avg_doc_length"] or 1.0
+        self.book_names = meta["book_names"]
+        self._file = open(os.path.join(index_dir, self.name + ".seg"), "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        words = memoryview(self._mmap).cast("I")
+        self._views = {}
+        for name, (start, count) in meta["layout"].items():
+            self._views[name] = words[start:start + count]
+        self.term_starts = self._views["term_starts"]
+        self.post_docs = self._views["post_docs"]
+        self.post_tfs = self._views["post_tfs"]
+        self.post_pos_starts = self._views["post_pos_starts"]
+        self.positions = self._views["positions"]
+        self.doc_lengths = self._views["doc_lengths"]
+        self.book_codes = self._views["book_codes"]
+        self.doc_starts = self._views["doc_starts"].tolist()
+        # BM25 length normalisation per document, computed once per mapping
+        self.length_norms = [
+            BM25_K1 * (1 - BM25_B + BM25_B * length / self.avg_doc_length)
+            for length in self.doc_lengths.tolist()
+        ]
+        self.size_bytes = len(self._mmap)
+        # Searches using the mapping; retire() waits for them before closing
+        self._readers = 0
+        self._retired = False
+        self._readers_changed = threading.Condition()
+
+    def acquire(self):
+        with self._readers_changed:
+            if self._retired:
+                return False
+            self._readers += 1
+            return True
+
+    def release(self):
+        with self._readers_changed:
+            self._readers -= 1
+            self._readers_changed.notify_all()
+
+    def retire(self):
+        # Stop new searches, wait for running ones, then unmap
+        with self._readers_changed:
+            self._retired = True
+            while self._readers:
+                self._readers_changed.wait()
+        self.close()
+
+    def close(self):
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        self._mmap.close()
+        self._file.close()
+
+    def expand_prefix(self, prefix):
+        start = bisect_left(self.terms, prefix)
+        matches = []
+        for term in self.terms[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def posting_range(self, term):
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return 0, 0
+        return self.term_starts[term_id], self.term_starts[term_id + 1]
+
+    def doc_frequency(self, term):
+        start, end = self.posting_range(term)
+        return end - start
+
+    def term_positions(self, term):
+        # Every (global) position of a term, ascending
+        start, end = self.posting_range(term)
+        if start == end:
+            return []
+        return self.positions[self.post_pos_starts[start]:self.post_pos_starts[end]].tolist()
+
+    def phrase_docs(self, phrase_terms):
+        # {doc: phrase frequency} for documents containing the exact phrase
+        blocks = sorted(((self.term_positions(term), offset) for offset, term in enumerate(phrase_terms)),
+                        key=lambda block: len(block[0]))
+        starts = None
+        for positions, offset in blocks:
+            if starts is None:
+                starts = set(map((-offset).__add__, positions)) if offset else set(positions)
+            elif len(starts) * 16 < len(positions):
+                # Few candidates left: probe the sorted positions instead of hashing them all
+                kept = set()
+                for start in starts:
+                    i = bisect_left(positions, start + offset)
+                    if i < len(positions) and positions[i] == start + offset:
+                        kept.add(start)
+                starts = kept
+            else:
+                starts &= set(map((-offset).__add__, positions)) if offset else set(positions)
+            if not starts:
+                return {}
+        matches = {}
+        for start in starts:
+            doc = bisect_right(self.doc_starts, start) - 1
+            matches[doc] = matches.get(doc, 0) + 1
+        return matches
+
+
+def parse_query(query):
+    # Split a query into phrases ("..."), prefixes (word*) and plain terms
+    phrases, prefixes, terms = [], [], []
+    for phrase, word in _query_re.findall(query):
+        if phrase:
+            tokens = tokenize(phrase)
+            if len(tokens) > 1:
+                phrases.append(tokens)
+            else:
+                terms.extend(tokens)
+        elif word.endswith("*") and tokenize(word):
+            prefixes.append(tokenize(word)[0])
+        else:
+            terms.extend(tokenize(word))
+    return phrases, prefixes, terms
+
+
+@lru_cache(maxsize=65536)
+def _normalize_word(word):
+    return normalize(word)
+
+
+def make_snippet(text, highlight_terms, highlight_prefixes, width=240):
+    # Markdown snippet of the text around the first match, matches in bold
+    matches = []
+    for match in re.finditer(r"\w+", text):
+        word = _normalize_word(match.group())
+        if word in highlight_terms or (highlight_prefixes and word.startswith(tuple(highlight_prefixes))):
+            matches.append(match)
+    if not matches:
+        return text[:width] + ("..." if len(text) > width else "")
+    start = max(0, matches[0].start() - width // 3)
+    end = min(len(text), start + width)
+    pieces = ["..." if start > 0 else ""]
+    cursor = start
+    for match in matches:
+        if match.start() < start or match.end() > end:
+            continue
+        pieces.append(text[cursor:match.start()])
+        pieces.append(f"**{match.group()}**")
+        cursor = match.end()
+    pieces.append(text[cursor:end])
+    pieces.append("..." if end < len(text) else "")
+    return "".join(pieces)
+
+
+class HadithSearchIndex:
+    def __init__(self, datasets_dir, index_dir=None):
+        self.datasets_dir = datasets_dir
+        self.index_dir = index_dir or default_index_dir(datasets_dir)
+        # name -> Segment; replaced as a whole, never changed in place
+        self.segments = {}
+        self.building = False
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._sources = None
+        self._checked_at = None
+
+    def _source_signature(self):
+        # (name, mtime_ns, size) of every dataset file; stats only, no index files read
+        signature = []
+        for name in list_collections(self.datasets_dir):
+            stat = os.stat(resolve_dataset_path(self.datasets_dir, name))
+            signature.append((name, stat.st_mtime_ns, stat.st_size))
+        return signature
+
+    def _retire_segment(self, name):
+        with self._lock:
+            segment = self.segments.get(name)
+            if segment is None:
+                return
+            self.segments = {other: s for other, s in self.segments.items() if other != name}
+        segment.retire()
+
+    def _map_current(self):
+        # Map every segment that is current for its dataset file and drop those
+        # whose dataset has gone; returns the names that still need a rebuild
+        names = list_collections(self.datasets_dir)
+        stale = []
+        for name in names:
+            meta = _read_meta(self.index_dir, name)
+            if not _segment_is_current(meta, os.stat(resolve_dataset_path(self.datasets_dir, name))):
+                stale.append(name)
+                continue
+            current = self.segments.get(name)
+            if current is not None:
+                # Still mapped but rebuilt elsewhere (e.g. by the build command)
+                if current.meta["source_mtime_ns"] == meta["source_mtime_ns"]:
+                    continue
+                self._retire_segment(name)
+            segment = Segment(self.index_dir, meta)
+            with self._lock:
+                self.segments = {**self.segments, name: segment}
+        for name in set(self.segments) - set(names):
+            self._retire_segment(name)
+            stale.append(name)
+        return stale
+
+    def refresh(self):
+        # Rebuild stale segments and (re)map any that changed on disk
+        with self._refresh_lock:
+            sources = self._source_signature()
+            rebuilt = build_index(self.datasets_dir, self.index_dir, before_replace=self._retire_segment)
+            self._map_current()
+            self._sources = sources
+            return rebuilt
+
+    def refresh_if_stale(self, background=True):
+        # Look at the dataset files at most every REFRESH_INTERVAL seconds. Segments
+        # already current on disk are mapped here, so a cold start searches at once;
+        # only real rebuilds go to the background thread unless asked not to
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < REFRESH_INTERVAL:
+            return
+        self._checked_at = now
+        sources = self._source_signature()
+        if sources == self._sources or self.building:
+            return
+        with self._refresh_lock:
+            stale = self._map_current()
+            if not stale:
+                self._sources = sources
+                return
+        if not background:
+            self.refresh()
+            return
+        with self._lock:
+            if self.building:
+                return
+            self.building = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self.building = False
+        threading.Thread(target=run, name="hadith-search-refresh", daemon=True).start()
+
+    def close(self):
+        for name in list(self.segments):
+            self._retire_segment(name)
+
+    def size_bytes(self):
+        total = 0
+        for name in self.segments:
+            for suffix in (".seg", ".meta.json"):
+                total += os.path.getsize(os.path.join(self.index_dir, name + suffix))
+        return total
+
+    def collections(self):
+        return sorted(self.segments)
+
+    def book_names(self, collection):
+        segment = self.segments.get(collection)
+        return segment.book_names if segment else []
+
+    def search(self, query, collections=None, book=None, limit=10, with_snippets=True):
+        phrases, prefixes, terms = parse_query(query)
+        if not (phrases or prefixes or terms):
+            return []
+        # Hold the segments so a concurrent refresh cannot unmap them mid-search
+        with self._lock:
+            segments = [s for name, s in sorted(self.segments.items())
+                        if (not collections or name in collections) and s.acquire()]
+        try:
+            return self._search(segments, phrases, prefixes, terms, book, limit, with_snippets)
+        finally:
+            for segment in segments:
+                segment.release()
+
+    def _search(self, segments, phrases, prefixes, terms, book, limit, with_snippets):
+        # Prefixes expand to real terms per segment; scoring uses global stats
+        phrase_terms = {t for phrase in phrases for t in phrase}
+        segment_terms = {
+            s.name: set(terms) | phrase_terms | {t for p in prefixes for t in s.expand_prefix(p)}
+            for s in segments
+        }
+        total_docs = sum(s.documents for s in segments) or 1
+        idf = {}
+        for term in set().union(*segment_terms.values()):
+            df = sum(s.doc_frequency(term) for s in segments)
+            idf[term] = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+
+        hits = []
+        for segment in segments:
+            required = None
+            for phrase in phrases:
+                docs = segment.phrase_docs(phrase)
+                required = set(docs) if required is None else required & docs.keys()
+            if book is not None:
+                if book not in segment.book_names:
+                    continue
+                book_code = segment.book_names.index(book)
+                candidates = range(segment.documents) if required is None else required
+                required = {doc for doc in candidates if segment.book_codes[doc] == book_code}
+            if required is not None and not required:
+                continue
+
+            scores = {}
+            norms = segment.length_norms
+            for term in segment_terms[segment.name]:
+                start, end = segment.posting_range(term)
+                if start == end:
+                    continue
+                term_idf = idf[term] * (BM25_K1 + 1)
+                postings = zip(segment.post_docs[start:end].tolist(), segment.post_tfs[start:end].tolist())
+                if required is not None:
+                    tf_by_doc = dict(postings)
+                    postings = [(doc, tf_by_doc[doc]) for doc in required if doc in tf_by_doc]
+                for doc, tf in postings:
+                    scores[doc] = scores.get(doc, 0.0) + term_idf * tf / (tf + norms[doc])
+            hits.extend((score, segment.name, doc) for doc, score in scores.items())
+
+        hits = heapq.nsmallest(limit, hits, key=lambda hit: (-hit[0], hit[1], hit[2]))
+        highlight_terms = set(terms) | {t for p in phrases for t in p}
+        results = []
+        for score, name, doc in hits:
+            result = {"collection": name, "index": doc, "score": score}
+            if with_snippets:
+                record = open_collection(self.datasets_dir, name)[doc]
+                result.update({
+                    "id": record.id,
+                    "refno": record.refno,
+                    "bookName": record.bookName,
+                    "chapterName": record.chapterName,
+                    "snippet": make_snippet(record.hadith_english, highlight_terms, prefixes),
+                })
+            results.append(result)
+        return results
+
+
+# index_dir -> HadithSearchIndex, shared across sessions
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def open_index(datasets_dir, index_dir=None, background=True):
+    # Shared index for a datasets directory, refreshed against file changes.
+    # With background=True a stale index is rebuilt in a thread and searched
+    # as it is meanwhile (index.building tells the page)
+    index_dir = index_dir or default_index_dir(datasets_dir)
+    with _indexes_lock:
+        index = _indexes.get(index_dir)
+        if index is None:
+            index = _indexes[index_dir] = HadithSearchIndex(datasets_dir, index_dir)
+    index.refresh_if_stale(background)
+    return index
+
+
+# ---------------------------------------------------------------- CLI
+
+BENCH_QUERIES = [
+    "prayer",
+    "fasting ramadan",
+    '"messenger of allah"',
+    "purif*",
+    '"whoever lies upon me"',
+    "charity orphan",
+    "ablution",
+    "jihad",
+    '"the fire"',
+    "marr*",
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build, benchmark and query the hadith search index.")
+    parser.add_argument("command", choices=["build", "bench", "query"])
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("--datasets", default=config.HADITH_DATASETS_DIR,
+                        help="dataset directory (default: the app's, under DEEN_DATA_DIR)")
+    parser.add_argument("--index", default=None)
+    parser.add_argument("--force", action="store_true", help="rebuild every segment")
+    parser.add_argument("--rounds", type=int, default=20, help="bench: repetitions of the query set")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        rebuilt = build_index(args.datasets, args.index, force=args.force)
+        elapsed = time.perf_counter() - started
+        print(f"Rebuilt: {', '.join(rebuilt) if rebuilt else 'nothing (index up to date)'} in {elapsed:.2f}s")
+        index = open_index(args.datasets, args.index, background=False)
+        for name, segment in sorted(index.segments.items()):
+            print(f"  {name:<12}{segment.documents:>7} docs{len(segment.terms):>8} terms{segment.size_bytes / 1e6:>8.2f} MB")
+        print(f"Index size: {index.size_bytes() / 1e6:.2f} MB")
+        return
+
+    index = open_index(args.datasets, args.index, background=False)
+    if args.command == "query":
+        for result in index.search(args.query):
+            print(f"[{result['score']:.2f}] {result['refno']} ({result['bookName']})")
+            print(f"    {result['snippet']}")
+        return
+
+    # Warm up so dataset loading is not counted as query latency
+    for query in BENCH_QUERIES:
+        index.search(query)
+    latencies = []
+    for _ in range(args.rounds):
+        for query in BENCH_QUERIES:
+            started = time.perf_counter()
+            index.search(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"Index size: {index.size_bytes() / 1e6:.2f} MB over {len(index.segments)} collections")
+    print(f"Queries: {len(latencies)}  p50 {quantiles[49]:.2f} ms  p95 {quantiles[94]:.2f} ms  "
+          f"p99 {quantiles[98]:.2f} ms  max {latencies[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,532 @@
+# hadith_store.py
+# Process-wide store for the hadith datasets. Each collection file is parsed
+# once per process (re-parsed only when its mtime/size changes) and kept in a
+# compact columnar form, so Streamlit reruns and concurrent sessions share it.
+#
+# `python hadith_store.py ingest` converts each dataset into NDJSON plus a
+# binary offset index under <datasets>/.indexed. Those files are memory-mapped
+# so a single hadith or a page of them is read without parsing the whole
+# dataset; the original JSON stays the fallback when no current index exists.
+import argparse
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from array import array
+
+import config
+
+# Fields every hadith record carries in the datasets
+HADITH_FIELDS = ("id", "header", "hadith_english", "book", "refno", "bookName", "chapterName")
+
+# Fields validated on ingest; "book" is optional in the schema
+REQUIRED_FIELDS = ("id", "header", "hadith_english", "refno", "bookName", "chapterName")
+
+# Extensions tried (in order) when resolving a collection name to a file
+DATASET_EXTENSIONS = (".js", ".json")
+
+INDEXED_VERSION = 1
+
+
+class HadithRecord:
+    # Lightweight view of a single hadith, built on demand from the columns
+    __slots__ = HADITH_FIELDS + ("index",)
+
+    def __init__(self, index, id, header, hadith_english, book, refno, bookName, chapterName):
+        self.index = index
+        self.id = id
+        self.header = header
+        self.hadith_english = hadith_english
+        self.book = book
+        self.refno = refno
+        self.bookName = bookName
+        self.chapterName = chapterName
+
+    def __getitem__(self, key):
+        # Allow dict-style access so older display code keeps working
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in HADITH_FIELDS}
+
+
+class StringTable:
+    # Dictionary-encodes a column of heavily repeated strings
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def encode(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(sys.intern(value))
+        return code
+
+    def freeze(self):
+        # The reverse lookup is only needed while loading
+        self._codes = None
+
+
+def first_index_by_id(ids):
+    # id -> index of its first record; some datasets repeat ids (ibnmajah
+    # 1926, 1928) and lookups have always returned the first one
+    index_by_id = {}
+    for index, hadith_id in enumerate(ids):
+        index_by_id.setdefault(hadith_id, index)
+    return index_by_id
+
+
+class HadithCollection:
+    # Columnar, read-only hadith collection
+    def __init__(self, name, path, records):
+        self.name = name
+        self.path = path
+        self.ids = array("l")
+        self.headers = []
+        self.texts = []
+        self.refnos = []
+        self.books = StringTable()
+        self.book_names = StringTable()
+        self.chapter_names = StringTable()
+        # "I" codes: a large dataset can have more than 65,535 distinct chapters
+        self.book_codes = array("I")
+        self.book_name_codes = array("I")
+        self.chapter_codes = array("I")
+        self.naive_bytes = 0
+
+        record_dict_size = sys.getsizeof(dict.fromkeys(HADITH_FIELDS))
+        for record in records:
+            self.ids.append(int(record["id"]))
+            self.headers.append(record["header"])
+            self.texts.append(record["hadith_english"])
+            self.refnos.append(record["refno"])
+            # bookName is padded with tabs/newlines in the source files
+            self.book_codes.append(self.books.encode(record.get("book", "")))
+            self.book_name_codes.append(self.book_names.encode(record["bookName"].strip()))
+            self.chapter_codes.append(self.chapter_names.encode(record["chapterName"]))
+            # Size the same record would take as a parsed json dict
+            self.naive_bytes += record_dict_size + sum(sys.getsizeof(record.get(field)) for field in HADITH_FIELDS)
+
+        for table in (self.books, self.book_names, self.chapter_names):
+            table.freeze()
+        self._index_by_id = first_index_by_id(self.ids)
+        self._id_labels = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return HadithRecord(
+            index,
+            self.ids[index],
+            self.headers[index],
+            self.texts[index],
+            self.books.values[self.book_codes[index]],
+            self.refnos[index],
+            self.book_names.values[self.book_name_codes[index]],
+            self.chapter_names.values[self.chapter_codes[index]],
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def id_labels(self):
+        # String IDs for selectboxes, built once per collection
+        if self._id_labels is None:
+            self._id_labels = [str(hadith_id) for hadith_id in self.ids]
+        return self._id_labels
+
+    def by_id(self, hadith_id):
+        index = self._index_by_id.get(int(hadith_id))
+        return None if index is None else self[index]
+
+    def memory_bytes(self):
+        # Deep size of the columns, counting each distinct object once
+        seen = set()
+        total = 0
+
+        def add(obj):
+            nonlocal total
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+
+        for column in (self.ids, self.book_codes, self.book_name_codes, self.chapter_codes):
+            add(column)
+        for column in (self.headers, self.texts, self.refnos):
+            add(column)
+            for value in column:
+                add(value)
+        for table in (self.books, self.book_names, self.chapter_names):
+            add(table.values)
+            for value in table.values:
+                add(value)
+        add(self._index_by_id)
+        return total
+
+
+def read_dataset_json(path):
+    # Read a dataset file, stripping a "var data = ...;" JavaScript wrapper
+    with open(path, "r", encoding="utf-8") as file:
+        content = file.read()
+    if content.startswith("var "):
+        content = content.split("=", 1)[1].strip()
+        if content.endswith(";"):
+            content = content[:-1]
+    return json.loads(content)
+
+
+def resolve_dataset_path(datasets_dir, name):
+    for extension in DATASET_EXTENSIONS:
+        path = os.path.join(datasets_dir, name + extension)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No dataset file for '{name}' in {datasets_dir}")
+
+
+# path -> (mtime_ns, size, HadithCollection)
+_cache = {}
+_cache_lock = threading.Lock()
+_path_locks = {}
+
+
+def _path_lock(path):
+    with _cache_lock:
+        return _path_locks.setdefault(path, threading.Lock())
+
+
+def load_collection(datasets_dir, name):
+    # Return the cached collection, re-parsing only if the file changed
+    path = os.path.abspath(resolve_dataset_path(datasets_dir, name))
+    stat = os.stat(path)
+    cached = _cache.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    # One parse per file even when several sessions ask at the same time
+    with _path_lock(path):
+        cached = _cache.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        data = read_dataset_json(path)
+        collection = HadithCollection(name, path, data.get("hadith", []))
+        _cache[path] = (stat.st_mtime_ns, stat.st_size, collection)
+        return collection
+
+
+def list_collections(datasets_dir):
+    # Names of dataset files that hold a "hadith" list
+    names = []
+    for file_name in sorted(os.listdir(datasets_dir)):
+        name, extension = os.path.splitext(file_name)
+        if extension in DATASET_EXTENSIONS and name not in names:
+            # Only peek at the head of the file rather than parsing it
+            with open(os.path.join(datasets_dir, file_name), "r", encoding="utf-8") as file:
+                head = file.read(256)
+            if '"hadith"' in head:
+                names.append(name)
+    return names
+
+
+def memory_report(collections=None):
+    # Per-collection memory footprint of the store vs. plain parsed json
+    if collections is None:
+        collections = [entry[2] for entry in list(_cache.values())]
+    report = []
+    for collection in collections:
+        report.append({
+            "collection": collection.name,
+            "records": len(collection),
+            "distinct_books": len(collection.book_names.values),
+            "distinct_chapters": len(collection.chapter_names.values),
+            "store_bytes": collection.memory_bytes(),
+            "json_dict_bytes": collection.naive_bytes,
+        })
+    return report
+
+
+# ---------------------------------------------------------------- indexed format
+
+def default_indexed_dir(datasets_dir):
+    return os.path.join(datasets_dir, ".indexed")
+
+
+def validate_record(record):
+    # Problems with one source record, empty when it matches the schema
+    if not isinstance(record, dict):
+        return [f"record is {type(record).__name__}, not an object"]
+    problems = [f"missing '{field}'" for field in REQUIRED_FIELDS if field not in record]
+    if "id" in record:
+        try:
+            int(record["id"])
+        except (TypeError, ValueError):
+            problems.append(f"id {record['id']!r} is not an integer")
+    for field in REQUIRED_FIELDS[1:] + ("book",):
+        if field in record and not isinstance(record[field], str):
+            problems.append(f"'{field}' is {type(record[field]).__name__}, not a string")
+    return problems
+
+
+def _read_indexed_meta(indexed_dir, name):
+    try:
+        with open(os.path.join(indexed_dir, name + ".meta.json"), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == INDEXED_VERSION else None
+
+
+def ingest_collection(datasets_dir, name, indexed_dir=None):
+    # Write <name>.ndjson (one normalised record per line), <name>.idx (uint64
+    # line offsets followed by int64 ids) and <name>.meta.json; returns ingest
+    # statistics. A collection with invalid records is reported and not
+    # published: without them its rows would no longer line up with
+    # load_collection's, which search doc numbers and the related table use.
+    indexed_dir = indexed_dir or default_indexed_dir(datasets_dir)
+    os.makedirs(indexed_dir, exist_ok=True)
+    source = resolve_dataset_path(datasets_dir, name)
+    source_stat = os.stat(source)
+    started = time.perf_counter()
+    records = read_dataset_json(source).get("hadith", [])
+
+    offsets = array("Q", [0])
+    ids = array("q")
+    errors = []
+    ndjson_path = os.path.join(indexed_dir, name + ".ndjson")
+    with open(ndjson_path + ".tmp", "wb") as file:
+        for position, record in enumerate(records):
+            problems = validate_record(record)
+            if problems:
+                errors.append((position, problems))
+                continue
+            line = json.dumps({
+                "id": int(record["id"]),
+                "header": record["header"],
+                "hadith_english": record["hadith_english"],
+                "book": record.get("book", ""),
+                "refno": record["refno"],
+                "bookName": record["bookName"].strip(),
+                "chapterName": record["chapterName"],
+            }, ensure_ascii=False).encode("utf-8") + b"\n"
+            file.write(line)
+            offsets.append(offsets[-1] + len(line))
+            ids.append(int(record["id"]))
+
+    result = {
+        "collection": name,
+        "records": len(ids),
+        "errors": errors,
+        "source_bytes": source_stat.st_size,
+        "output_bytes": 0,
+        "published": not errors,
+    }
+    if errors:
+        os.remove(ndjson_path + ".tmp")
+        result["seconds"] = time.perf_counter() - started
+        return result
+
+    index_path = os.path.join(indexed_dir, name + ".idx")
+    with open(index_path + ".tmp", "wb") as file:
+        offsets.tofile(file)
+        ids.tofile(file)
+    meta = {
+        "version": INDEXED_VERSION,
+        "collection": name,
+        "source": os.path.basename(source),
+        "source_mtime_ns": source_stat.st_mtime_ns,
+        "source_size": source_stat.st_size,
+        "records": len(ids),
+    }
+    meta_path = os.path.join(indexed_dir, name + ".meta.json")
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(meta, file)
+    # Stop handing out this process's mapping; sessions still reading it keep
+    # the old file until they drop it (a mapped file cannot be replaced on
+    # Windows until then)
+    _forget_indexed(ndjson_path)
+    os.replace(ndjson_path + ".tmp", ndjson_path)
+    os.replace(index_path + ".tmp", index_path)
+    os.replace(meta_path + ".tmp", meta_path)
+    result["output_bytes"] = offsets[-1] + os.path.getsize(index_path)
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def ingest_datasets(datasets_dir, indexed_dir=None, names=None, force=False):
+    # Ingest every collection whose index is missing or older than its source
+    indexed_dir = indexed_dir or default_indexed_dir(datasets_dir)
+    results = []
+    for name in names or list_collections(datasets_dir):
+        source_stat = os.stat(resolve_dataset_path(datasets_dir, name))
+        meta = _read_indexed_meta(indexed_dir, name)
+        if (not force and meta is not None and meta["source_mtime_ns"] == source_stat.st_mtime_ns
+                and meta["source_size"] == source_stat.st_size):
+            continue
+        results.append(ingest_collection(datasets_dir, name, indexed_dir))
+    return results
+
+
+class IndexedCollection:
+    # Memory-mapped NDJSON collection; records are decoded only when read
+    def __init__(self, name, path, ndjson_path, index_path, meta):
+        self.name = name
+        self.path = path
+        self.ndjson_path = ndjson_path
+        count = meta["records"]
+        self._files = [open(ndjson_path, "rb"), open(index_path, "rb")]
+        # mmap refuses empty files, so an empty collection keeps plain bytes
+        self._data = mmap.mmap(self._files[0].fileno(), 0, access=mmap.ACCESS_READ) if count else b""
+        self._index = mmap.mmap(self._files[1].fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._index)
+        self.offsets = view[:8 * (count + 1)].cast("Q")
+        self.ids = view[8 * (count + 1):8 * (2 * count + 1)].cast("q")
+        self._index_by_id = None
+        self._id_labels = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _record(self, index):
+        line = self._data[self.offsets[index]:self.offsets[index + 1]]
+        record = json.loads(line)
+        return HadithRecord(index, record["id"], record["header"], record["hadith_english"], record["book"],
+                            record["refno"], record["bookName"], record["chapterName"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("hadith index out of range")
+        return self._record(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._record(index)
+
+    def id_labels(self):
+        if self._id_labels is None:
+            self._id_labels = [str(hadith_id) for hadith_id in self.ids]
+        return self._id_labels
+
+    def by_id(self, hadith_id):
+        if self._index_by_id is None:
+            self._index_by_id = first_index_by_id(self.ids)
+        index = self._index_by_id.get(int(hadith_id))
+        return None if index is None else self._record(index)
+
+
+# ndjson path -> (ndjson mtime_ns, IndexedCollection). Replaced instances are
+# never closed here: other sessions may still be reading them, so their
+# mappings are released by the garbage collector once the last one lets go.
+_indexed_cache = {}
+
+
+def _forget_indexed(ndjson_path):
+    with _cache_lock:
+        _indexed_cache.pop(ndjson_path, None)
+
+
+def open_indexed(datasets_dir, name, indexed_dir=None):
+    # The memory-mapped collection, or None when there is no index or its
+    # source dataset changed since it was ingested
+    indexed_dir = os.path.abspath(indexed_dir or default_indexed_dir(datasets_dir))
+    meta = _read_indexed_meta(indexed_dir, name)
+    if meta is None:
+        return None
+    try:
+        source = os.path.abspath(resolve_dataset_path(datasets_dir, name))
+    except FileNotFoundError:
+        source = None  # the index alone is enough once ingested
+    if source is not None:
+        source_stat = os.stat(source)
+        if meta["source_mtime_ns"] != source_stat.st_mtime_ns or meta["source_size"] != source_stat.st_size:
+            return None
+    ndjson_path = os.path.join(indexed_dir, name + ".ndjson")
+    mtime_ns = os.stat(ndjson_path).st_mtime_ns
+    with _path_lock(ndjson_path):
+        cached = _indexed_cache.get(ndjson_path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        collection = IndexedCollection(name, source or ndjson_path, ndjson_path,
+                                       os.path.join(indexed_dir, name + ".idx"), meta)
+        with _cache_lock:
+            _indexed_cache[ndjson_path] = (mtime_ns, collection)
+        return collection
+
+
+def open_collection(datasets_dir, name):
+    # Random-access collection for display: the ingested index when current,
+    # else the parsed JSON
+    return open_indexed(datasets_dir, name) or load_collection(datasets_dir, name)
+
+
+# ---------------------------------------------------------------- CLI
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and ingest the hadith datasets.")
+    parser.add_argument("command", choices=["memory", "ingest"])
+    parser.add_argument("names", nargs="*", help="ingest: collections to convert (default: all)")
+    parser.add_argument("--datasets", default=config.HADITH_DATASETS_DIR,
+                        help="dataset directory (default: the app's, under DEEN_DATA_DIR)")
+    parser.add_argument("--indexed", default=None, help="output directory (default: <datasets>/.indexed)")
+    parser.add_argument("--force", action="store_true", help="ingest even when the index is current")
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        started = time.perf_counter()
+        results = ingest_datasets(args.datasets, args.indexed, args.names, args.force)
+        elapsed = time.perf_counter() - started
+        if not results:
+            print("Nothing to ingest (indexes up to date)")
+            return 0
+        print(f"{'Collection':<12}{'Records':>9}{'Invalid':>9}{'Source MB':>11}{'Output MB':>11}"
+              f"{'Records/s':>11}{'MB/s':>7}{'Open+read ms':>14}{'JSON ms':>9}")
+        for row in results:
+            print(f"{row['collection']:<12}{row['records']:>9}{len(row['errors']):>9}{row['source_bytes'] / 1e6:>11.2f}"
+                  f"{row['output_bytes'] / 1e6:>11.2f}{row['records'] / row['seconds']:>11.0f}"
+                  f"{row['source_bytes'] / 1e6 / row['seconds']:>7.1f}", end="")
+            if not row["published"]:
+                print("  not written: fix the invalid records and ingest again")
+                for position, problems in row["errors"][:5]:
+                    print(f"    record {position}: {'; '.join(problems)}")
+                continue
+            # Cost of one lookup from a cold start: map the index vs parse the JSON
+            _forget_indexed(os.path.join(args.indexed or default_indexed_dir(args.datasets), row["collection"] + ".ndjson"))
+            lookup_started = time.perf_counter()
+            indexed = open_indexed(args.datasets, row["collection"], args.indexed)
+            if len(indexed):
+                indexed[len(indexed) // 2]
+            lookup = time.perf_counter() - lookup_started
+            parse_started = time.perf_counter()
+            read_dataset_json(resolve_dataset_path(args.datasets, row["collection"]))
+            print(f"{lookup * 1000:>14.2f}{(time.perf_counter() - parse_started) * 1000:>9.1f}")
+        total_records = sum(row["records"] for row in results if row["published"])
+        total_mb = sum(row["source_bytes"] for row in results if row["published"]) / 1e6
+        print(f"Ingested {total_records} records ({total_mb:.1f} MB) in {elapsed:.2f}s: "
+              f"{total_records / elapsed:.0f} records/s, {total_mb / elapsed:.1f} MB/s")
+        return 1 if any(row["errors"] for row in results) else 0
+
+    collections = [load_collection(args.datasets, name) for name in list_collections(args.datasets)]
+    print(f"{'Collection':<12}{'Records':>9}{'Books':>7}{'Chapters':>10}{'Store MB':>10}{'JSON MB':>9}{'Saved':>8}")
+    for row in memory_report(collections):
+        store_mb = row["store_bytes"] / 1e6
+        json_mb = row["json_dict_bytes"] / 1e6
+        saved = 1 - row["store_bytes"] / row["json_dict_bytes"] if row["json_dict_bytes"] else 0
+        print(f"{row['collection']:<12}{row['records']:>9}{row['distinct_books']:>7}{row['distinct_chapters']:>10}"
+              f"{store_mb:>10.2f}{json_mb:>9.2f}{saved:>8.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
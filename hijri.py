@@ -0,0 +1,192 @@
+# hijri.py
+# Offline Gregorian <-> Hijri conversion using the tabular (arithmetical)
+# Islamic calendar: 30-year cycle with leap years 2, 5, 7, 10, 13, 16, 18, 21,
+# 24, 26 and 29, civil epoch (16 July 622 CE). All conversions go through the
+# Julian Day Number and accept scalars or NumPy arrays, so a whole month or a
+# whole century converts in one call. Regions that start months by local
+# moon sighting can shift the result with a day adjustment, the same way the
+# aladhan API's "adjustment" parameter does.
+import argparse
+import calendar
+import json
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+HIJRI_EPOCH_JDN = 1948440
+
+HIJRI_MONTHS = [
+    "Muharram", "Safar", "Rabi' al-awwal", "Rabi' al-thani", "Jumada al-ula", "Jumada al-akhirah",
+    "Rajab", "Sha'ban", "Ramadan", "Shawwal", "Dhu al-Qi'dah", "Dhu al-Hijjah",
+]
+
+# Day adjustments for regions whose months start later/earlier than the tabular calendar
+REGION_ADJUSTMENTS = {
+    "None (tabular calendar)": 0,
+    "Moon sighted a day later (e.g. Pakistan, India, Bangladesh)": -1,
+    "Moon sighted a day earlier": 1,
+}
+# The app's users are mostly in Pakistan, so pages start from that adjustment
+DEFAULT_REGION = "Moon sighted a day later (e.g. Pakistan, India, Bangladesh)"
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hijri_fixtures.json")
+
+
+def gregorian_to_jdn(year, month, day):
+    year, month, day = (np.asarray(value, dtype=np.int64) for value in (year, month, day))
+    a = (14 - month) // 12
+    y = year + 4800 - a
+    m = month + 12 * a - 3
+    return day + (153 * m + 2) // 5 + 365 * y + y // 4 - y // 100 + y // 400 - 32045
+
+
+def jdn_to_gregorian(jdn):
+    jdn = np.asarray(jdn, dtype=np.int64)
+    a = jdn + 32044
+    b = (4 * a + 3) // 146097
+    c = a - 146097 * b // 4
+    d = (4 * c + 3) // 1461
+    e = c - 1461 * d // 4
+    m = (5 * e + 2) // 153
+    day = e - (153 * m + 2) // 5 + 1
+    month = m + 3 - 12 * (m // 10)
+    year = 100 * b + d - 4800 + m // 10
+    return year, month, day
+
+
+def hijri_to_jdn(year, month, day):
+    year, month, day = (np.asarray(value, dtype=np.int64) for value in (year, month, day))
+    # Months alternate 30/29 days; ceil(29.5 * (month - 1)) in integers
+    return (day + (59 * (month - 1) + 1) // 2 + (year - 1) * 354 + (3 + 11 * year) // 30
+            + HIJRI_EPOCH_JDN - 1)
+
+
+def jdn_to_hijri(jdn):
+    jdn = np.asarray(jdn, dtype=np.int64)
+    year = (30 * (jdn - HIJRI_EPOCH_JDN) + 10646) // 10631
+    day_of_year = jdn - hijri_to_jdn(year, 1, 1)
+    month = np.minimum(12, (2 * day_of_year) // 59 + 1)
+    # (2 * day_of_year) // 59 can overshoot by one at the end of a 29-day month
+    month = np.where(hijri_to_jdn(year, month, 1) > jdn, month - 1, month)
+    day = jdn - hijri_to_jdn(year, month, 1) + 1
+    return year, month, day
+
+
+def gregorian_to_hijri(year, month, day, adjustment=0):
+    return jdn_to_hijri(gregorian_to_jdn(year, month, day) + adjustment)
+
+
+def hijri_to_gregorian(year, month, day, adjustment=0):
+    return jdn_to_gregorian(hijri_to_jdn(year, month, day) - adjustment)
+
+
+def convert_range(start, end, adjustment=0):
+    # Hijri (year, month, day) arrays for every Gregorian day in [start, end]
+    first = int(gregorian_to_jdn(start.year, start.month, start.day))
+    last = int(gregorian_to_jdn(end.year, end.month, end.day))
+    return jdn_to_hijri(np.arange(first, last + 1) + adjustment)
+
+
+def format_hijri(year, month, day):
+    return f"{int(day)} {HIJRI_MONTHS[int(month) - 1]} {int(year)} AH"
+
+
+def month_grid(year, month, adjustment=0):
+    # Weeks (Monday first) of (gregorian day, hijri day, hijri month) or None
+    days_in_month = calendar.monthrange(year, month)[1]
+    days = np.arange(1, days_in_month + 1)
+    _, hijri_months, hijri_days = gregorian_to_hijri(year, month, days, adjustment)
+    cells = [None] * calendar.weekday(year, month, 1)
+    cells += [(int(d), int(hd), int(hm)) for d, hd, hm in zip(days, hijri_days, hijri_months)]
+    cells += [None] * (-len(cells) % 7)
+    return [cells[i:i + 7] for i in range(0, len(cells), 7)]
+
+
+def month_grid_html(year, month, adjustment=0, today=None):
+    # The whole month as a single HTML table (one Streamlit element)
+    rows = []
+    for week in month_grid(year, month, adjustment):
+        cells = []
+        for cell in week:
+            if cell is None:
+                cells.append("<td></td>")
+                continue
+            day, hijri_day, hijri_month = cell
+            is_today = today is not None and (today.year, today.month, today.day) == (year, month, day)
+            style = ' style="background-color:rgba(46,139,87,0.25)"' if is_today else ""
+            month_label = f"<br><small>{HIJRI_MONTHS[hijri_month - 1]}</small>" if hijri_day == 1 or day == 1 else ""
+            cells.append(f"<td{style}><b>{day}</b><br><span>{hijri_day}</span>{month_label}</td>")
+        rows.append("<tr>" + "".join(cells) + "</tr>")
+    header = "".join(f"<th>{name}</th>" for name in calendar.day_abbr)
+    return (f'<table style="width:100%;text-align:center"><thead><tr>{header}</tr></thead>'
+            f"<tbody>{''.join(rows)}</tbody></table>")
+
+
+# ---------------------------------------------------------------- CLI
+
+def check(path=FIXTURES_PATH):
+    # Compare with each source's reference dates under that source's one
+    # documented adjustment. Returns {source: (settings, exact, total,
+    # [(fixture, days off)])}; the caller decides what counts as a failure.
+    with open(path, "r", encoding="utf-8") as file:
+        fixtures = json.load(file)
+    results = {}
+    for name, source in fixtures["sources"].items():
+        entries = [entry for entry in fixtures["dates"] if entry["source"] == name]
+        gregorian = np.array([[int(part) for part in entry["gregorian"].split("-")] for entry in entries])
+        expected = np.array([[int(part) for part in entry["hijri"].split("-")] for entry in entries])
+        adjustment = source["adjustment"]
+        year, month, day = gregorian_to_hijri(gregorian[:, 0], gregorian[:, 1], gregorian[:, 2], adjustment)
+        # Compare by day number so month/year rollovers count as one day off
+        offset = hijri_to_jdn(year, month, day) - hijri_to_jdn(expected[:, 0], expected[:, 1], expected[:, 2])
+        # Round trip: every Hijri date converts back to the same Gregorian date
+        back = hijri_to_gregorian(year, month, day, adjustment)
+        assert all((np.stack(back, axis=1) == gregorian).all(axis=1))
+        mismatches = [(entry, int(diff)) for entry, diff in zip(entries, offset) if diff]
+        results[name] = (source, len(entries) - len(mismatches), len(entries), mismatches)
+    return results
+
+
+def benchmark(start_year=1950, years=100, rounds=5):
+    first = int(gregorian_to_jdn(start_year, 1, 1))
+    last = int(gregorian_to_jdn(start_year + years, 1, 1))
+    jdns = np.arange(first, last)
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        year, month, day = jdn_to_hijri(jdns)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(jdns), best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check and benchmark the Hijri calendar engine.")
+    parser.add_argument("command", choices=["check", "bench", "convert"])
+    parser.add_argument("date", nargs="?", help="convert: Gregorian date as YYYY-MM-DD")
+    parser.add_argument("--adjustment", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        failed = False
+        for name, (source, exact, total, mismatches) in check().items():
+            print(f"{name} (adjustment {source['adjustment']:+d}): {exact}/{total} exact")
+            for entry, diff in mismatches:
+                print(f"  {entry['gregorian']}: expected {entry['hijri']}, got {diff:+d} day(s)")
+                failed = failed or abs(diff) > source["max_days_off"]
+        return 1 if failed else 0
+    if args.command == "bench":
+        count, elapsed = benchmark()
+        print(f"Converted {count} days (a full century) in {elapsed * 1000:.2f} ms "
+              f"({count / elapsed / 1e6:.1f} M dates/s)")
+        return 0
+    given = date.fromisoformat(args.date) if args.date else date.today()
+    print(format_hijri(*gregorian_to_hijri(given.year, given.month, given.day, args.adjustment)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
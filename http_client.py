@@ -0,0 +1,299 @@
+# http_client.py
+# Shared HTTP client for every upstream the app calls (aladhan, alquran.cloud,
+# sunnah.com). One pooled keep-alive session per host, default timeouts, a
+# TTL + LRU response cache (optionally persisted to disk), ETag /
+# Last-Modified revalidation, coalescing of identical in-flight requests
+# across sessions and stale-while-revalidate.
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import instrumentation
+
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+DEFAULT_TTL = 300
+DEFAULT_CACHE_SIZE = 1024
+POOL_SIZE = 16
+
+
+class CachedResponse:
+    # The parts of a requests.Response the app uses, safe to share and cache
+    __slots__ = ("url", "status_code", "headers", "content", "fetched_at")
+
+    def __init__(self, url, status_code, headers, content, fetched_at=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.fetched_at = fetched_at or time.time()
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    @property
+    def encoding(self):
+        content_type = self.headers.get("Content-Type", "")
+        if "charset=" in content_type:
+            return content_type.split("charset=", 1)[1].split(";")[0].strip()
+        return "utf-8"
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class CacheEntry:
+    __slots__ = ("response", "expires_at", "stale_until")
+
+    def __init__(self, response, expires_at, stale_until):
+        self.response = response
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class HttpClient:
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE, default_ttl=DEFAULT_TTL, cache_dir=None,
+                 timeout=DEFAULT_TIMEOUT, pool_size=POOL_SIZE, retries=2):
+        self.cache_size = cache_size
+        self.default_ttl = default_ttl
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._inflight = {}
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="http-revalidate")
+        self._stats = dict.fromkeys(
+            ("hits", "misses", "stale_hits", "revalidated", "coalesced", "requests", "errors", "bytes_received"), 0)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # ------------------------------------------------------------ sessions
+
+    def session_for(self, url):
+        # One pooled session per scheme+host so keep-alive connections are reused
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                retry = Retry(total=self.retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                              allowed_methods=("GET",))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                session = requests.Session()
+                session.mount(host, adapter)
+                self._sessions[host] = session
+            return session
+
+    # ------------------------------------------------------------ stats
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+        instrumentation.count(f"http.{name}", amount)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_entries"] = len(self._cache)
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+    # ------------------------------------------------------------ cache
+
+    def _disk_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest())
+
+    def _lookup(self, url):
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is not None:
+                self._cache.move_to_end(url)
+                return entry
+        if self.cache_dir:
+            return self._load_from_disk(url)
+        return None
+
+    def _remember(self, url, entry):
+        # Insert as most recently used and evict down to cache_size
+        with self._lock:
+            self._cache[url] = entry
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _store(self, url, entry):
+        self._remember(url, entry)
+        if self.cache_dir:
+            self._save_to_disk(url, entry)
+
+    def _save_to_disk(self, url, entry):
+        path = self._disk_path(url)
+        meta = {
+            "url": url,
+            "status_code": entry.response.status_code,
+            "headers": entry.response.headers,
+            "fetched_at": entry.response.fetched_at,
+            "expires_at": entry.expires_at,
+            "stale_until": entry.stale_until,
+        }
+        try:
+            with open(path + ".body.tmp", "wb") as file:
+                file.write(entry.response.content)
+            with open(path + ".json.tmp", "w", encoding="utf-8") as file:
+                json.dump(meta, file)
+            os.replace(path + ".body.tmp", path + ".body")
+            os.replace(path + ".json.tmp", path + ".json")
+        except OSError:
+            pass
+
+    def _load_from_disk(self, url):
+        path = self._disk_path(url)
+        try:
+            with open(path + ".json", "r", encoding="utf-8") as file:
+                meta = json.load(file)
+            with open(path + ".body", "rb") as file:
+                content = file.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        response = CachedResponse(url, meta["status_code"], meta["headers"], content, meta["fetched_at"])
+        entry = CacheEntry(response, meta["expires_at"], meta["stale_until"])
+        self._remember(url, entry)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    # ------------------------------------------------------------ fetching
+
+    def _fetch(self, url, entry, ttl, stale_ttl, headers):
+        request_headers = dict(headers or {})
+        if entry is not None:
+            # Revalidate rather than re-download when the server supports it
+            if entry.response.headers.get("ETag"):
+                request_headers["If-None-Match"] = entry.response.headers["ETag"]
+            if entry.response.headers.get("Last-Modified"):
+                request_headers["If-Modified-Since"] = entry.response.headers["Last-Modified"]
+        self._count("requests")
+        try:
+            raw = self.session_for(url).get(url, headers=request_headers, timeout=self.timeout)
+        except requests.RequestException:
+            self._count("errors")
+            raise
+        now = time.time()
+        if raw.status_code == 304 and entry is not None:
+            self._count("revalidated")
+            response = entry.response
+        else:
+            self._count("bytes_received", len(raw.content))
+            keep = {name: raw.headers[name] for name in ("Content-Type", "ETag", "Last-Modified") if name in raw.headers}
+            response = CachedResponse(url, raw.status_code, keep, raw.content, now)
+        if response.status_code == 200 and ttl > 0:
+            self._store(url, CacheEntry(response, now + ttl, now + ttl + stale_ttl))
+        return response
+
+    def _fetch_coalesced(self, url, entry, ttl, stale_ttl, headers):
+        # Identical requests already in flight wait for the same result; the
+        # cache policy is part of the key so each caller's ttl is honoured
+        key = (url, ttl, stale_ttl)
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            self._count("coalesced")
+            return future.result()
+        try:
+            response = self._fetch(url, entry, ttl, stale_ttl, headers)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _revalidate_in_background(self, url, entry, ttl, stale_ttl, headers):
+        with self._lock:
+            if (url, ttl, stale_ttl) in self._inflight:
+                return
+        def refresh():
+            try:
+                self._fetch_coalesced(url, entry, ttl, stale_ttl, headers)
+            except Exception:
+                pass
+        self._refresher.submit(refresh)
+
+    def get(self, url, ttl=None, stale_ttl=0, headers=None):
+        # GET through the cache. ttl=0 bypasses it; stale_ttl lets an expired
+        # entry be served for that many extra seconds while it is refreshed.
+        ttl = self.default_ttl if ttl is None else ttl
+        with instrumentation.span("http.get", url=url) as span:
+            entry = self._lookup(url) if ttl > 0 else None
+            now = time.time()
+            if entry is not None:
+                if now < entry.expires_at:
+                    self._count("hits")
+                    span.note(cache="hit")
+                    return entry.response
+                if now < entry.stale_until:
+                    self._count("stale_hits")
+                    span.note(cache="stale")
+                    self._revalidate_in_background(url, entry, ttl, stale_ttl, headers)
+                    return entry.response
+            self._count("misses")
+            response = self._fetch_coalesced(url, entry, ttl, stale_ttl, headers)
+            span.note(cache="miss", status=response.status_code, bytes=len(response.content))
+            return response
+
+    def get_json(self, url, **kwargs):
+        return self.get(url, **kwargs).json()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    # Process-wide client; DEEN_HTTP_CACHE_DIR enables disk persistence
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(cache_dir=os.environ.get("DEEN_HTTP_CACHE_DIR") or None)
+        return _client
+
+
+def get(url, **kwargs):
+    return get_client().get(url, **kwargs)
+
+
+def get_json(url, **kwargs):
+    return get_client().get_json(url, **kwargs)
@@ -0,0 +1,191 @@
+# instrumentation.py
+# Timing spans and counters for finding where a rerun spends its time.
+# Disabled unless DEEN_INSTRUMENTATION=1 (or DEEN_INSTRUMENTATION_LOG is set);
+# when disabled span() hands back a shared no-op context manager and count()
+# returns straight away, so the calls can stay in hot paths.
+#
+# Each rerun records its spans (nested, with timings relative to the rerun
+# start) and the counter changes made while it ran. The last few reruns are
+# kept for the admin panel and, with DEEN_INSTRUMENTATION_LOG=<path> (or "-"
+# for stderr), written as one JSON line each.
+#
+# Counters are process-wide, so with several sessions rerunning at the same
+# time a rerun's counter deltas can include the other sessions' work.
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+HISTORY_SIZE = int(os.environ.get("DEEN_INSTRUMENTATION_HISTORY", "20"))
+
+logger = logging.getLogger("deen.instrumentation")
+logger.propagate = False
+
+_enabled = False
+_local = threading.local()
+_counters = {}
+_counters_lock = threading.Lock()
+# Finished reruns, most recent last
+history = deque(maxlen=HISTORY_SIZE)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def note(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("rerun", "name", "fields", "depth", "started")
+
+    def __init__(self, rerun, name, fields):
+        self.rerun = rerun
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.depth = self.rerun.depth
+        self.rerun.depth += 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        finished = time.perf_counter()
+        self.rerun.depth -= 1
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        self.rerun.spans.append({
+            "name": self.name,
+            "start_ms": round((self.started - self.rerun.started) * 1000, 3),
+            "ms": round((finished - self.started) * 1000, 3),
+            "depth": self.depth,
+            **self.fields,
+        })
+        return False
+
+    def note(self, **fields):
+        # Attach fields learned inside the span (e.g. cache outcome)
+        self.fields.update(fields)
+
+
+class Rerun:
+    def __init__(self, page):
+        self.page = page
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.depth = 0
+        self.spans = []
+        self.counters_before = counters()
+
+    def finish(self):
+        after = counters()
+        changed = {name: value - self.counters_before.get(name, 0) for name, value in after.items()}
+        # Spans are appended as they close; order them by start for display
+        self.spans.sort(key=lambda span: span["start_ms"])
+        return {
+            "event": "rerun",
+            "time": round(self.timestamp, 3),
+            "page": self.page,
+            "ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "spans": self.spans,
+            "counters": {name: delta for name, delta in sorted(changed.items()) if delta},
+        }
+
+
+def enabled():
+    return _enabled
+
+
+def enable(log_path=None):
+    # Turn recording on; log_path ("-" for stderr) also writes JSON lines
+    global _enabled
+    _enabled = True
+    if log_path and not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr) if log_path == "-" else logging.FileHandler(log_path, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    _local.rerun = None
+
+
+def span(name, **fields):
+    # with span("quran.render", surah=2): ... ; a no-op outside a recorded rerun
+    if not _enabled:
+        return _NULL_SPAN
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return _NULL_SPAN
+    return Span(rerun, name, fields)
+
+
+def count(name, amount=1):
+    if not _enabled:
+        return
+    with _counters_lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def counters():
+    with _counters_lock:
+        return dict(_counters)
+
+
+def begin_rerun(page):
+    # Start recording for this script run (one thread per Streamlit session)
+    if _enabled:
+        _local.rerun = Rerun(page)
+
+
+def end_rerun():
+    # Finish the current rerun; returns its record, or None when not recording
+    rerun = getattr(_local, "rerun", None)
+    if not _enabled or rerun is None:
+        return None
+    _local.rerun = None
+    record = rerun.finish()
+    history.append(record)
+    if logger.handlers:
+        logger.info(json.dumps(record, ensure_ascii=False))
+    return record
+
+
+def summary_rows(records=None):
+    # One row per rerun for the admin panel, most recent first
+    rows = []
+    for record in reversed(list(history) if records is None else records):
+        top_level = [span for span in record["spans"] if span["depth"] == 0]
+        slowest = max(top_level, key=lambda span: span["ms"], default=None)
+        rows.append({
+            "time": time.strftime("%H:%M:%S", time.localtime(record["time"])),
+            "page": record["page"],
+            "ms": record["ms"],
+            "slowest": f"{slowest['name']} ({slowest['ms']:.0f} ms)" if slowest else "",
+            "http": record["counters"].get("http.requests", 0),
+            "cache hits": sum(delta for name, delta in record["counters"].items() if name.endswith("hits")),
+            "cache misses": sum(delta for name, delta in record["counters"].items() if name.endswith("misses")),
+            "KB received": round(record["counters"].get("http.bytes_received", 0) / 1024, 1),
+        })
+    return rows
+
+
+_env_log = os.environ.get("DEEN_INSTRUMENTATION_LOG")
+if os.environ.get("DEEN_INSTRUMENTATION", "").lower() in ("1", "true", "yes") or _env_log:
+    enable(_env_log)
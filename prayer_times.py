@@ -0,0 +1,434 @@
+# prayer_times.py
+# Offline prayer times from the sun's position, following the praytimes.org
+# algorithm: low-precision solar coordinates, each time solved from the
+# hour angle at which the sun reaches that prayer's altitude, one refining
+# pass at the estimated time, and high-latitude adjustment for Fajr/Isha.
+# The sun is computed on a quarter-day grid and interpolated per location-day.
+# Dates and locations are NumPy axes, so a year for a thousand cities is a
+# single call returning (locations, days) arrays of local hours.
+import argparse
+import csv
+import io
+import math
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9: only fixed UTC offsets
+    ZoneInfo = None
+
+PRAYERS = ("fajr", "sunrise", "dhuhr", "asr", "maghrib", "isha")
+PRAYER_LABELS = {"fajr": "Fajr", "sunrise": "Sunrise", "dhuhr": "Dhuhr", "asr": "Asr", "maghrib": "Maghrib", "isha": "Isha"}
+
+# Twilight angles in degrees below the horizon; an isha_minutes value
+# replaces the Isha angle with a fixed delay after Maghrib
+METHODS = {
+    "MWL": {"name": "Muslim World League", "fajr": 18.0, "isha": 17.0},
+    "ISNA": {"name": "Islamic Society of North America", "fajr": 15.0, "isha": 15.0},
+    "Karachi": {"name": "University of Islamic Sciences, Karachi", "fajr": 18.0, "isha": 18.0},
+    "Makkah": {"name": "Umm al-Qura University, Makkah", "fajr": 18.5, "isha_minutes": 90},
+    "Egypt": {"name": "Egyptian General Authority of Survey", "fajr": 19.5, "isha": 17.5},
+}
+
+# Shadow length factor for Asr
+ASR_FACTORS = {"Standard": 1, "Hanafi": 2}
+ASR_LABELS = {"Standard": "Standard (Shafi'i, Maliki, Hanbali)", "Hanafi": "Hanafi"}
+
+# How Fajr/Isha are bounded where twilight lasts all night
+HIGH_LATITUDE_RULES = ("NightMiddle", "AngleBased", "OneSeventh", "None")
+
+# name -> (latitude, longitude, time zone, usual method)
+CITIES = {
+    "Karachi, Pakistan": (24.8607, 67.0011, "Asia/Karachi", "Karachi"),
+    "Lahore, Pakistan": (31.5204, 74.3587, "Asia/Karachi", "Karachi"),
+    "Islamabad, Pakistan": (33.6844, 73.0479, "Asia/Karachi", "Karachi"),
+    "Makkah, Saudi Arabia": (21.3891, 39.8579, "Asia/Riyadh", "Makkah"),
+    "Madinah, Saudi Arabia": (24.5247, 39.5692, "Asia/Riyadh", "Makkah"),
+    "Riyadh, Saudi Arabia": (24.7136, 46.6753, "Asia/Riyadh", "Makkah"),
+    "Dubai, UAE": (25.2048, 55.2708, "Asia/Dubai", "Makkah"),
+    "Cairo, Egypt": (30.0444, 31.2357, "Africa/Cairo", "Egypt"),
+    "Istanbul, Turkey": (41.0082, 28.9784, "Europe/Istanbul", "MWL"),
+    "Tehran, Iran": (35.6892, 51.3890, "Asia/Tehran", "MWL"),
+    "Dhaka, Bangladesh": (23.8103, 90.4125, "Asia/Dhaka", "Karachi"),
+    "Delhi, India": (28.7041, 77.1025, "Asia/Kolkata", "Karachi"),
+    "Jakarta, Indonesia": (-6.2088, 106.8456, "Asia/Jakarta", "MWL"),
+    "Kuala Lumpur, Malaysia": (3.1390, 101.6869, "Asia/Kuala_Lumpur", "MWL"),
+    "Lagos, Nigeria": (6.5244, 3.3792, "Africa/Lagos", "MWL"),
+    "London, United Kingdom": (51.5074, -0.1278, "Europe/London", "MWL"),
+    "Paris, France": (48.8566, 2.3522, "Europe/Paris", "MWL"),
+    "Berlin, Germany": (52.5200, 13.4050, "Europe/Berlin", "MWL"),
+    "New York, USA": (40.7128, -74.0060, "America/New_York", "ISNA"),
+    "Chicago, USA": (41.8781, -87.6298, "America/Chicago", "ISNA"),
+    "Toronto, Canada": (43.6532, -79.3832, "America/Toronto", "ISNA"),
+    "Sydney, Australia": (-33.8688, 151.2093, "Australia/Sydney", "MWL"),
+}
+
+# Julian date of 1970-01-01 00:00 UT
+UNIX_EPOCH_JD = 2440587.5
+# Hour (local solar time) at which the sun's position is taken for each time
+_INITIAL = {"fajr": 5.0, "sunrise": 6.0, "dhuhr": 12.0, "asr": 13.0, "sunset": 18.0, "isha": 18.0}
+
+
+def _dsin(x):
+    return np.sin(np.radians(x))
+
+
+def _dcos(x):
+    return np.cos(np.radians(x))
+
+
+def sun_position(jd):
+    # (declination in degrees, equation of time in hours) for Julian dates
+    d = jd - 2451545.0
+    g = np.radians((357.529 + 0.98560028 * d) % 360)
+    q = (280.459 + 0.98564736 * d) % 360
+    ecliptic_longitude = np.radians((q + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g)) % 360)
+    obliquity = np.radians(23.439 - 0.00000036 * d)
+    right_ascension = (np.degrees(np.arctan2(np.cos(obliquity) * np.sin(ecliptic_longitude),
+                                             np.cos(ecliptic_longitude))) / 15) % 24
+    equation = q / 15 - right_ascension
+    equation = (equation + 12) % 24 - 12
+    declination = np.degrees(np.arcsin(np.sin(obliquity) * np.sin(ecliptic_longitude)))
+    return declination, equation
+
+
+def date_range(start, end):
+    # numpy datetime64[D] array of every day in [start, end]
+    return np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+
+
+def year_dates(year):
+    return date_range(date(year, 1, 1), date(year, 12, 31))
+
+
+def utc_offsets(time_zone, dates):
+    # UTC offset in hours for each date (at local noon, so DST changes at night count)
+    zone = ZoneInfo(time_zone)
+    return np.array([
+        datetime.combine(day.astype(object), datetime.min.time().replace(hour=12), zone).utcoffset().total_seconds() / 3600
+        for day in dates
+    ])
+
+
+SUN_TABLE_STEP = 0.25
+
+
+def sun_table(jd_first, jd_last, step=SUN_TABLE_STEP):
+    # Sun samples every `step` days covering [jd_first, jd_last], as
+    # (first jd, {series: (values, slopes)}) for declination, its sine and
+    # cosine and the equation of time. Both change slowly, so linear
+    # interpolation is well under a second of time off and far cheaper than
+    # evaluating the trig for every location-day.
+    grid = np.arange(math.floor(jd_first) - 1, math.ceil(jd_last) + 2, step)
+    declination, equation = sun_position(grid)
+    series = {"declination": declination, "sin_declination": _dsin(declination),
+              "cos_declination": _dcos(declination), "equation": equation}
+    return grid[0], {name: (values, np.append(np.diff(values), 0.0)) for name, values in series.items()}
+
+
+def compute_times(dates, latitudes, longitudes, timezones, method="MWL", asr="Standard",
+                  elevations=0.0, high_latitude_rule="NightMiddle", iterations=2):
+    # Prayer times as local hours (floats, NaN where the sun never reaches the
+    # angle) shaped (locations, days). timezones may be per location or
+    # (locations, days) for daylight saving. The first pass takes the sun at
+    # fixed guesses of each time; later passes take it at the previous result.
+    params = METHODS[method]
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    lat = np.atleast_1d(np.asarray(latitudes, dtype=float))[:, None]
+    lng = np.atleast_1d(np.asarray(longitudes, dtype=float))[:, None]
+    tz = np.asarray(timezones, dtype=float)
+    tz = tz[:, None] if tz.ndim == 1 else tz
+    elevation = np.asarray(elevations, dtype=float)
+    elevation = elevation[:, None] if elevation.ndim == 1 else elevation
+    jd = (dates - np.datetime64("1970-01-01", "D")).astype(float)[None, :] + UNIX_EPOCH_JD - lng / 360.0
+    first_jd, table = sun_table(jd.min(), jd.max() + 1)
+
+    sin_lat = _dsin(lat)
+    cos_lat = _dcos(lat)
+    rise_set_angle = 0.833 + 0.0347 * np.sqrt(elevation)
+    factor = ASR_FACTORS[asr]
+
+    def sun(t, *names):
+        # Interpolated series at solar hour(s) t on each location-day
+        position = (jd + t / 24 - first_jd) / SUN_TABLE_STEP
+        index = position.astype(np.intp)
+        fraction = position - index
+        return [table[name][0][index] + fraction * table[name][1][index] for name in names]
+
+    def sun_angle_time(angle, t, before_noon=False):
+        if angle is None:  # Asr: the angle depends on the declination
+            declination, sin_declination, cos_declination, equation = sun(
+                t, "declination", "sin_declination", "cos_declination", "equation")
+            angle = -np.degrees(np.arctan(1 / (factor + np.tan(np.radians(np.abs(lat - declination))))))
+        else:
+            sin_declination, cos_declination, equation = sun(t, "sin_declination", "cos_declination", "equation")
+        noon = (12 - equation) % 24
+        with np.errstate(invalid="ignore"):
+            hour_angle = np.degrees(np.arccos((-_dsin(angle) - sin_declination * sin_lat)
+                                              / (cos_declination * cos_lat))) / 15
+        return noon - hour_angle if before_noon else noon + hour_angle
+
+    def solar_times(guess):
+        times = {
+            "fajr": sun_angle_time(params["fajr"], guess["fajr"], before_noon=True),
+            "sunrise": sun_angle_time(rise_set_angle, guess["sunrise"], before_noon=True),
+            "dhuhr": (12 - sun(guess["dhuhr"], "equation")[0]) % 24,
+            "asr": sun_angle_time(None, guess["asr"]),
+            "sunset": sun_angle_time(rise_set_angle, guess["sunset"]),
+        }
+        if "isha" in params:
+            times["isha"] = sun_angle_time(params["isha"], guess["isha"])
+        return times
+
+    times = solar_times(_INITIAL)
+    for _ in range(iterations - 1):
+        # Where a time is undefined keep the first guess
+        times = solar_times({name: np.where(np.isnan(value), _INITIAL[name], value) for name, value in times.items()})
+
+    # Solar time -> local time
+    shift = tz - lng / 15
+    times = {name: value + shift for name, value in times.items()}
+    times["maghrib"] = times["sunset"]
+    if "isha_minutes" in params:
+        times["isha"] = times["maghrib"] + params["isha_minutes"] / 60
+
+    if high_latitude_rule != "None":
+        night = (times["sunrise"] - times["sunset"]) % 24
+        def portion(angle):
+            if high_latitude_rule == "AngleBased":
+                return angle / 60 * night
+            if high_latitude_rule == "OneSeventh":
+                return night / 7
+            return night / 2
+        fajr_limit = portion(params["fajr"])
+        times["fajr"] = np.where(np.isnan(times["fajr"]) | ((times["sunrise"] - times["fajr"]) % 24 > fajr_limit),
+                                 times["sunrise"] - fajr_limit, times["fajr"])
+        if "isha" in params:
+            isha_limit = portion(params["isha"])
+            times["isha"] = np.where(np.isnan(times["isha"]) | ((times["isha"] - times["sunset"]) % 24 > isha_limit),
+                                     times["sunset"] + isha_limit, times["isha"])
+
+    shape = np.broadcast_shapes(lat.shape, jd.shape)
+    return {name: np.broadcast_to(times[name], shape) for name in PRAYERS}
+
+
+def format_time(hours):
+    # "HH:MM" rounded to the nearest minute, "--:--" when undefined
+    if hours is None or math.isnan(hours):
+        return "--:--"
+    minutes = int(round((hours % 24) * 60)) % (24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def timetable(latitude, longitude, time_zone, dates, method="MWL", asr="Standard", elevation=0.0,
+              high_latitude_rule="NightMiddle"):
+    # Rows of {"Date", "Fajr", ...} for one location; time_zone is an IANA
+    # name or a fixed UTC offset in hours
+    if isinstance(time_zone, str):
+        offsets = utc_offsets(time_zone, dates)[None, :]
+    else:
+        offsets = np.full((1, len(dates)), float(time_zone))
+    times = compute_times(dates, [latitude], [longitude], offsets, method, asr, elevation, high_latitude_rule)
+    rows = []
+    for index, day in enumerate(dates):
+        row = {"Date": str(day)}
+        for name in PRAYERS:
+            row[PRAYER_LABELS[name]] = format_time(float(times[name][0, index]))
+        rows.append(row)
+    return rows
+
+
+def timetable_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]) if rows else ["Date"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+# ---------------------------------------------------------------- reference implementations
+
+def _scalar_times(day, latitude, longitude, timezone, method, asr, iterations=2):
+    # Straight per-day port of praytimes.org with math and the exact sun
+    # position, for cross-checking the broadcasting and the interpolated sun
+    # table (no high-latitude adjustment)
+    params = METHODS[method]
+    jd = (day - date(1970, 1, 1)).days + UNIX_EPOCH_JD - longitude / 360.0
+
+    def position(t):
+        declination, equation = sun_position(np.float64(jd + t / 24))
+        return float(declination), float(equation)
+
+    def angle_time(angle, t, before_noon=False):
+        declination, equation = position(t)
+        noon = (12 - equation) % 24
+        if angle is None:
+            angle = -math.degrees(math.atan(1 / (ASR_FACTORS[asr] + math.tan(math.radians(abs(latitude - declination))))))
+        cosine = ((-math.sin(math.radians(angle)) - math.sin(math.radians(declination)) * math.sin(math.radians(latitude)))
+                  / (math.cos(math.radians(declination)) * math.cos(math.radians(latitude))))
+        if abs(cosine) > 1:
+            return float("nan")
+        hour_angle = math.degrees(math.acos(cosine)) / 15
+        return noon - hour_angle if before_noon else noon + hour_angle
+
+    guess = dict(_INITIAL)
+    for _ in range(iterations):
+        times = {
+            "fajr": angle_time(params["fajr"], guess["fajr"], True),
+            "sunrise": angle_time(0.833, guess["sunrise"], True),
+            "dhuhr": (12 - position(guess["dhuhr"])[1]) % 24,
+            "asr": angle_time(None, guess["asr"]),
+            "sunset": angle_time(0.833, guess["sunset"]),
+        }
+        if "isha" in params:
+            times["isha"] = angle_time(params["isha"], guess["isha"])
+        guess = {name: _INITIAL[name] if math.isnan(value) else value for name, value in times.items()}
+    times = {name: value + timezone - longitude / 15 for name, value in times.items()}
+    times["maghrib"] = times.pop("sunset")
+    if "isha_minutes" in params:
+        times["isha"] = times["maghrib"] + params["isha_minutes"] / 60
+    return times
+
+
+def _noaa_times(day, latitude, longitude, timezone, method, asr):
+    # Independent check with NOAA's solar calculator equations (higher-precision
+    # series for declination and equation of time), each event solved at its own time
+    params = METHODS[method]
+
+    def sun(hours_utc):
+        jc = ((day - date(2000, 1, 1)).days - 0.5 + hours_utc / 24) / 36525
+        mean_longitude = (280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360
+        anomaly = math.radians(357.52911 + jc * (35999.05029 - 0.0001537 * jc))
+        eccentricity = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+        centre = (math.sin(anomaly) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+                  + math.sin(2 * anomaly) * (0.019993 - 0.000101 * jc) + math.sin(3 * anomaly) * 0.000289)
+        omega = math.radians(125.04 - 1934.136 * jc)
+        apparent_longitude = math.radians(mean_longitude + centre - 0.00569 - 0.00478 * math.sin(omega))
+        mean_obliquity = 23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
+        obliquity = math.radians(mean_obliquity + 0.00256 * math.cos(omega))
+        declination = math.asin(math.sin(obliquity) * math.sin(apparent_longitude))
+        y = math.tan(obliquity / 2) ** 2
+        l0 = math.radians(mean_longitude)
+        equation_minutes = 4 * math.degrees(
+            y * math.sin(2 * l0) - 2 * eccentricity * math.sin(anomaly)
+            + 4 * eccentricity * y * math.sin(anomaly) * math.cos(2 * l0)
+            - 0.5 * y * y * math.sin(4 * l0) - 1.25 * eccentricity ** 2 * math.sin(2 * anomaly))
+        return declination, equation_minutes
+
+    def solar_noon(guess):
+        _, equation = sun(guess - timezone)
+        return 12 - longitude / 15 - equation / 60 + timezone
+
+    def event(altitude, guess, before_noon):
+        t = guess
+        for _ in range(3):
+            declination, equation = sun(t - timezone)
+            noon = 12 - longitude / 15 - equation / 60 + timezone
+            phi = math.radians(latitude)
+            cosine = (math.sin(math.radians(altitude)) - math.sin(phi) * math.sin(declination)) / (math.cos(phi) * math.cos(declination))
+            if abs(cosine) > 1:
+                return float("nan")
+            hour_angle = math.degrees(math.acos(cosine)) / 15
+            t = noon - hour_angle if before_noon else noon + hour_angle
+        return t
+
+    noon = solar_noon(solar_noon(12.0))
+    declination = sun(noon - timezone)[0]
+    asr_altitude = math.degrees(math.atan(1 / (ASR_FACTORS[asr] + math.tan(abs(math.radians(latitude) - declination)))))
+    times = {
+        "fajr": event(-params["fajr"], 5.0, True),
+        "sunrise": event(-0.833, 6.0, True),
+        "dhuhr": noon,
+        "asr": event(asr_altitude, 15.0, False),
+        "maghrib": event(-0.833, 18.0, False),
+    }
+    times["isha"] = event(-params["isha"], 19.5, False) if "isha" in params else times["maghrib"] + params["isha_minutes"] / 60
+    return times
+
+
+# ---------------------------------------------------------------- CLI
+
+def check(year=2025, cities=CITIES, methods=METHODS, asr_options=ASR_FACTORS):
+    # Worst differences (minutes) of the vectorised engine against the scalar
+    # port and against the NOAA equations, per method/asr over a year
+    days = [date(year, 1, 1) + timedelta(days=n) for n in range(0, 365, 7)]
+    dates = np.array(days, dtype="datetime64[D]")
+    names = list(cities)
+    latitudes = [cities[name][0] for name in names]
+    longitudes = [cities[name][1] for name in names]
+    # Fixed standard offsets keep the comparison free of DST bookkeeping
+    offsets = [utc_offsets(cities[name][2], dates[:1])[0] if ZoneInfo else round(cities[name][1] / 15) for name in names]
+    results = []
+    for method in methods:
+        for asr in asr_options:
+            times = compute_times(dates, latitudes, longitudes, offsets, method, asr, high_latitude_rule="None")
+            worst_scalar = worst_noaa = 0.0
+            worst_where = ""
+            for i, name in enumerate(names):
+                for j, day in enumerate(days):
+                    scalar = _scalar_times(day, latitudes[i], longitudes[i], offsets[i], method, asr)
+                    noaa = _noaa_times(day, latitudes[i], longitudes[i], offsets[i], method, asr)
+                    for prayer in PRAYERS:
+                        value = float(times[prayer][i, j])
+                        if math.isnan(value):
+                            continue
+                        worst_scalar = max(worst_scalar, abs(value - scalar[prayer]) * 60)
+                        diff = abs(value - noaa[prayer]) * 60
+                        if diff > worst_noaa:
+                            worst_noaa, worst_where = diff, f"{name} {day} {prayer}"
+            results.append((method, asr, worst_scalar, worst_noaa, worst_where))
+    return results
+
+
+def benchmark(cities=1000, year=2025, method="MWL", rounds=5):
+    rng = np.random.default_rng(0)
+    latitudes = rng.uniform(-55, 55, cities)
+    longitudes = rng.uniform(-180, 180, cities)
+    timezones = np.round(longitudes / 15)
+    dates = year_dates(year)
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        compute_times(dates, latitudes, longitudes, timezones, method)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return cities * len(dates), best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check, benchmark and print offline prayer times.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("check", help="compare against a scalar port and the NOAA solar equations")
+    bench_parser = subparsers.add_parser("bench", help="time a year for many cities")
+    bench_parser.add_argument("--cities", type=int, default=1000)
+    table_parser = subparsers.add_parser("table", help="print a CSV timetable")
+    table_parser.add_argument("city", choices=list(CITIES))
+    table_parser.add_argument("--year", type=int, default=date.today().year)
+    table_parser.add_argument("--method", choices=list(METHODS))
+    table_parser.add_argument("--asr", choices=list(ASR_FACTORS), default="Standard")
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        worst = 0.0
+        print(f"{'Method':<9}{'Asr':<10}{'vs scalar (min)':>16}{'vs NOAA (min)':>15}  worst case")
+        for method, asr, scalar_diff, noaa_diff, where in check():
+            print(f"{method:<9}{asr:<10}{scalar_diff:>16.4f}{noaa_diff:>15.2f}  {where}")
+            worst = max(worst, noaa_diff)
+        return 0 if worst < 2.0 else 1
+    if args.command == "bench":
+        count, elapsed = benchmark(args.cities)
+        print(f"{count} location-days ({args.cities} cities x 1 year) in {elapsed * 1000:.1f} ms "
+              f"({count / elapsed / 1e6:.2f} M/s)")
+        return 0
+    latitude, longitude, time_zone, usual_method = CITIES[args.city]
+    rows = timetable(latitude, longitude, time_zone, year_dates(args.year), args.method or usual_method, args.asr)
+    sys.stdout.write(timetable_csv(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
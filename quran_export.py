@@ -0,0 +1,157 @@
+# quran_export.py
+# "Download Entire Quran" pipeline: Surahs are fetched concurrently through
+# the shared HTTP client (or read from the local store), reassembled in order
+# and streamed straight into the output buffer as txt, a per-Surah ZIP or JSON.
+import io
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+from quran_store import QURAN_API, QURAN_CACHE_TTL
+
+SURAH_COUNT = 114
+EXPORT_WORKERS = 8
+EXPORT_FORMATS = {
+    "txt": ("Plain text (.txt)", "Full_Quran.txt", "text/plain"),
+    "zip": ("Per-Surah text files (.zip)", "Full_Quran.zip", "application/zip"),
+    "json": ("JSON (.json)", "Full_Quran.json", "application/json"),
+}
+
+
+def fetch_surah(surah_number, editions, api=QURAN_API, store=None):
+    # {"number", "englishName", "verses": {edition: (texts...)}} for one Surah
+    surah = {"number": surah_number, "englishName": None, "verses": {}}
+    for edition in editions:
+        texts = store.surah_texts(surah_number, edition) if store else None
+        if texts is None:
+            data = http_client.get_json(f"{api}/surah/{surah_number}/{edition}", ttl=QURAN_CACHE_TTL)
+            if data.get("code") != 200:
+                raise ValueError(f"Surah {surah_number} ({edition}) returned {data.get('code')}")
+            surah["englishName"] = data["data"]["englishName"]
+            texts = tuple(ayah["text"] for ayah in data["data"]["ayahs"])
+        surah["verses"][edition] = texts
+    if surah["englishName"] is None and store:
+        names = {row["number"]: row["englishName"] for row in (store.surahs() or [])}
+        surah["englishName"] = names.get(surah_number, "")
+    return surah
+
+
+def iter_surahs(editions, api=QURAN_API, store=None, fetched=None, workers=EXPORT_WORKERS, progress=None):
+    # Yield (number, surah or None, error) in Surah order while fetching
+    # concurrently. Surahs already in `fetched` are reused (resume), and
+    # newly fetched ones are added to it. Progress is reported from the
+    # consuming thread, since Streamlit elements can't be updated from workers.
+    fetched = {} if fetched is None else fetched
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            surah_number: pool.submit(fetch_surah, surah_number, editions, api, store)
+            for surah_number in range(1, SURAH_COUNT + 1)
+            if surah_number not in fetched
+        }
+        for surah_number in range(1, SURAH_COUNT + 1):
+            if surah_number in fetched:
+                surah, error = fetched[surah_number], None
+            else:
+                try:
+                    surah, error = futures.pop(surah_number).result(), None
+                    fetched[surah_number] = surah
+                except Exception as e:
+                    surah, error = None, e
+            if progress:
+                progress(surah_number, SURAH_COUNT)
+            yield surah_number, surah, error
+
+
+def surah_lines(surah, editions, urdu_label):
+    arabic, english, urdu = (surah["verses"][edition] for edition in editions)
+    for i, (arabic_verse, english_verse, urdu_verse) in enumerate(zip(arabic, english, urdu), 1):
+        yield f"Verse {i}:\n"
+        yield f"Arabic: {arabic_verse}\n"
+        yield f"English: {english_verse}\n"
+        yield f"Urdu ({urdu_label}): {urdu_verse}\n\n"
+
+
+def write_txt(out, surahs, editions, urdu_label):
+    writer = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer.write("The Holy Quran\n\n")
+    for surah in surahs:
+        writer.write(f"Surah {surah['number']}: {surah['englishName']}\n\n")
+        writer.writelines(surah_lines(surah, editions, urdu_label))
+        writer.write("===\n\n")
+    writer.detach()
+
+
+def write_zip(out, surahs, editions, urdu_label):
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for surah in surahs:
+            name = f"Surah_{surah['number']:03d}_{surah['englishName']}.txt"
+            with archive.open(name, "w") as entry:
+                entry.write(f"Surah {surah['number']}. {surah['englishName']}\n\n".encode("utf-8"))
+                for line in surah_lines(surah, editions, urdu_label):
+                    entry.write(line.encode("utf-8"))
+
+
+def write_json(out, surahs, editions, urdu_label):
+    # Written one Surah at a time rather than json.dumps of the whole Quran
+    out.write(json.dumps({"editions": list(editions), "urdu": urdu_label})[:-1].encode("utf-8"))
+    out.write(b', "surahs": [')
+    for i, surah in enumerate(surahs):
+        if i:
+            out.write(b", ")
+        arabic, english, urdu = (surah["verses"][edition] for edition in editions)
+        out.write(json.dumps({
+            "number": surah["number"],
+            "englishName": surah["englishName"],
+            "ayahs": [{"number": n, "arabic": a, "english": e, "urdu": u}
+                      for n, (a, e, u) in enumerate(zip(arabic, english, urdu), 1)],
+        }, ensure_ascii=False).encode("utf-8"))
+    out.write(b"]}")
+
+
+WRITERS = {"txt": write_txt, "zip": write_zip, "json": write_json}
+
+
+def export_quran(fmt, urdu_edition, urdu_label, api=QURAN_API, store=None, fetched=None,
+                 workers=EXPORT_WORKERS, progress=None):
+    # Returns (BytesIO positioned at 0, [(surah number, error), ...])
+    editions = ("ar", "en.sahih", urdu_edition)
+    failed = []
+
+    def ordered_surahs():
+        for surah_number, surah, error in iter_surahs(editions, api, store, fetched, workers, progress):
+            if error is not None:
+                failed.append((surah_number, error))
+            else:
+                yield surah
+
+    out = io.BytesIO()
+    WRITERS[fmt](out, ordered_surahs(), editions, urdu_label)
+    out.seek(0)
+    return out, failed
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import config
+    from quran_store import open_store
+
+    parser = argparse.ArgumentParser(description="Export the full Quran to a file.")
+    parser.add_argument("output")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="txt")
+    parser.add_argument("--urdu-edition", default="ur.jalandhry")
+    parser.add_argument("--api", default=QURAN_API)
+    parser.add_argument("--db", default=config.QURAN_DB_PATH)
+    parser.add_argument("--workers", type=int, default=EXPORT_WORKERS)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    buffer, failed = export_quran(args.format, args.urdu_edition, args.urdu_edition, args.api,
+                                  open_store(args.db), workers=args.workers)
+    with open(args.output, "wb") as file:
+        file.write(buffer.getbuffer())
+    print(f"Wrote {args.output} ({buffer.getbuffer().nbytes / 1e6:.2f} MB) in {time.perf_counter() - started:.2f}s")
+    for surah_number, error in failed:
+        print(f"  Surah {surah_number} failed: {error}")
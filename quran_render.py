@@ -0,0 +1,152 @@
+# quran_render.py
+# Batched Surah rendering: each page of verses is assembled into a single
+# HTML block (one Streamlit element instead of four per verse) and the
+# blocks are cached per (surah, editions, page size) for every session.
+import html
+import threading
+from collections import OrderedDict
+
+import instrumentation
+
+VERSES_PER_PAGE = 20
+RENDER_CACHE_SIZE = 256
+
+# (surah, editions, urdu label, page size, page) -> html, most recently used last
+_render_cache = OrderedDict()
+_render_lock = threading.Lock()
+
+
+def page_count(verse_count, page_size=VERSES_PER_PAGE):
+    return max(1, (verse_count + page_size - 1) // page_size)
+
+
+def page_of_ayah(ayah, page_size=VERSES_PER_PAGE):
+    return (ayah - 1) // page_size + 1
+
+
+def verse_html(number, arabic, english, urdu, urdu_label):
+    return (
+        f'<div id="ayah-{number}">'
+        f"<p><b>Verse {number}:</b></p>"
+        f'<p dir="rtl" style="font-size:1.6em;text-align:right"><b>Arabic:</b> {html.escape(arabic)}</p>'
+        f"<p><b>English:</b> {html.escape(english)}</p>"
+        f'<p dir="rtl" style="text-align:right"><b>Urdu ({html.escape(urdu_label)}):</b> {html.escape(urdu)}</p>'
+        "<hr></div>"
+    )
+
+
+def render_page(surah_number, editions, urdu_label, arabic_verses, english_verses, urdu_verses,
+                page, page_size=VERSES_PER_PAGE):
+    # HTML for one page of verses, built once and shared across sessions
+    key = (surah_number, tuple(editions), urdu_label, page_size, page)
+    with _render_lock:
+        block = _render_cache.get(key)
+        if block is not None:
+            _render_cache.move_to_end(key)
+            instrumentation.count("render_cache.hits")
+            return block
+    instrumentation.count("render_cache.misses")
+    start = (page - 1) * page_size
+    end = min(start + page_size, len(arabic_verses))
+    block = "".join(
+        verse_html(number, arabic_verses[number - 1], english_verses[number - 1], urdu_verses[number - 1], urdu_label)
+        for number in range(start + 1, end + 1)
+    )
+    with _render_lock:
+        _render_cache[key] = block
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    return block
+
+
+def highlight_ayah(block, ayah):
+    # Mark the jumped-to ayah without invalidating the cached page
+    return block.replace(f'<div id="ayah-{ayah}">',
+                         f'<div id="ayah-{ayah}" style="background-color:rgba(46,139,87,0.15)">', 1)
+
+
+# ---------------------------------------------------------------- report
+
+# Scripts run under Streamlit's AppTest to compare the two rendering modes
+_CLASSIC_SCRIPT = """
+import pickle, streamlit as st
+arabic, english, urdu = pickle.load(open({path!r}, "rb"))
+for i, (a, e, u) in enumerate(zip(arabic, english, urdu), 1):
+    st.write(f"**Verse {{i}}:**")
+    st.write(f"**Arabic:** {{a}}")
+    st.write(f"**English:** {{e}}")
+    st.write(f"**Urdu (Jalandhry):** {{u}}")
+    st.write("---")
+"""
+
+_PAGED_SCRIPT = """
+import pickle, streamlit as st
+from quran_render import render_page
+arabic, english, urdu = pickle.load(open({path!r}, "rb"))
+st.markdown(render_page({surah}, ("ar", "en.sahih", "ur"), "Jalandhry", arabic, english, urdu, 1), unsafe_allow_html=True)
+"""
+
+# Ayah counts of the longest Surahs, for synthetic text when not imported
+LARGEST_SURAHS = {2: 286, 26: 227, 7: 206, 3: 200, 37: 182}
+
+
+def _surah_texts(store, surah_number):
+    editions = ("ar", "en.sahih", "ur.jalandhry")
+    texts = [store.surah_texts(surah_number, edition) if store else None for edition in editions]
+    if all(texts):
+        return texts, False
+    count = LARGEST_SURAHS.get(surah_number, 100)
+    return [
+        tuple("بِسْمِ اللَّهِ الرَّحْمَٰنِ الرَّحِيمِ " * 4 for _ in range(count)),
+        tuple("In the name of Allah, the Entirely Merciful, the Especially Merciful. " * 3 for _ in range(count)),
+        tuple("شروع اللہ کے نام سے جو بڑا مہربان نہایت رحم والا ہے " * 4 for _ in range(count)),
+    ], True
+
+
+def report(surahs=(2, 26, 7), rounds=3):
+    import os
+    import pickle
+    import tempfile
+    import time
+
+    from streamlit.testing.v1 import AppTest
+
+    from quran_store import open_store
+
+    try:
+        store = open_store()
+    except Exception:
+        store = None
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for surah_number in surahs:
+            (arabic, english, urdu), synthetic = _surah_texts(store, surah_number)
+            data_path = os.path.join(workdir, f"surah_{surah_number}.pickle")
+            with open(data_path, "wb") as file:
+                pickle.dump((arabic, english, urdu), file)
+            row = {"surah": surah_number, "verses": len(arabic), "synthetic_text": synthetic}
+            for mode, template in (("classic", _CLASSIC_SCRIPT), ("paged", _PAGED_SCRIPT)):
+                script = template.format(path=data_path, surah=surah_number)
+                timings = []
+                for _ in range(rounds):
+                    app = AppTest.from_string(script, default_timeout=120)
+                    started = time.perf_counter()
+                    app.run()
+                    timings.append(time.perf_counter() - started)
+                row[f"{mode}_elements"] = sum(1 for _ in app.main)
+                row[f"{mode}_rerun_ms"] = min(timings) * 1000
+            rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare per-verse and batched Surah rendering.")
+    parser.add_argument("--surah", type=int, action="append", help="Surah number (repeatable)")
+    args = parser.parse_args()
+    print(f"{'Surah':>5}{'Verses':>8}{'Elements before':>17}{'after':>7}{'Rerun before':>14}{'after':>9}")
+    for row in report(tuple(args.surah or (2, 26, 7))):
+        note = "  (synthetic text)" if row["synthetic_text"] else ""
+        print(f"{row['surah']:>5}{row['verses']:>8}{row['classic_elements']:>17}{row['paged_elements']:>7}"
+              f"{row['classic_rerun_ms']:>12.0f}ms{row['paged_rerun_ms']:>7.0f}ms{note}")
@@ -0,0 +1,506 @@
+# quran_search.py
+# Search over the Quran editions in quran_store. Text is folded before
+# indexing and querying: harakat, Quranic annotation marks and tatweel are
+# dropped, alef/ya/ta-marbuta/heh/kaf variants and presentation forms are
+# unified, and Latin text is lowercased without accents. Arabic and Urdu
+# editions get a character trigram index (matches inside words, so
+# prefixes like و/ال/بال don't hide a word) plus a light stemmer for Arabic;
+# translations get a word index with light English stemming. Indexes are
+# built in memory from the store once per process and edition.
+import argparse
+import html
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+
+import config
+from quran_store import open_store
+from text_utils import stem_english
+
+# Editions in these languages are searched by substring through the trigram index
+NGRAM_LANGUAGES = ("ar", "ur", "fa")
+NGRAM_SIZE = 3
+# Extra score when a multi-word query appears as written
+PHRASE_BONUS = 4
+
+# Folded to nothing besides combining marks: tatweel, Quranic annotation
+# signs that are not combining (rub el hizb, sajdah, small waw/yeh) and
+# zero-width joiners/direction marks used in Urdu text
+_DROPPED = {"ـ", "۞", "ۥ", "ۦ", "۩", "‌", "‍", "‎", "‏"}
+# Letter variants (after NFKD, which already splits hamza and madda off alef, waw and ya)
+_LETTER_MAP = {
+    "ٱ": "ا",  # alef wasla -> alef
+    "ٲ": "ا", "ٳ": "ا",
+    "ى": "ي",  # alef maksura -> ya
+    "ی": "ي",  # Farsi/Urdu ya -> ya
+    "ة": "ه",  # ta marbuta -> heh
+    "ۃ": "ه",
+    "ہ": "ه",  # Urdu heh goal -> heh
+    "ھ": "ه",  # heh doachashmee -> heh
+    "ە": "ه",
+    "ک": "ك",  # keheh -> kaf
+}
+_LETTER_MAP.update({chr(0x0660 + n): str(n) for n in range(10)})
+_LETTER_MAP.update({chr(0x06f0 + n): str(n) for n in range(10)})
+# Code points that fold to something else get an entry in the translate table
+_FOLD_RANGES = ((0x0041, 0x005b), (0x00c0, 0x0250), (0x0300, 0x0370), (0x0600, 0x0700), (0x0750, 0x0780),
+                (0x08a0, 0x0900), (0x2000, 0x2070), (0xfb50, 0xfe00), (0xfe70, 0xff00))
+
+_EMPTY = frozenset()
+_separator_re = re.compile(r"[\W_]+")
+_arabic_script_re = re.compile(r"[؀-ۿݐ-ݿࢠ-ࣿﭐ-﷿ﹰ-﻿]")
+
+# Light10-style affixes, written in folded form (ta marbuta is already heh)
+_ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+_ARABIC_SUFFIXES = ("ها", "ان", "ات", "ون", "ين", "يه", "ه", "ي")
+
+
+def _fold_char(char):
+    parts = []
+    for part in unicodedata.normalize("NFKD", char):
+        if unicodedata.category(part) in ("Mn", "Me") or part in _DROPPED:
+            continue
+        parts.append(_LETTER_MAP.get(part, part))
+    return "".join(parts).lower()
+
+
+def _build_fold_table():
+    table = {}
+    for first, last in _FOLD_RANGES:
+        for code in range(first, last):
+            folded = _fold_char(chr(code))
+            if folded != chr(code):
+                table[code] = folded
+    return table
+
+
+_FOLD_TABLE = _build_fold_table()
+
+
+def normalize(text):
+    # Folded text with runs of punctuation/space collapsed to one space
+    return _separator_re.sub(" ", text.translate(_FOLD_TABLE)).strip()
+
+
+# char -> folded form with separators as " " (for the per-character path)
+_char_folds = {}
+
+
+def _char_fold(char):
+    folded = _char_folds.get(char)
+    if folded is None:
+        folded = _char_folds[char] = _separator_re.sub(" ", char.translate(_FOLD_TABLE))
+    return folded
+
+
+def normalize_with_offsets(text):
+    # Same as normalize(), plus the index in `text` each character came from
+    chars, offsets = [], []
+    pending_space = False
+    for index, char in enumerate(text):
+        for part in _char_fold(char):
+            if part == " ":
+                pending_space = bool(chars)
+                continue
+            if pending_space:
+                chars.append(" ")
+                offsets.append(index)
+                pending_space = False
+            chars.append(part)
+            offsets.append(index)
+    return "".join(chars), offsets
+
+
+def drop_medial_alef(word):
+    # Uthmani spelling writes many long vowels as a dagger alef, which folds
+    # away (ٱلْكِتَٰبُ -> الكتب), and spellings differ (السموات/السماوات), so
+    # Arabic words are also compared with every alef after the first letter dropped
+    return word[:1] + word[1:].replace("ا", "")
+
+
+def is_arabic_script(text):
+    return _arabic_script_re.search(text) is not None
+
+
+@lru_cache(maxsize=65536)
+def stem_arabic(word):
+    # Light stemming on a folded word: conjunction, article and common suffixes
+    if len(word) > 3 and word[0] == "و":
+        word = word[1:]
+    for prefix in _ARABIC_PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= 2:
+            word = word[len(prefix):]
+            break
+    for suffix in _ARABIC_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            word = word[:-len(suffix)]
+            break
+    return word
+
+
+def edition_language(store, edition):
+    # Language from the edition metadata, else the identifier prefix ("ur.junagarhi" -> "ur")
+    info = store.edition(edition)
+    return (info or {}).get("language") or edition.split(".")[0]
+
+
+class EditionIndex:
+    def __init__(self, edition, language, ayahs):
+        self.edition = edition
+        self.language = language
+        self.refs = [(surah, ayah) for surah, ayah, _ in ayahs]
+        self.texts = [text for _, _, text in ayahs]
+        self.normalized = [normalize(text) for text in self.texts]
+        self.ngram = language in NGRAM_LANGUAGES
+        if language == "ar":
+            self.stem = stem_arabic
+        elif self.ngram:
+            self.stem = None  # Urdu/Persian: substring matching only
+        else:
+            self.stem = stem_english
+        # Arabic text again with medial alefs dropped from every word, so
+        # spellings with and without the long-vowel alef meet
+        self.skeletons = None
+        if language == "ar":
+            self.skeletons = [" ".join(drop_medial_alef(word) for word in text.split()) for text in self.normalized]
+        self.grams = {}    # trigram -> set of docs (over folded text and skeleton)
+        self.tokens = {}   # folded word -> set of docs
+        self.stems = {}    # stem -> set of docs
+        for doc, text in enumerate(self.normalized):
+            if self.ngram:
+                grams = {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+                if self.skeletons is not None:
+                    skeleton = self.skeletons[doc]
+                    grams.update(skeleton[i:i + NGRAM_SIZE] for i in range(len(skeleton) - NGRAM_SIZE + 1))
+                for gram in grams:
+                    docs = self.grams.get(gram)
+                    if docs is None:
+                        self.grams[gram] = docs = set()
+                    docs.add(doc)
+            for word in set(text.split()):
+                self.tokens.setdefault(word, set()).add(doc)
+                if self.stem:
+                    self.stems.setdefault(self.stem(word), set()).add(doc)
+
+    def __len__(self):
+        return len(self.refs)
+
+    def _substring_docs(self, part, texts):
+        # Docs whose text in `texts` (folded or skeleton) contains `part`
+        if len(part) < NGRAM_SIZE:
+            return {doc for doc, text in enumerate(texts) if part in text}
+        postings = sorted((self.grams.get(part[i:i + NGRAM_SIZE], _EMPTY) for i in range(len(part) - NGRAM_SIZE + 1)),
+                          key=len)
+        candidates = set(postings[0])
+        for docs in postings[1:]:
+            candidates &= docs
+            if not candidates:
+                return candidates
+        return {doc for doc in candidates if part in texts[doc]}
+
+    def _part(self, word):
+        # Substring that counts as a match for a folded query word (ngram
+        # editions); stems shorter than a trigram ("الله" -> "له") match too much
+        stem = self.stem(word) if self.stem else word
+        return stem if len(stem) >= NGRAM_SIZE else word
+
+    def _word_scores(self, word):
+        # doc -> score for one folded query word: 3 whole word, 2 same stem,
+        # 1 inside a word (or matching once alefs are ignored)
+        scores = {}
+        if self.ngram:
+            part = self._part(word)
+            if self.skeletons is not None and len(drop_medial_alef(part)) >= NGRAM_SIZE:
+                for doc in self._substring_docs(drop_medial_alef(part), self.skeletons):
+                    scores[doc] = 1
+            for doc in self._substring_docs(part, self.normalized):
+                scores[doc] = 1
+        if self.stem:
+            for doc in self.stems.get(self.stem(word), ()):
+                scores[doc] = 2
+        for doc in self.tokens.get(word, ()):
+            scores[doc] = 3
+        return scores
+
+    def matcher(self, query):
+        # Predicate telling whether a folded word of an ayah matches the query
+        words = normalize(query).split()
+        if self.ngram:
+            parts = tuple({self._part(word) for word in words})
+            if self.skeletons is None:
+                return lambda token: any(part in token for part in parts)
+            skeleton_parts = tuple({skeleton for skeleton in map(drop_medial_alef, parts) if len(skeleton) >= NGRAM_SIZE})
+            return lambda token: (any(part in token for part in parts)
+                                  or any(part in drop_medial_alef(token) for part in skeleton_parts))
+        stems = {self.stem(word) for word in words}
+        return lambda token: self.stem(token) in stems
+
+    def search(self, query, limit=20, offset=0):
+        # (total matches, [{"surah", "ayah", "reference", "score", "html"}]) for
+        # ayahs matching every query word, best first
+        folded = normalize(query)
+        words = folded.split()
+        if not words:
+            return 0, []
+        scores = None
+        for word in dict.fromkeys(words):
+            word_scores = self._word_scores(word)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {doc: score + word_scores[doc] for doc, score in scores.items() if doc in word_scores}
+            if not scores:
+                return 0, []
+        if len(words) > 1:
+            for doc in scores:
+                if folded in self.normalized[doc]:
+                    scores[doc] += PHRASE_BONUS
+        ranked = sorted(scores, key=lambda doc: (-scores[doc], doc))
+        matches = self.matcher(query)
+        results = []
+        for doc in ranked[offset:offset + limit]:
+            surah, ayah = self.refs[doc]
+            results.append({
+                "surah": surah,
+                "ayah": ayah,
+                "reference": f"{surah}:{ayah}",
+                "score": scores[doc],
+                "html": highlight(self.texts[doc], matches),
+            })
+        return len(ranked), results
+
+
+def highlight(text, matches):
+    # HTML-escaped text with every word the predicate accepts wrapped in <mark>,
+    # including its diacritics and annotation marks
+    folded, offsets = normalize_with_offsets(text)
+    spans = []
+    for word in re.finditer(r"\S+", folded):
+        if matches(word.group()):
+            start = offsets[word.start()]
+            end = offsets[word.end() - 1] + 1
+            # Take in the marks after the last letter (they fold to nothing)
+            while end < len(text) and not _char_fold(text[end]):
+                end += 1
+            spans.append((start, end))
+    pieces = []
+    cursor = 0
+    for start, end in spans:
+        pieces.append(html.escape(text[cursor:start]))
+        pieces.append(f"<mark>{html.escape(text[start:end])}</mark>")
+        cursor = end
+    pieces.append(html.escape(text[cursor:]))
+    return "".join(pieces)
+
+
+# (store path, edition) -> (store revision, EditionIndex), shared across sessions
+_indexes = {}
+_indexes_lock = threading.Lock()
+# (store path, edition) -> lock held while that edition's index is built
+_build_locks = {}
+
+
+def _build_lock(key):
+    with _indexes_lock:
+        return _build_locks.setdefault(key, threading.Lock())
+
+
+def open_index(store, edition):
+    # Index for an imported edition (built on first use and after re-imports), or
+    # None; a build only blocks other callers of the same edition
+    key = (store.path, edition)
+    cached = _indexes.get(key)
+    if cached is not None and cached[0] == store.revision:
+        return cached[1]
+    with _build_lock(key):
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == store.revision:
+            return cached[1]
+        if not store.has_edition(edition):
+            return None
+        revision = store.revision
+        index = EditionIndex(edition, edition_language(store, edition), store.edition_ayahs(edition))
+        with _indexes_lock:
+            _indexes[key] = (revision, index)
+        return index
+
+
+# ---------------------------------------------------------------- CLI
+
+# (query, edition, reference that must be among the matches) over Surah_11_Hud.txt
+CHECK_QUERIES = [
+    ("دابة", "ar", "11:6"),           # written with ta marbuta, no harakat
+    ("دابه", "ar", "11:56"),          # ta marbuta typed as heh
+    ("نوح", "ar", "11:25"),           # نُوحًا with tanween
+    ("الكتاب", "ar", "11:17"),         # article + stem, matched in ٱلْكِتَٰبِ-style spellings
+    ("كتاب", "ar", "11:1"),           # كِتَابٌ
+    ("على الله رزقها", "ar", "11:6"),  # phrase across ۚ-free text
+    ("رحمة", "ar", "11:9"),
+    ("السموات", "ar", "11:7"),        # written السَّمَاوَاتِ
+    ("والا", "ur", "11:2"),           # presentation-form ligature in the source
+    ("hud", "en", "11:50"),
+    ("warners", "en", "11:2"),        # "a warner" via the stemmer
+]
+
+NORMALIZE_CASES = [
+    ("بِسْمِ اللَّهِ الرَّحْمَٰنِ الرَّحِيمِ", "بسم الله الرحمن الرحيم"),
+    ("ٱلْكِتَٰبُ", "الكتب"),  # dagger alef folds away; see drop_medial_alef
+    ("إِنَّ", "ان"),
+    ("عَلَىٰ", "علي"),
+    ("رَحْمَةً", "رحمه"),
+    ("الر ۚ كِتَابٌ", "الر كتاب"),
+    ("مُؤْمِنُونَ", "مومنون"),
+    ("ڈرانے واﻻ", "ڈرانے والا"),
+    ("کی عبادت", "كي عبادت"),
+    ("Abū Hurayrah's", "abu hurayrah s"),
+]
+
+BENCH_QUERIES = {
+    "ar": ["الله", "رحمة", "الكتاب", "نوح", "على الله رزقها", "السموات والأرض", "قوم", "ربي"],
+    "ur": ["اللہ", "عذاب", "قوم", "رحمت", "آسمانوں اور زمین"],
+    "en": ["allah", "mercy", "punishment", "noah", "the heavens and the earth", "messengers", "people"],
+}
+
+
+def check(text_export=os.path.join(os.path.dirname(os.path.abspath(__file__)), "Surah_11_Hud.txt")):
+    # Normalization cases, then searches over Surah Hud imported into a throwaway store
+    import tempfile
+
+    from quran_store import QuranStore, import_text_export
+
+    failures = 0
+    for raw, expected in NORMALIZE_CASES:
+        folded = normalize(raw)
+        ok = folded == expected and normalize_with_offsets(raw)[0] == folded
+        failures += not ok
+        print(f"  normalize {raw!r:<34} -> {folded!r}{'' if ok else f'  MISMATCH, expected {expected!r}'}")
+    # Uthmani spelling (2:2) found with the usual spelling
+    uthmani = EditionIndex("uthmani", "ar", [(2, 2, "ذَٰلِكَ ٱلْكِتَٰبُ لَا رَيْبَ ۛ فِيهِ ۛ هُدًى لِّلْمُتَّقِينَ")])
+    for query in ("الكتاب", "ذلك الكتاب", "للمتقين", "الكتب"):
+        total, results = uthmani.search(query)
+        ok = total == 1 and "<mark>" in results[0]["html"]
+        failures += not ok
+        print(f"  uthmani {query!r:<18} {'found' if ok else 'MISSING'}")
+    with tempfile.TemporaryDirectory() as workdir:
+        store = QuranStore(os.path.join(workdir, "quran.sqlite3"))
+        imported = import_text_export(store, [text_export])
+        editions = {edition_language(store, edition): edition for edition in imported}
+        for query, language, reference in CHECK_QUERIES:
+            index = open_index(store, editions[language])
+            started = time.perf_counter()
+            total, results = index.search(query, limit=len(index))
+            elapsed = time.perf_counter() - started
+            references = [result["reference"] for result in results]
+            ok = reference in references
+            failures += not ok
+            first = next((result for result in results if result["reference"] == reference), None)
+            print(f"  {language} {query!r:<22}{total:>4} matches in {elapsed * 1000:.2f} ms  "
+                  f"{reference} {'found' if ok else 'MISSING'}")
+            if first and "<mark>" not in first["html"]:
+                failures += 1
+                print(f"    no highlight in {first['html'][:120]}")
+        store.connection().close()
+    return failures
+
+
+def synthetic_store(path, text_export):
+    # Full-size corpus (6,236 ayahs in 114 Surahs) from shuffled words of a
+    # real Surah, so query costs reflect real script, diacritics and lengths
+    import random
+
+    from quran_store import AYAH_COUNTS, QuranStore, parse_text_export
+
+    surah = parse_text_export(text_export)[0]
+    rng = random.Random(0)
+    store = QuranStore(path)
+    for kind, identifier, language in (("Arabic", "ar", "ar"), ("English", "en.sahih", "en"),
+                                       ("Urdu", "ur.junagarhi", "ur")):
+        verses = surah[kind]
+        words = " ".join(verses).split()
+        texts = {}
+        for number, count in enumerate(AYAH_COUNTS, 1):
+            texts[number] = [" ".join(rng.choice(words) for _ in range(len(rng.choice(verses).split())))
+                             for _ in range(count)]
+        store.save_edition_text({"identifier": identifier, "language": language, "format": "text"}, texts)
+    return store
+
+
+def benchmark(store, editions, rounds=20):
+    # Build time per edition and query latencies (ms) over BENCH_QUERIES
+    report = []
+    for edition in editions:
+        started = time.perf_counter()
+        with _indexes_lock:
+            _indexes.pop((store.path, edition), None)
+        index = open_index(store, edition)
+        if index is None:
+            continue
+        built = time.perf_counter() - started
+        queries = BENCH_QUERIES.get(index.language, BENCH_QUERIES["en"])
+        latencies = []
+        totals = {}
+        for _ in range(rounds):
+            for query in queries:
+                started = time.perf_counter()
+                totals[query] = index.search(query)[0]
+                latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        report.append((edition, len(index), built, statistics.median(latencies),
+                       statistics.quantiles(latencies, n=100)[94], latencies[-1], totals))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check, benchmark and query the Quran search index.")
+    parser.add_argument("command", choices=["check", "bench", "query"])
+    parser.add_argument("query", nargs="?", default="")
+    parser.add_argument("--db", default=config.QURAN_DB_PATH)
+    parser.add_argument("--edition", help="query: edition to search (default ar or en.sahih by script)")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="bench: full-size corpus built from Surah_11_Hud.txt instead of --db")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        failures = check()
+        print("All checks passed" if not failures else f"{failures} check(s) failed")
+        return 1 if failures else 0
+
+    if args.command == "bench":
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as workdir:
+            if args.synthetic:
+                text_export = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Surah_11_Hud.txt")
+                store = synthetic_store(os.path.join(workdir, "quran.sqlite3"), text_export)
+            else:
+                store = open_store(args.db)
+            for edition, ayahs, built, p50, p95, worst, totals in benchmark(store, sorted(store.imported_editions())):
+                print(f"{edition:<16}{ayahs:>6} ayahs  index built in {built * 1000:.0f} ms  "
+                      f"query p50 {p50:.2f} ms  p95 {p95:.2f} ms  max {worst:.2f} ms")
+                for query, total in totals.items():
+                    print(f"    {query!r:<32}{total:>6} matches")
+            store.connection().close()
+        return 0
+
+    store = open_store(args.db)
+    edition = args.edition or ("ar" if is_arabic_script(args.query) else "en.sahih")
+    index = open_index(store, edition)
+    if index is None:
+        print(f"{edition} is not imported; see quran_store.py import-api / import-text")
+        return 1
+    started = time.perf_counter()
+    total, results = index.search(args.query, limit=args.limit)
+    print(f"{total} matches in {edition} ({(time.perf_counter() - started) * 1000:.2f} ms)")
+    for result in results:
+        print(f"  [{result['reference']}] {re.sub(r'</?mark>', '*', result['html'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,402 @@
+# quran_store.py
+# Local Quran corpus kept in SQLite. Editions are imported once (from the
+# alquran.cloud API or from text exports such as Surah_11_Hud.txt) and then
+# read from disk, with an in-process cache so repeated reads of a Surah are
+# dictionary lookups. The Surahs each edition holds are tracked, and any Surah
+# not imported falls back to the API. A revision counter in the database
+# drops the cache when another process (the import CLI) changes the store.
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+import config
+import http_client
+import instrumentation
+
+QURAN_API = os.environ.get("DEEN_QURAN_API", "http://api.alquran.cloud/v1")
+# Quran text and metadata don't change, so API responses are cached for a day
+QURAN_CACHE_TTL = 24 * 3600
+
+# Edition identifiers the text exports' "Arabic:"/"English:" lines belong to
+TEXT_EXPORT_ARABIC_EDITION = "ar"
+TEXT_EXPORT_ENGLISH_EDITION = "en.sahih"
+TEXT_EXPORT_URDU_EDITION = "ur.junagarhi"
+
+# Ayahs per Surah (6,236 in all); sizes the synthetic corpora of the benchmarks
+AYAH_COUNTS = (
+    7, 286, 200, 176, 120, 165, 206, 75, 129, 109, 123, 111, 43, 52, 99, 128, 111, 110, 98, 135,
+    112, 78, 118, 64, 77, 227, 93, 88, 69, 60, 34, 30, 73, 54, 45, 83, 182, 88, 75, 85,
+    54, 53, 89, 59, 37, 35, 38, 29, 18, 45, 60, 49, 62, 55, 78, 96, 29, 22, 24, 13,
+    14, 11, 11, 18, 12, 12, 30, 52, 52, 44, 28, 28, 20, 56, 40, 31, 50, 40, 46, 42,
+    29, 19, 36, 25, 22, 17, 19, 26, 30, 20, 15, 21, 11, 8, 8, 19, 5, 8, 8, 11,
+    11, 8, 3, 9, 5, 4, 7, 3, 6, 3, 5, 4, 5, 6,
+)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS editions (
+    identifier TEXT PRIMARY KEY,
+    name TEXT,
+    englishName TEXT,
+    language TEXT,
+    format TEXT,
+    type TEXT,
+    direction TEXT,
+    imported INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS surahs (
+    number INTEGER PRIMARY KEY,
+    name TEXT,
+    englishName TEXT,
+    englishNameTranslation TEXT,
+    numberOfAyahs INTEGER,
+    revelationType TEXT
+);
+CREATE TABLE IF NOT EXISTS ayahs (
+    edition TEXT NOT NULL,
+    surah INTEGER NOT NULL,
+    ayah INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (edition, surah, ayah)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS edition_lists (
+    language TEXT PRIMARY KEY,
+    identifiers TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS edition_surahs (
+    edition TEXT NOT NULL,
+    surah INTEGER NOT NULL,
+    PRIMARY KEY (edition, surah)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS store_info (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+EDITION_FIELDS = ("identifier", "name", "englishName", "language", "format", "type", "direction")
+SURAH_FIELDS = ("number", "name", "englishName", "englishNameTranslation", "numberOfAyahs", "revelationType")
+
+
+class QuranStore:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (revision on disk, {(edition, surah): tuple of verse texts}, {edition: frozenset of Surahs});
+        # replaced as a whole when the store changes on disk
+        self._state = (None, {}, {})
+        connection = self.connection()
+        with connection:
+            connection.executescript(SCHEMA)
+            if connection.execute("INSERT OR IGNORE INTO store_info (key, value) VALUES ('revision', 0)").rowcount:
+                # Stores written before Surahs were tracked per edition
+                connection.execute("INSERT OR IGNORE INTO edition_surahs (edition, surah) "
+                                   "SELECT DISTINCT edition, surah FROM ayahs")
+
+    def connection(self):
+        # SQLite connections are per thread; Streamlit runs sessions on several
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            self._local.connection = connection
+        return connection
+
+    # ------------------------------------------------------------ reading
+
+    def _current(self):
+        # Cached state for the store as it is on disk now. Imports run from the
+        # CLI while the app is up bump the revision, which drops the caches.
+        revision = self.connection().execute("SELECT value FROM store_info WHERE key = 'revision'").fetchone()[0]
+        state = self._state
+        if state[0] != revision:
+            surahs = {}
+            for edition, surah_number in self.connection().execute("SELECT edition, surah FROM edition_surahs"):
+                surahs.setdefault(edition, set()).add(surah_number)
+            state = (revision, {}, {edition: frozenset(numbers) for edition, numbers in surahs.items()})
+            with self._lock:
+                self._state = state
+        return state
+
+    @property
+    def revision(self):
+        # Changes whenever an edition's text is replaced, so derived indexes can tell
+        return self._current()[0]
+
+    def imported_editions(self):
+        # Editions with at least one Surah in the store
+        return set(self._current()[2])
+
+    def imported_surahs(self, identifier):
+        return self._current()[2].get(identifier, frozenset())
+
+    def has_edition(self, identifier):
+        return bool(self.imported_surahs(identifier))
+
+    def surah_texts(self, surah_number, edition):
+        # Tuple of verse texts, or None if this Surah of the edition has not been imported
+        key = (edition, surah_number)
+        _, verses, surahs = self._current()
+        texts = verses.get(key)
+        if texts is not None:
+            instrumentation.count("quran_store.hits")
+            return texts
+        if surah_number not in surahs.get(edition, ()):
+            instrumentation.count("quran_store.misses")
+            return None
+        rows = self.connection().execute(
+            "SELECT text FROM ayahs WHERE edition = ? AND surah = ? ORDER BY ayah", (edition, surah_number))
+        texts = tuple(row[0] for row in rows)
+        # Into the cache of the revision the Surah list came from, so a read
+        # racing an import can't leave old text in the new cache
+        verses[key] = texts
+        instrumentation.count("quran_store.hits")
+        return texts
+
+    def edition_ayahs(self, edition):
+        # [(surah, ayah, text)] for a whole imported edition, in Quran order
+        return self.connection().execute(
+            "SELECT surah, ayah, text FROM ayahs WHERE edition = ? ORDER BY surah, ayah", (edition,)).fetchall()
+
+    def edition(self, identifier):
+        row = self.connection().execute(
+            f"SELECT {', '.join(EDITION_FIELDS)} FROM editions WHERE identifier = ?", (identifier,)).fetchone()
+        return dict(zip(EDITION_FIELDS, row)) if row else None
+
+    def surahs(self):
+        # Surah metadata in the same shape as the API's /surah response
+        rows = self.connection().execute(f"SELECT {', '.join(SURAH_FIELDS)} FROM surahs ORDER BY number").fetchall()
+        if len(rows) < 114:
+            return None
+        return [dict(zip(SURAH_FIELDS, row)) for row in rows]
+
+    def editions(self, language):
+        # Edition metadata for a language, as the API's /edition?language= lists it
+        row = self.connection().execute(
+            "SELECT identifiers FROM edition_lists WHERE language = ?", (language,)).fetchone()
+        if row is None:
+            return None
+        identifiers = json.loads(row[0])
+        by_id = {}
+        query = f"SELECT {', '.join(EDITION_FIELDS)} FROM editions WHERE language = ?"
+        for values in self.connection().execute(query, (language,)):
+            by_id[values[0]] = dict(zip(EDITION_FIELDS, values))
+        return [by_id[identifier] for identifier in identifiers if identifier in by_id]
+
+    # ------------------------------------------------------------ writing
+
+    def save_editions(self, language, editions):
+        connection = self.connection()
+        with self._lock, connection:
+            for edition in editions:
+                self._upsert_edition(connection, edition)
+            connection.execute(
+                "INSERT OR REPLACE INTO edition_lists (language, identifiers) VALUES (?, ?)",
+                (language, json.dumps([edition["identifier"] for edition in editions])))
+
+    def save_surahs(self, surahs):
+        connection = self.connection()
+        with self._lock, connection:
+            for surah in surahs:
+                self._upsert_surah(connection, surah)
+
+    def save_edition_text(self, edition, surahs):
+        # Replace an edition's text: edition metadata and {surah number: [verse texts]}.
+        # Only the Surahs given are recorded as imported; imported = 1 marks a complete edition.
+        identifier = edition["identifier"]
+        surahs = {surah_number: texts for surah_number, texts in surahs.items() if texts}
+        connection = self.connection()
+        with self._lock, connection:
+            self._upsert_edition(connection, edition)
+            connection.execute("DELETE FROM ayahs WHERE edition = ?", (identifier,))
+            connection.executemany(
+                "INSERT INTO ayahs (edition, surah, ayah, text) VALUES (?, ?, ?, ?)",
+                ((identifier, surah_number, ayah, text)
+                 for surah_number, texts in surahs.items()
+                 for ayah, text in enumerate(texts, 1)))
+            connection.execute("DELETE FROM edition_surahs WHERE edition = ?", (identifier,))
+            connection.executemany("INSERT INTO edition_surahs (edition, surah) VALUES (?, ?)",
+                                   ((identifier, surah_number) for surah_number in surahs))
+            connection.execute("UPDATE editions SET imported = ? WHERE identifier = ?",
+                               (int(len(surahs) == len(AYAH_COUNTS)), identifier))
+            connection.execute("UPDATE store_info SET value = value + 1 WHERE key = 'revision'")
+
+    def _upsert_edition(self, connection, edition):
+        connection.execute(
+            f"INSERT INTO editions ({', '.join(EDITION_FIELDS)}) VALUES ({', '.join('?' * len(EDITION_FIELDS))}) "
+            "ON CONFLICT(identifier) DO UPDATE SET "
+            + ", ".join(f"{field} = COALESCE(excluded.{field}, {field})" for field in EDITION_FIELDS[1:]),
+            tuple(edition.get(field) for field in EDITION_FIELDS))
+
+    def _upsert_surah(self, connection, surah):
+        connection.execute(
+            f"INSERT INTO surahs ({', '.join(SURAH_FIELDS)}) VALUES ({', '.join('?' * len(SURAH_FIELDS))}) "
+            "ON CONFLICT(number) DO UPDATE SET "
+            + ", ".join(f"{field} = COALESCE(excluded.{field}, {field})" for field in SURAH_FIELDS[1:]),
+            tuple(surah.get(field) for field in SURAH_FIELDS))
+
+
+# path -> QuranStore, shared across sessions
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path=None):
+    # The app's store (config.QURAN_DB_PATH) unless another path is given
+    path = path or config.QURAN_DB_PATH
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = QuranStore(path)
+        return store
+
+
+# ---------------------------------------------------------------- network
+
+def fetch_json(url, ttl=QURAN_CACHE_TTL):
+    data = http_client.get_json(url, ttl=ttl, stale_ttl=ttl)
+    if data.get("code") != 200:
+        raise ValueError(f"{url} returned {data.get('code')}: {data.get('data')}")
+    return data["data"]
+
+
+def fetch_surah_texts(surah_number, edition, api=QURAN_API):
+    # Network fallback for editions that are not in the store
+    return tuple(ayah["text"] for ayah in fetch_json(f"{api}/surah/{surah_number}/{edition}")["ayahs"])
+
+
+def import_edition_from_api(store, edition, api=QURAN_API):
+    # One /quran/{edition} call returns the whole edition
+    # Not worth caching: the edition goes straight into the store
+    data = fetch_json(f"{api}/quran/{edition}", ttl=0)
+    surahs = {surah["number"]: [ayah["text"] for ayah in surah["ayahs"]] for surah in data["surahs"]}
+    store.save_surahs([{field: surah.get(field) for field in SURAH_FIELDS} for surah in data["surahs"]])
+    store.save_edition_text(data["edition"], surahs)
+    return sum(len(texts) for texts in surahs.values())
+
+
+def import_metadata_from_api(store, languages=("ur",), api=QURAN_API):
+    store.save_surahs(fetch_json(f"{api}/surah"))
+    for language in languages:
+        store.save_editions(language, fetch_json(f"{api}/edition?language={language}"))
+
+
+# ---------------------------------------------------------------- text exports
+
+_surah_heading_re = re.compile(r"^Surah (\d+)\. (.+?)(?: \((.+)\))?$")
+_verse_heading_re = re.compile(r"^Verse (\d+):$")
+_line_re = re.compile(r"^(Arabic|English|Urdu)(?: \((.+?)\))?: (.*)$")
+
+
+def parse_text_export(path):
+    # Parse the app's "Download Surah" text format into
+    # [{"number", "englishName", "name", "urdu_name", "Arabic": [...], "English": [...], "Urdu": [...]}]
+    surahs = []
+    current = None
+    with open(path, "r", encoding="utf-8") as file:
+        for raw_line in file:
+            line = raw_line.strip()
+            heading = _surah_heading_re.match(line)
+            if heading:
+                current = {"number": int(heading.group(1)), "englishName": heading.group(2),
+                           "name": heading.group(3), "urdu_name": None, "Arabic": [], "English": [], "Urdu": []}
+                surahs.append(current)
+                continue
+            match = _line_re.match(line)
+            if match and current is not None:
+                kind, label, text = match.groups()
+                current[kind].append(text)
+                if kind == "Urdu" and label:
+                    current["urdu_name"] = label
+    return surahs
+
+
+def import_text_export(store, paths, arabic_edition=TEXT_EXPORT_ARABIC_EDITION,
+                       english_edition=TEXT_EXPORT_ENGLISH_EDITION, urdu_edition=TEXT_EXPORT_URDU_EDITION):
+    # Text exports hold a few Surahs each, so editions are merged across files
+    editions = {
+        "Arabic": ({"identifier": arabic_edition, "language": "ar", "format": "text", "type": "quran", "direction": "rtl"}, {}),
+        "English": ({"identifier": english_edition, "language": "en", "format": "text", "type": "translation", "direction": "ltr"}, {}),
+        "Urdu": ({"identifier": urdu_edition, "language": "ur", "format": "text", "type": "translation", "direction": "rtl"}, {}),
+    }
+    for path in paths:
+        for surah in parse_text_export(path):
+            store.save_surahs([{"number": surah["number"], "englishName": surah["englishName"],
+                                "name": surah["name"], "numberOfAyahs": len(surah["Arabic"])}])
+            for kind, (edition, texts) in editions.items():
+                if surah[kind]:
+                    texts[surah["number"]] = surah[kind]
+            if surah["urdu_name"]:
+                editions["Urdu"][0]["name"] = surah["urdu_name"]
+
+    imported = {}
+    for edition, texts in editions.values():
+        if not texts:
+            continue
+        # Keep Surahs imported earlier for this edition
+        for surah_number in range(1, 115):
+            if surah_number not in texts:
+                existing = store.surah_texts(surah_number, edition["identifier"])
+                if existing:
+                    texts[surah_number] = list(existing)
+        store.save_edition_text(edition, texts)
+        imported[edition["identifier"]] = sum(len(verses) for verses in texts.values())
+    return imported
+
+
+# ---------------------------------------------------------------- CLI
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import Quran editions into the local store.")
+    parser.add_argument("--db", default=config.QURAN_DB_PATH, help="store to fill (default: the app's, under DEEN_DATA_DIR)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    api_parser = subparsers.add_parser("import-api", help="import editions from the alquran.cloud API")
+    api_parser.add_argument("editions", nargs="+")
+    api_parser.add_argument("--api", default=QURAN_API)
+    api_parser.add_argument("--languages", nargs="*", default=["ur"], help="edition lists to cache")
+
+    text_parser = subparsers.add_parser("import-text", help="import Surah text exports")
+    text_parser.add_argument("paths", nargs="+")
+    text_parser.add_argument("--arabic-edition", default=TEXT_EXPORT_ARABIC_EDITION)
+    text_parser.add_argument("--english-edition", default=TEXT_EXPORT_ENGLISH_EDITION)
+    text_parser.add_argument("--urdu-edition", default=TEXT_EXPORT_URDU_EDITION)
+
+    subparsers.add_parser("status", help="list imported editions and read latency")
+    args = parser.parse_args(argv)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    store = open_store(args.db)
+    if args.command == "import-api":
+        import_metadata_from_api(store, args.languages, args.api)
+        for edition in args.editions:
+            started = time.perf_counter()
+            count = import_edition_from_api(store, edition, args.api)
+            print(f"Imported {edition}: {count} verses in {time.perf_counter() - started:.2f}s")
+    elif args.command == "import-text":
+        imported = import_text_export(store, args.paths, args.arabic_edition, args.english_edition, args.urdu_edition)
+        for edition, count in imported.items():
+            print(f"Imported {edition}: {count} verses")
+    else:
+        editions = sorted(store.imported_editions())
+        print(f"Store: {args.db}")
+        print(f"Surah list cached: {'yes' if store.surahs() else 'no'}")
+        for edition in editions:
+            count = store.connection().execute("SELECT COUNT(*) FROM ayahs WHERE edition = ?", (edition,)).fetchone()[0]
+            surah_numbers = store.imported_surahs(edition)
+            surah_number = min(surah_numbers)
+            started = time.perf_counter()
+            store.surah_texts(surah_number, edition)
+            cold = time.perf_counter() - started
+            started = time.perf_counter()
+            store.surah_texts(surah_number, edition)
+            warm = time.perf_counter() - started
+            print(f"  {edition:<16}{count:>6} verses in {len(surah_numbers):>3} Surahs  read Surah {surah_number}: "
+                  f"{cold * 1e6:.0f} us cold, {warm * 1e6:.1f} us cached")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
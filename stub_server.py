@@ -0,0 +1,204 @@
+# stub_server.py
+# Small local HTTP stub of the upstream APIs the app talks to, so imports and
+# page flows can be exercised without network access. Quran data is served
+# from the app's own text exports (e.g. Surah_11_Hud.txt), Sunnah.com pages
+# from saved HTML fixtures (fixtures/sunnah/<collection>_<number>.html).
+#
+#   python stub_server.py --quran-text Surah_11_Hud.txt --port 8765
+#   python quran_store.py import-api en.sahih --api http://127.0.0.1:8765/v1
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from quran_store import (
+    TEXT_EXPORT_ARABIC_EDITION,
+    TEXT_EXPORT_ENGLISH_EDITION,
+    TEXT_EXPORT_URDU_EDITION,
+    parse_text_export,
+)
+
+
+def api_response(data, code=200, status="OK"):
+    return code, {"code": code, "status": status, "data": data}
+
+
+def not_found(message="Not found"):
+    return api_response(message, 404, "NOT FOUND")
+
+
+class QuranStubData:
+    # Editions and Surahs parsed from text exports, shaped like alquran.cloud
+    def __init__(self, text_paths=(), urdu_edition=TEXT_EXPORT_URDU_EDITION):
+        self.editions = {
+            TEXT_EXPORT_ARABIC_EDITION: {"identifier": TEXT_EXPORT_ARABIC_EDITION, "language": "ar", "name": "القرآن الكريم",
+                                         "englishName": "Quran", "format": "text", "type": "quran", "direction": "rtl"},
+            TEXT_EXPORT_ENGLISH_EDITION: {"identifier": TEXT_EXPORT_ENGLISH_EDITION, "language": "en", "name": "Saheeh International",
+                                          "englishName": "Saheeh International", "format": "text", "type": "translation", "direction": "ltr"},
+            urdu_edition: {"identifier": urdu_edition, "language": "ur", "name": "جوناگڑھی",
+                           "englishName": "Muhammad Junagarhi", "format": "text", "type": "translation", "direction": "rtl"},
+        }
+        self.surahs = {}
+        # (edition, surah number) -> [verse texts]
+        self.texts = {}
+        for path in text_paths:
+            for surah in parse_text_export(path):
+                self.surahs[surah["number"]] = {
+                    "number": surah["number"], "name": surah["name"], "englishName": surah["englishName"],
+                    "englishNameTranslation": surah["englishName"], "numberOfAyahs": len(surah["Arabic"]),
+                    "revelationType": "Meccan",
+                }
+                self.texts[(TEXT_EXPORT_ARABIC_EDITION, surah["number"])] = surah["Arabic"]
+                self.texts[(TEXT_EXPORT_ENGLISH_EDITION, surah["number"])] = surah["English"]
+                self.texts[(urdu_edition, surah["number"])] = surah["Urdu"]
+                if surah["urdu_name"]:
+                    self.editions[urdu_edition]["name"] = surah["urdu_name"]
+
+    def surah_payload(self, number, edition):
+        texts = self.texts.get((edition, number))
+        if texts is None:
+            return None
+        payload = dict(self.surahs[number])
+        payload["ayahs"] = [{"number": i, "text": text, "numberInSurah": i} for i, text in enumerate(texts, 1)]
+        payload["edition"] = self.editions[edition]
+        return payload
+
+    def routes(self):
+        return [
+            (r"/v1/surah", self.surah_list),
+            (r"/v1/edition", self.edition_list),
+            (r"/v1/surah/(\d+)/([\w.-]+)", self.surah),
+            (r"/v1/quran/([\w.-]+)", self.quran),
+        ]
+
+    def surah_list(self, query):
+        return api_response([self.surahs[number] for number in sorted(self.surahs)])
+
+    def edition_list(self, query):
+        language = query.get("language", [None])[0]
+        return api_response([e for e in self.editions.values() if language in (None, e["language"])])
+
+    def surah(self, query, number, edition):
+        payload = self.surah_payload(int(number), edition)
+        return api_response(payload) if payload else not_found(f"Surah {number} not available for {edition}")
+
+    def quran(self, query, edition):
+        if edition not in self.editions:
+            return not_found(f"Unknown edition {edition}")
+        surahs = [self.surah_payload(number, edition) for number in sorted(self.surahs)]
+        surahs = [surah for surah in surahs if surah]
+        for surah in surahs:
+            del surah["edition"]
+        return api_response({"surahs": surahs, "edition": self.editions[edition]})
+
+
+class SunnahStubData:
+    # Sunnah.com hadith pages served from saved HTML files
+    def __init__(self, fixtures_dir):
+        self.fixtures_dir = fixtures_dir
+
+    def routes(self):
+        return [(r"/(\w+):(\w+)", self.hadith_page)]
+
+    def hadith_page(self, query, collection, number):
+        path = os.path.join(self.fixtures_dir, f"{collection}_{number}.html")
+        if not os.path.exists(path):
+            return 404, "<html><body><h1>Page not found</h1></body></html>"
+        with open(path, "r", encoding="utf-8") as file:
+            return 200, file.read()
+
+
+class StubServer:
+    # Threaded HTTP server dispatching on path regexes; counts requests served
+    def __init__(self, routes, host="127.0.0.1", port=0):
+        self.routes = [(re.compile(pattern + r"/?$"), handler) for pattern, handler in routes]
+        self.request_count = 0
+        self.request_log = []
+        self._count_lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handle(self, request):
+        with self._count_lock:
+            self.request_count += 1
+            self.request_log.append(request.path)
+        url = urlparse(request.path)
+        query = parse_qs(url.query)
+        for pattern, handler in self.routes:
+            match = pattern.match(url.path)
+            if match:
+                status, body = handler(query, *match.groups())
+                break
+        else:
+            status, body = not_found(f"No stub route for {url.path}")
+        if isinstance(body, (dict, list)):
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        else:
+            payload = body.encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+        # ETags let clients revalidate instead of downloading again
+        etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+        if status == 200 and request.headers.get("If-None-Match") == etag:
+            request.send_response(304)
+            request.send_header("ETag", etag)
+            request.end_headers()
+            return
+        request.send_response(status)
+        request.send_header("ETag", etag)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve local stubs of the upstream APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--quran-text", nargs="*", default=["Surah_11_Hud.txt"], help="Surah text exports to serve")
+    parser.add_argument("--sunnah-fixtures", default=os.path.join("fixtures", "sunnah"),
+                        help="directory of saved Sunnah.com hadith pages")
+    args = parser.parse_args(argv)
+
+    routes = QuranStubData(args.quran_text).routes() + SunnahStubData(args.sunnah_fixtures).routes()
+    server = StubServer(routes, args.host, args.port)
+    print(f"Serving stubs on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+# sunnah_fetcher.py
+# Sunnah.com lookups backed by a local store. Pages are parsed with a small
+# streaming parser that only looks inside the first "mainContainer" block and
+# stops as soon as it closes, instead of building a full BeautifulSoup tree.
+# Parsed hadith are kept in SQLite keyed by (collection, number), so repeated
+# lookups never touch the network; number ranges can be prefetched in bulk
+# with bounded concurrency and a request rate limit. Only a 404 is stored as
+# "no hadith", and only for NEGATIVE_TTL; a 200 page without a hadith (a
+# challenge page, a layout change) is an error and is never stored.
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+
+import config
+import http_client
+import instrumentation
+
+SUNNAH_URL = os.environ.get("DEEN_SUNNAH_URL", "https://sunnah.com")
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sunnah")
+
+# Store column -> CSS class of the div holding it on a hadith page
+HADITH_FIELD_CLASSES = {
+    "book_name": "book_page_english_name",
+    "chapter_name": "englishchapter",
+    "narrator": "hadith_narrated",
+    "text": "text_details",
+    "reference": "hadith_reference_sticky",
+}
+HADITH_FIELD_DEFAULTS = {
+    "book_name": "Unknown",
+    "chapter_name": "Unknown",
+    "narrator": "Unknown",
+    "text": "No text available",
+    "reference": "No reference",
+}
+# Labels the page shows for each field
+HADITH_FIELD_LABELS = {
+    "book_name": "Book Name",
+    "chapter_name": "Chapter Name",
+    "narrator": "Narrated By",
+    "text": "Hadith",
+    "reference": "Reference",
+}
+
+PREFETCH_WORKERS = 4
+REQUESTS_PER_SECOND = 2.0
+PARSE_CHUNK_SIZE = 16384
+NEGATIVE_TTL = 7 * 24 * 3600  # seconds a 404 is trusted before asking again
+
+
+class HadithPageParser(HTMLParser):
+    # Collects the hadith fields from the first mainContainer block only
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.fields = {}
+        self.found_container = False
+        self.done = False
+        self._depth = 0           # div depth inside mainContainer
+        self._capture = None      # field being captured
+        self._capture_depth = 0   # div depth where the capture started
+        self._parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.done or tag != "div":
+            return
+        classes = (dict(attrs).get("class") or "").split()
+        if not self.found_container:
+            if "mainContainer" in classes:
+                self.found_container = True
+                self._depth = 1
+            return
+        self._depth += 1
+        if self._capture is None:
+            for field, css_class in HADITH_FIELD_CLASSES.items():
+                if css_class in classes and field not in self.fields:
+                    self._capture = field
+                    self._capture_depth = self._depth
+                    self._parts = []
+                    break
+
+    def handle_endtag(self, tag):
+        if self.done or tag != "div" or not self.found_container:
+            return
+        if self._capture is not None and self._depth == self._capture_depth:
+            self.fields[self._capture] = "".join(self._parts).strip()
+            self._capture = None
+        self._depth -= 1
+        if self._depth == 0:
+            self.done = True
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._parts.append(data)
+
+
+def parse_hadith_page(html):
+    # Dict of HADITH_FIELD_CLASSES fields, or None if the page has no hadith
+    parser = HadithPageParser()
+    for start in range(0, len(html), PARSE_CHUNK_SIZE):
+        parser.feed(html[start:start + PARSE_CHUNK_SIZE])
+        if parser.done:
+            break
+    if not parser.found_container:
+        return None
+    return {field: parser.fields.get(field) or default for field, default in HADITH_FIELD_DEFAULTS.items()}
+
+
+class RateLimiter:
+    # Spaces calls at least 1/rate seconds apart across all threads
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class SunnahStore:
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS hadiths (
+        collection TEXT NOT NULL,
+        number TEXT NOT NULL,
+        found INTEGER NOT NULL,
+        book_name TEXT,
+        chapter_name TEXT,
+        narrator TEXT,
+        text TEXT,
+        reference TEXT,
+        fetched_at REAL NOT NULL,
+        PRIMARY KEY (collection, number)
+    ) WITHOUT ROWID;
+    """
+    FIELDS = tuple(HADITH_FIELD_CLASSES)
+
+    def __init__(self, path, negative_ttl=NEGATIVE_TTL):
+        self.path = path
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.connection().executescript(self.SCHEMA)
+
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            self._local.connection = connection
+        return connection
+
+    def get(self, collection, number):
+        # (found, fields) if the hadith was looked up before, else None; a
+        # "no hadith" answer older than negative_ttl counts as not looked up
+        row = self.connection().execute(
+            f"SELECT found, fetched_at, {', '.join(self.FIELDS)} FROM hadiths WHERE collection = ? AND number = ?",
+            (collection, str(number))).fetchone()
+        if row is None:
+            return None
+        if not row[0]:
+            return None if time.time() - row[1] > self.negative_ttl else (False, None)
+        return True, dict(zip(self.FIELDS, row[2:]))
+
+    def put(self, collection, number, fields):
+        # fields=None records that Sunnah.com has no such page (a 404)
+        values = [fields.get(field) for field in self.FIELDS] if fields else [None] * len(self.FIELDS)
+        connection = self.connection()
+        with self._write_lock, connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO hadiths (collection, number, found, {', '.join(self.FIELDS)}, fetched_at) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(self.FIELDS))}, ?)",
+                [collection, str(number), 1 if fields else 0, *values, time.time()])
+
+    def count(self, collection=None):
+        if collection:
+            return self.connection().execute(
+                "SELECT COUNT(*) FROM hadiths WHERE collection = ? AND found = 1", (collection,)).fetchone()[0]
+        return self.connection().execute("SELECT COUNT(*) FROM hadiths WHERE found = 1").fetchone()[0]
+
+
+class SunnahFetcher:
+    def __init__(self, store, base_url=SUNNAH_URL, rate=REQUESTS_PER_SECOND, workers=PREFETCH_WORKERS):
+        self.store = store
+        self.base_url = base_url
+        self.workers = workers
+        self.rate_limiter = RateLimiter(rate)
+
+    def fetch(self, collection, number):
+        # Download and parse one page, bypassing the store; None only for a 404
+        self.rate_limiter.wait()
+        url = f"{self.base_url}/{collection}:{number}"
+        response = http_client.get(url, ttl=0)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        fields = parse_hadith_page(response.text)
+        if fields is None:
+            raise ValueError(f"{url} returned a page without a hadith")
+        return fields
+
+    def get(self, collection, number, refresh=False):
+        # Hadith fields for (collection, number), or None if there is none
+        if not refresh:
+            cached = self.store.get(collection, number)
+            if cached is not None:
+                instrumentation.count("sunnah_store.hits")
+                return cached[1]
+        instrumentation.count("sunnah_store.misses")
+        fields = self.fetch(collection, number)
+        self.store.put(collection, number, fields)
+        return fields
+
+    def prefetch(self, collection, numbers, refresh=False, progress=None):
+        # Fill the store for many numbers; returns {"fetched", "cached", "missing", "errors"}
+        numbers = [str(number) for number in numbers]
+        pending = numbers if refresh else [n for n in numbers if self.store.get(collection, n) is None]
+        summary = {"fetched": 0, "cached": len(numbers) - len(pending), "missing": 0, "errors": []}
+
+        def work(number):
+            fields = self.fetch(collection, number)
+            self.store.put(collection, number, fields)
+            return fields
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [(number, pool.submit(work, number)) for number in pending]
+            for done, (number, future) in enumerate(futures, 1):
+                try:
+                    if future.result() is None:
+                        summary["missing"] += 1
+                    else:
+                        summary["fetched"] += 1
+                except Exception as e:
+                    summary["errors"].append((number, str(e)))
+                if progress:
+                    progress(done, len(futures))
+        return summary
+
+
+# path -> SunnahFetcher, shared across sessions
+_fetchers = {}
+_fetchers_lock = threading.Lock()
+
+
+def open_fetcher(path=None, base_url=SUNNAH_URL):
+    # Fetcher over the app's store (config.SUNNAH_DB_PATH) unless another path is given
+    path = path or config.SUNNAH_DB_PATH
+    with _fetchers_lock:
+        fetcher = _fetchers.get((path, base_url))
+        if fetcher is None:
+            fetcher = _fetchers[(path, base_url)] = SunnahFetcher(SunnahStore(path), base_url)
+        return fetcher
+
+
+# ---------------------------------------------------------------- CLI
+
+def check(fixtures_dir=FIXTURES_DIR):
+    # Fetch every saved fixture through the local stub and compare fields
+    import tempfile
+
+    from stub_server import StubServer, SunnahStubData
+
+    with open(os.path.join(fixtures_dir, "expected.json"), "r", encoding="utf-8") as file:
+        expected = json.load(file)
+    server = StubServer(SunnahStubData(fixtures_dir).routes()).start()
+    failures = 0
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            fetcher = SunnahFetcher(SunnahStore(os.path.join(workdir, "sunnah.sqlite3")), server.base_url, rate=0)
+            for key, fields in expected.items():
+                collection, number = key.split(":")
+                started = time.perf_counter()
+                parsed = fetcher.get(collection, number)
+                remote = time.perf_counter() - started
+                started = time.perf_counter()
+                fetcher.get(collection, number)
+                local = time.perf_counter() - started
+                ok = parsed == fields
+                failures += not ok
+                print(f"  {key:<14}{'ok' if ok else 'MISMATCH'}  first {remote * 1000:.1f} ms, repeat {local * 1000:.2f} ms")
+                if not ok:
+                    print(f"    expected {fields}\n    parsed   {parsed}")
+            missing = fetcher.get("muslim", "999999")
+            print(f"  missing page -> {missing}")
+            failures += missing is not None
+            requests_before = server.request_count
+            summary = fetcher.prefetch("muslim", ["1", "2", "3"])
+            print(f"  prefetch muslim 1-3: {summary}, {server.request_count - requests_before} requests")
+    finally:
+        server.stop()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefetch and inspect Sunnah.com hadith in the local store.")
+    parser.add_argument("--db", default=config.SUNNAH_DB_PATH, help="store to fill (default: the app's, under DEEN_DATA_DIR)")
+    parser.add_argument("--base-url", default=SUNNAH_URL)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prefetch_parser = subparsers.add_parser("prefetch", help="fetch a range of hadith numbers")
+    prefetch_parser.add_argument("collection")
+    prefetch_parser.add_argument("first", type=int)
+    prefetch_parser.add_argument("last", type=int)
+    prefetch_parser.add_argument("--workers", type=int, default=PREFETCH_WORKERS)
+    prefetch_parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help="requests per second")
+    prefetch_parser.add_argument("--refresh", action="store_true")
+    subparsers.add_parser("check", help="parse the saved HTML fixtures through the local stub server")
+    args = parser.parse_args(argv)
+
+    if args.command == "check":
+        return 1 if check() else 0
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+    fetcher = SunnahFetcher(SunnahStore(args.db), args.base_url, args.rate, args.workers)
+    started = time.perf_counter()
+    summary = fetcher.prefetch(args.collection, range(args.first, args.last + 1), args.refresh,
+                               progress=lambda done, total: print(f"\r{done}/{total}", end="", flush=True))
+    print(f"\nFetched {summary['fetched']}, already stored {summary['cached']}, missing {summary['missing']}, "
+          f"errors {len(summary['errors'])} in {time.perf_counter() - started:.1f}s")
+    for number, error in summary["errors"]:
+        print(f"  {args.collection}:{number}: {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
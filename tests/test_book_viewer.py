@@ -0,0 +1,105 @@
+# tests/test_book_viewer.py
+# PDF paging must not read the whole book: only the hashing pass (in
+# HASH_CHUNK_SIZE chunks) and pypdf's reads of the objects a page needs.
+import builtins
+
+import pytest
+
+import book_viewer
+
+pypdf = pytest.importorskip("pypdf")
+PAGES = 20
+PAGE_PADDING = 200_000
+
+
+def make_pdf(path):
+    # PAGES pages, each with a large content stream (a PDF comment) and one line of text
+    writer = pypdf.PdfWriter()
+    for number in range(1, PAGES + 1):
+        page = writer.add_blank_page(width=200, height=200)
+        content = pypdf.generic.DecodedStreamObject()
+        content.set_data(b"%" + b"x" * PAGE_PADDING + b"\nBT /F1 12 Tf 20 100 Td (Page %d) Tj ET\n" % number)
+        page[pypdf.generic.NameObject("/Contents")] = writer._add_object(content)
+        font = pypdf.generic.DictionaryObject({
+            pypdf.generic.NameObject("/Type"): pypdf.generic.NameObject("/Font"),
+            pypdf.generic.NameObject("/Subtype"): pypdf.generic.NameObject("/Type1"),
+            pypdf.generic.NameObject("/BaseFont"): pypdf.generic.NameObject("/Helvetica"),
+        })
+        page[pypdf.generic.NameObject("/Resources")] = pypdf.generic.DictionaryObject({
+            pypdf.generic.NameObject("/Font"): pypdf.generic.DictionaryObject({pypdf.generic.NameObject("/F1"): font}),
+        })
+    with open(path, "wb") as file:
+        writer.write(file)
+
+
+class CountingFile:
+    def __init__(self, file, reads):
+        self._file = file
+        self._reads = reads
+
+    def read(self, *args):
+        data = self._file.read(*args)
+        self._reads.append(len(data))
+        return data
+
+    def readinto(self, buffer):
+        count = self._file.readinto(buffer)
+        self._reads.append(count or 0)
+        return count
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+@pytest.fixture
+def book(tmp_path, monkeypatch):
+    path = str(tmp_path / "book.pdf")
+    make_pdf(path)
+    reads = []
+    real_open = builtins.open
+
+    def counting_open(file, mode="r", *args, **kwargs):
+        handle = real_open(file, mode, *args, **kwargs)
+        if str(file) == path and "b" in mode:
+            return CountingFile(handle, reads)
+        return handle
+
+    monkeypatch.setattr(builtins, "open", counting_open)
+    monkeypatch.setattr(book_viewer, "HASH_CHUNK_SIZE", 1 << 16)
+    # Every test starts from cold caches (the books have the same content hash)
+    monkeypatch.setattr(book_viewer, "_fingerprints", {})
+    monkeypatch.setattr(book_viewer, "_renders", book_viewer.OrderedDict())
+    monkeypatch.setattr(book_viewer, "_pdf_handles", book_viewer.OrderedDict())
+    return path, reads
+
+
+def test_pdf_pages_are_read_without_loading_the_file(book):
+    path, reads = book
+    size = book_viewer.os.path.getsize(path)
+    assert book_viewer.pdf_page_count(path) == PAGES
+    texts = [book_viewer.pdf_page_text(path, page) for page in range(1, 6)]
+    assert texts[0].strip() == "Page 1" and texts[4].strip() == "Page 5"
+    assert book_viewer.pdf_page_range(path, 1, 5).startswith(b"%PDF")
+    assert max(reads) < size // 4
+    # Five pages of content streams plus the hashing pass, not the whole file again
+    assert sum(reads) < size + 6 * (PAGE_PADDING + 1024)
+
+
+def test_pdf_helpers_share_one_reader(book):
+    path, _ = book
+    book_viewer.pdf_page_count(path)
+    book_viewer.pdf_page_text(path, 2)
+    with book_viewer._pdf_reader(path) as first:
+        pass
+    with book_viewer._pdf_reader(path) as second:
+        pass
+    assert first is second
@@ -0,0 +1,33 @@
+# tests/test_hadith_search.py
+# A process that opens an index already built on disk searches it at once;
+# only a real rebuild runs in the background.
+import os
+import shutil
+
+from hadith_search import build_index, open_index
+
+DATASETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hadith_datasets")
+
+
+def copy_collection(tmp_path, name="muslim"):
+    datasets_dir = tmp_path / "datasets"
+    datasets_dir.mkdir()
+    shutil.copy2(os.path.join(DATASETS_DIR, name + ".json"), datasets_dir)
+    return str(datasets_dir)
+
+
+def test_cold_open_of_a_built_index_searches_immediately(tmp_path):
+    datasets_dir = copy_collection(tmp_path)
+    build_index(datasets_dir)
+    index = open_index(datasets_dir)
+    assert not index.building
+    assert index.collections() == ["muslim"]
+    assert index.search("prayer")
+
+
+def test_unbuilt_index_is_built_in_the_background(tmp_path):
+    datasets_dir = copy_collection(tmp_path)
+    index = open_index(datasets_dir, str(tmp_path / "index"))
+    assert index.building or index.collections() == ["muslim"]
+    index.refresh()
+    assert index.search("prayer")
@@ -0,0 +1,38 @@
+# tests/test_hadith_store.py
+# An ingested index is only published when its rows match load_collection's
+# row for row: search doc numbers and related-table keys are rows.
+import json
+
+from hadith_store import ingest_collection, load_collection, open_indexed
+
+
+def record(hadith_id, text):
+    return {"id": hadith_id, "header": "", "hadith_english": text, "book": "", "refno": f"Test {hadith_id}",
+            "bookName": "Book", "chapterName": "Chapter"}
+
+
+def write_dataset(datasets_dir, records):
+    datasets_dir.mkdir(exist_ok=True)
+    with open(datasets_dir / "test.json", "w", encoding="utf-8") as file:
+        json.dump({"hadith": records}, file)
+    return str(datasets_dir)
+
+
+def test_valid_collection_is_published_row_for_row(tmp_path):
+    datasets_dir = write_dataset(tmp_path / "datasets", [record(1, "first"), record(2, "second")])
+    result = ingest_collection(datasets_dir, "test")
+    assert result["published"] and not result["errors"]
+    indexed = open_indexed(datasets_dir, "test")
+    parsed = load_collection(datasets_dir, "test")
+    assert [r.to_dict() for r in indexed] == [r.to_dict() for r in parsed]
+
+
+def test_collection_with_invalid_records_is_not_published(tmp_path):
+    broken = record(2, "second")
+    del broken["refno"]
+    datasets_dir = write_dataset(tmp_path / "datasets", [record(1, "first"), broken, record(3, "third")])
+    result = ingest_collection(datasets_dir, "test")
+    assert not result["published"]
+    assert result["errors"] == [(1, ["missing 'refno'"])]
+    assert open_indexed(datasets_dir, "test") is None
+    assert not list((tmp_path / "datasets" / ".indexed").glob("test.*"))
@@ -0,0 +1,29 @@
+# tests/test_hijri.py
+# The tabular engine against published dates; observed (sighted) calendars
+# may differ by a day, never more.
+from datetime import date
+
+import numpy as np
+
+from hijri import check, convert_range, gregorian_to_jdn, hijri_to_gregorian
+
+
+def test_published_tabular_dates_are_exact():
+    results = check()
+    for name in ("epoch", "calendrical-calculations"):
+        source, exact, total, mismatches = results[name]
+        assert total and mismatches == []
+
+
+def test_observed_dates_are_within_a_day():
+    for name, (source, exact, total, mismatches) in check().items():
+        assert all(abs(diff) <= source["max_days_off"] for _, diff in mismatches), name
+
+
+def test_century_round_trip():
+    # Every day of a century converts to Hijri and back to itself
+    start, end = date(1950, 1, 1), date(2050, 12, 31)
+    year, month, day = convert_range(start, end)
+    back = gregorian_to_jdn(*hijri_to_gregorian(year, month, day))
+    first = int(gregorian_to_jdn(start.year, start.month, start.day))
+    assert (back == np.arange(first, first + (end - start).days + 1)).all()
@@ -0,0 +1,57 @@
+# tests/test_http_client.py
+# The memory cache stays within cache_size however entries arrive, and
+# coalesced requests only share a result when they share a cache policy.
+import threading
+
+from http_client import HttpClient
+from stub_server import StubServer
+
+
+def test_disk_loads_respect_cache_size(tmp_path):
+    stub = StubServer([(r"/item/(\d+)", lambda query, number: (200, {"item": number}))]).start()
+    try:
+        writer = HttpClient(cache_dir=str(tmp_path))
+        for number in range(5):
+            writer.get(f"{stub.base_url}/item/{number}")
+
+        reader = HttpClient(cache_size=2, cache_dir=str(tmp_path))
+        for number in range(5):
+            assert reader.get_json(f"{stub.base_url}/item/{number}") == {"item": str(number)}
+        assert reader.stats()["cached_entries"] == 2
+        assert reader.stats()["requests"] == 0
+    finally:
+        stub.stop()
+
+
+def test_coalescing_is_keyed_by_cache_policy():
+    release = threading.Event()
+
+    def slow(query):
+        release.wait(5)
+        return 200, {"ok": True}
+
+    stub = StubServer([(r"/slow", slow)]).start()
+    try:
+        client = HttpClient()
+        url = f"{stub.base_url}/slow"
+        threads = [threading.Thread(target=client.get, args=(url,), kwargs={"ttl": ttl})
+                   for ttl in (0, 0, 60)]
+        for thread in threads:
+            thread.start()
+        # Hold the responses until every caller has either sent its own
+        # request or joined one already in flight
+        for _ in range(200):
+            stats = client.stats()
+            if stats["requests"] + stats["coalesced"] == len(threads):
+                break
+            release.wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        # The two ttl=0 callers share one request; the ttl=60 caller makes
+        # its own and is the only one whose response is cached
+        assert client.stats()["requests"] == 2
+        assert client.stats()["coalesced"] == 1
+        assert client.stats()["cached_entries"] == 1
+    finally:
+        stub.stop()
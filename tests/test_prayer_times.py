@@ -0,0 +1,52 @@
+# tests/test_prayer_times.py
+# The engine against published timetable rows (timeanddate.com/USNO sunrise,
+# sunset and solar noon; the Umm al-Qura Makkah timetable), within 2 minutes.
+import numpy as np
+
+from prayer_times import timetable
+
+TOLERANCE = 2
+
+# (place, latitude, longitude, time zone, method, asr, date, published row)
+PUBLISHED = [
+    ("London", 51.5074, -0.1278, "Europe/London", "MWL", "Standard", "2025-06-21",
+     {"Sunrise": "04:43", "Maghrib": "21:21"}),
+    ("London", 51.5074, -0.1278, "Europe/London", "MWL", "Standard", "2025-12-21",
+     {"Sunrise": "08:04", "Maghrib": "15:53"}),
+    ("New York", 40.7128, -74.0060, "America/New_York", "ISNA", "Standard", "2025-06-21",
+     {"Sunrise": "05:25", "Maghrib": "20:31"}),
+    ("New York", 40.7128, -74.0060, "America/New_York", "ISNA", "Standard", "2025-12-21",
+     {"Sunrise": "07:17", "Maghrib": "16:32"}),
+    # Solar noon at Greenwich on the equation of time's extremes
+    ("Greenwich", 51.4779, 0.0, 0, "MWL", "Standard", "2025-02-11", {"Dhuhr": "12:14"}),
+    ("Greenwich", 51.4779, 0.0, 0, "MWL", "Standard", "2025-11-03", {"Dhuhr": "11:44"}),
+    ("Makkah", 21.3891, 39.8579, "Asia/Riyadh", "Makkah", "Standard", "2025-01-01",
+     {"Fajr": "05:37", "Sunrise": "06:58", "Dhuhr": "12:24", "Maghrib": "17:49"}),
+]
+
+
+def minutes(value):
+    hours, mins = value.split(":")
+    return int(hours) * 60 + int(mins)
+
+
+def row(latitude, longitude, time_zone, method, asr, day):
+    return timetable(latitude, longitude, time_zone, np.array([day], dtype="datetime64[D]"), method, asr)[0]
+
+
+def test_published_rows():
+    for place, latitude, longitude, time_zone, method, asr, day, published in PUBLISHED:
+        computed = row(latitude, longitude, time_zone, method, asr, day)
+        for prayer, value in published.items():
+            assert abs(minutes(computed[prayer]) - minutes(value)) <= TOLERANCE, (place, day, prayer, computed[prayer])
+
+
+def test_method_definitions():
+    # Umm al-Qura puts Isha 90 minutes after Maghrib outside Ramadan; Karachi
+    # and MWL both take Fajr at 18 degrees, Karachi Isha at 18 rather than 17
+    makkah = row(21.3891, 39.8579, "Asia/Riyadh", "Makkah", "Standard", "2025-01-01")
+    assert minutes(makkah["Isha"]) - minutes(makkah["Maghrib"]) == 90
+    karachi = row(24.8607, 67.0011, "Asia/Karachi", "Karachi", "Hanafi", "2025-01-01")
+    mwl = row(24.8607, 67.0011, "Asia/Karachi", "MWL", "Hanafi", "2025-01-01")
+    assert karachi["Fajr"] == mwl["Fajr"]
+    assert minutes(karachi["Isha"]) > minutes(mwl["Isha"])
@@ -0,0 +1,29 @@
+# tests/test_quran_store.py
+# A text export only imports the Surahs it holds, and imports made through
+# another QuranStore (the CLI) are seen by a store that is already open.
+import os
+
+from quran_store import QuranStore, import_text_export
+
+HUD_EXPORT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Surah_11_Hud.txt")
+
+
+def test_partial_import_leaves_other_surahs_to_the_api(tmp_path):
+    store = QuranStore(str(tmp_path / "quran.sqlite3"))
+    import_text_export(store, [HUD_EXPORT])
+    assert len(store.surah_texts(11, "ar")) == 123
+    assert store.surah_texts(1, "ar") is None
+    assert store.imported_surahs("ar") == {11}
+    assert store.edition("ar")["identifier"] == "ar"
+
+
+def test_import_from_another_store_is_picked_up(tmp_path):
+    path = str(tmp_path / "quran.sqlite3")
+    app_store = QuranStore(path)
+    assert app_store.surah_texts(11, "ar") is None
+    revision = app_store.revision
+
+    import_text_export(QuranStore(path), [HUD_EXPORT])
+    assert app_store.revision != revision
+    assert len(app_store.surah_texts(11, "ar")) == 123
+    assert "en.sahih" in app_store.imported_editions()
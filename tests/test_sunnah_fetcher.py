@@ -0,0 +1,62 @@
+# tests/test_sunnah_fetcher.py
+# Only a real 404 may be stored as "no hadith", and only for NEGATIVE_TTL.
+import os
+
+import pytest
+
+from stub_server import StubServer
+from sunnah_fetcher import FIXTURES_DIR, SunnahFetcher, SunnahStore
+
+CHALLENGE_PAGE = "<html><body><div class=\"challenge\">Checking your browser...</div></body></html>"
+
+
+@pytest.fixture
+def server():
+    pages = {}
+
+    def hadith_page(query, collection, number):
+        return pages.get(f"{collection}:{number}", (404, "<html><body>Page not found</body></html>"))
+
+    stub = StubServer([(r"/(\w+):(\w+)", hadith_page)]).start()
+    stub.pages = pages
+    yield stub
+    stub.stop()
+
+
+def make_fetcher(tmp_path, server, **store_options):
+    return SunnahFetcher(SunnahStore(str(tmp_path / "sunnah.sqlite3"), **store_options), server.base_url, rate=0)
+
+
+def test_page_without_hadith_is_an_error_and_not_stored(tmp_path, server):
+    fetcher = make_fetcher(tmp_path, server)
+    server.pages["muslim:1"] = (200, CHALLENGE_PAGE)
+    with pytest.raises(ValueError):
+        fetcher.get("muslim", "1")
+    assert fetcher.store.get("muslim", "1") is None
+
+    # Once the real page is served the hadith is found
+    with open(os.path.join(FIXTURES_DIR, "muslim_1.html"), "r", encoding="utf-8") as file:
+        server.pages["muslim:1"] = (200, file.read())
+    assert fetcher.get("muslim", "1")["reference"] != "No reference"
+
+
+def test_prefetch_reports_page_without_hadith_as_error(tmp_path, server):
+    fetcher = make_fetcher(tmp_path, server)
+    server.pages["muslim:2"] = (200, CHALLENGE_PAGE)
+    summary = fetcher.prefetch("muslim", ["2", "3"])
+    assert summary["missing"] == 1 and [number for number, _ in summary["errors"]] == ["2"]
+    assert fetcher.store.get("muslim", "2") is None
+    assert fetcher.store.get("muslim", "3") == (False, None)
+
+
+def test_not_found_is_cached_until_negative_ttl(tmp_path, server):
+    fetcher = make_fetcher(tmp_path, server)
+    assert fetcher.get("muslim", "999999") is None
+    requests = server.request_count
+    assert fetcher.get("muslim", "999999") is None
+    assert server.request_count == requests
+
+    expired = make_fetcher(tmp_path, server, negative_ttl=-1)
+    assert expired.store.get("muslim", "999999") is None
+    expired.get("muslim", "999999")
+    assert server.request_count == requests + 1
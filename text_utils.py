@@ -0,0 +1,14 @@
+# text_utils.py
+# Text helpers shared by the Quran and hadith modules. Kept free of other
+# project imports so any module (or page) can use them without loading a store.
+from functools import lru_cache
+
+
+@lru_cache(maxsize=65536)
+def stem_english(word):
+    # Plural/verb endings only, so "believers" and "believe" stay apart but
+    # "messengers", "messenger's" and "messenger" meet
+    for suffix, keep in (("ies", "y"), ("sses", "ss"), ("es", "e"), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            return word[:-len(suffix)] + keep
+    return word